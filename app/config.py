@@ -1,6 +1,7 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import Dict, List
 import secrets
+from pathlib import Path
 
 
 class Settings(BaseSettings):
@@ -25,16 +26,61 @@ class Settings(BaseSettings):
     REDIS_PORT: int = 6379
     REDIS_DB: int = 0
     REDIS_PASSWORD: str = ""
+    REDIS_MAX_CONNECTIONS: int = 50  # Async client pool size per process
+    REDIS_HEALTH_CHECK_INTERVAL: float = 5.0  # Seconds between background PINGs
     CACHE_TTL: int = 3600  # Default 1 hour
+    L1_CACHE_MAX_SIZE: int = 10000  # In-process entries in front of Redis
+    L1_CACHE_TTL: float = 2.0  # Default seconds an in-process copy may be served
+    CACHE_INVALIDATION_CHANNEL: str = "cache:invalidate"  # Redis pub/sub channel for L1 invalidation
+    CACHE_TRACKING_PREFIXES: str = "trading_pairs:,profile:"  # Redis client-side caching (CLIENT TRACKING), comma-separated, empty disables
+    CACHE_TRACKING_L1_TTL: float = 300.0  # Seconds a tracked key may stay in process memory
+    CACHE_CODEC: str = "orjson"  # json, orjson or msgpack (falls back to json if not installed)
+    CACHE_CODEC_NAMESPACES: str = "market=msgpack,trading_pairs=msgpack"  # Per key-prefix overrides, comma-separated
+    CACHE_COMPRESSION: str = "none"  # zstd or lz4 (requires zstandard / lz4), or none
+    CACHE_COMPRESSION_MIN_SIZE: int = 1024  # Bytes; smaller values are stored uncompressed
+    
+    # Single-flight request coalescing for cache misses
+    SINGLE_FLIGHT_DISTRIBUTED: bool = True  # Coalesce across workers via a Redis lock
+    SINGLE_FLIGHT_LOCK_TTL: float = 10.0
+    SINGLE_FLIGHT_WAIT_TIMEOUT: float = 10.0
     
     # Vault (from .env, optional)
     VAULT_URL: str = ""
     VAULT_TOKEN: str = ""
     VAULT_MOUNT_PATH: str = "secret"
+    VAULT_TIMEOUT: float = 5.0
+    VAULT_SECRET_CACHE_TTL: float = 300.0  # Seconds a decrypted secret stays in memory
+    VAULT_SECRET_CACHE_SIZE: int = 1024  # Max cached secrets per process
     
     # Kraken API (from .env)
     KRAKEN_API_BASE_URL: str = "https://api.kraken.com"
     
+    # Kraken HTTP transport (shared connection pool)
+    KRAKEN_HTTP_TIMEOUT: float = 30.0
+    KRAKEN_HTTP_MAX_CONNECTIONS: int = 100
+    KRAKEN_HTTP_MAX_KEEPALIVE: int = 20
+    KRAKEN_HTTP_KEEPALIVE_EXPIRY: float = 30.0
+    KRAKEN_HTTP2: bool = True
+    
+    # Kraken API rate governor (per-key call counter)
+    KRAKEN_RATE_TIER: str = "starter"  # "starter", "intermediate" or "pro"
+    KRAKEN_RATE_MAX_WAIT: float = 30.0  # Max seconds a call may be queued
+    
+    # Kraken WebSocket market-data ingester (kraken-service)
+    KRAKEN_WS_ENABLED: bool = False
+    KRAKEN_WS_URL: str = "wss://ws.kraken.com"
+    KRAKEN_WS_PAIRS: str = "XBT/USD,ETH/USD"  # Comma-separated
+    KRAKEN_WS_OHLC_INTERVAL: int = 1  # Minutes
+    KRAKEN_WS_BOOK_DEPTH: int = 10
+    KRAKEN_WS_FLUSH_INTERVAL: float = 0.5  # Seconds between Redis writes
+    KRAKEN_WS_MAX_STALENESS: float = 5.0  # Seconds before in-memory data is not served
+    
+    # Incremental OHLC store (kraken-service)
+    KRAKEN_OHLC_WINDOW: int = 720  # Candles kept per pair/interval
+    KRAKEN_OHLC_REFRESH_INTERVAL: float = 60.0  # Seconds between incremental syncs
+    KRAKEN_OHLC_BASE_INTERVAL: int = 1  # Minutes; the only interval refreshed from Kraken
+    KRAKEN_OHLC_RESAMPLED_INTERVALS: str = "5,15,60,240,1440"  # Derived from the base interval
+    
     # Kraken API Keys (from .env)
     KRAKEN_API_KEY_READONLY: str = ""
     KRAKEN_API_SECRET_READONLY: str = ""
@@ -66,9 +112,17 @@ class Settings(BaseSettings):
     RABBITMQ_USER: str = "guest"
     RABBITMQ_PASSWORD: str = "guest"
     RABBITMQ_VHOST: str = "/"
+    RABBITMQ_PUBLISH_CHANNELS: int = 4  # Confirm-mode channels used round robin for publishing
+    RABBITMQ_MAX_INFLIGHT_PUBLISHES: int = 1000  # Unconfirmed publishes allowed at once
+    RABBITMQ_PREFETCH_COUNT: int = 100  # Unacked messages pushed to each consumer
+    RABBITMQ_CONSUMER_LANES: int = 8  # Messages handled concurrently per consumed queue
+    RABBITMQ_MAX_DELIVERY_ATTEMPTS: int = 5  # Failed attempts before a message is dead-lettered
+    RABBITMQ_RETRY_BASE_DELAY_MS: int = 1000  # First redelivery delay, doubled per attempt
+    RABBITMQ_RETRY_MAX_DELAY_MS: int = 60000
     
     class Config:
-        env_file = ".env"
+        # Project-root .env regardless of the working directory (services run from services/<name>/)
+        env_file = str(Path(__file__).parent.parent / ".env")
         case_sensitive = True
         extra = "ignore"  # Ignore extra fields from .env
 
@@ -83,6 +137,27 @@ class Settings(BaseSettings):
         """Parse CORS origins from comma-separated string"""
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",") if origin.strip()]
     
+    @property
+    def kraken_ws_pairs_list(self) -> List[str]:
+        """Parse WebSocket pairs from comma-separated string"""
+        return [pair.strip() for pair in self.KRAKEN_WS_PAIRS.split(",") if pair.strip()]
+    
+    @property
+    def kraken_ohlc_resampled_intervals_list(self) -> List[int]:
+        """Parse resampled OHLC intervals from comma-separated string"""
+        return [int(interval) for interval in self.KRAKEN_OHLC_RESAMPLED_INTERVALS.split(",") if interval.strip()]
+    
+    @property
+    def cache_tracking_prefixes_list(self) -> List[str]:
+        """Parse client-side caching key prefixes from comma-separated string"""
+        return [prefix.strip() for prefix in self.CACHE_TRACKING_PREFIXES.split(",") if prefix.strip()]
+    
+    @property
+    def cache_codec_namespaces_map(self) -> Dict[str, str]:
+        """Parse per-namespace cache codecs from comma-separated namespace=codec pairs"""
+        pairs = (item.split("=", 1) for item in self.CACHE_CODEC_NAMESPACES.split(",") if "=" in item)
+        return {namespace.strip(): codec.strip() for namespace, codec in pairs}
+    
     @property
     def kraken_api_key(self) -> str:
         """Get appropriate Kraken API key based on mode"""
@@ -63,3 +63,20 @@ class PermissionResponse(BaseModel):
 
     model_config = {"from_attributes": True}
 
+
+class DeadLetterResponse(BaseModel):
+    queue: str
+    body: Any  # Decoded JSON, or the raw text if the message was not valid JSON
+    attempts: int
+    error: Optional[str] = None
+    failed_at: Optional[str] = None
+
+
+class DeadLetterListResponse(BaseModel):
+    queue: str
+    messages: List[DeadLetterResponse]
+
+
+class DeadLetterReplayResponse(BaseModel):
+    queue: str
+    replayed: int
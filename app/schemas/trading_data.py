@@ -16,6 +16,21 @@ class BalanceResponse(BaseModel):
     available: float
 
 
+class AssetBalance(BaseModel):
+    asset: str
+    balance: float
+    available: float
+    price: Optional[float] = None  # In the quote currency; None if there is no conversion route
+    value: Optional[float] = None
+
+
+class PortfolioResponse(BaseModel):
+    quote: str
+    total_value: float  # Sum over priced assets
+    balances: List[AssetBalance]
+    unpriced: List[str]  # Assets held that could not be valued
+
+
 class OHLCData(BaseModel):
     time: int
     open: float
@@ -31,6 +46,15 @@ class OHLCResponse(BaseModel):
     data: List[OHLCData]
 
 
+class IndicatorResponse(BaseModel):
+    pair: str
+    interval: int
+    indicator: str
+    params: Dict[str, float]
+    time: List[int]
+    values: Dict[str, List[Optional[float]]]  # One series per output, None until warmed up
+
+
 class TickerData(BaseModel):
     pair: str
     ask: float
@@ -41,6 +65,10 @@ class TickerData(BaseModel):
     low: float
 
 
+class TickerBatchResponse(BaseModel):
+    tickers: List[TickerData]
+
+
 class TradingPairsResponse(BaseModel):
     pairs: List[str]
 
@@ -0,0 +1,321 @@
+"""
+Asyncio Redis client
+
+Same get/set/delete API as RedisClient, but non-blocking and without a
+PING before every operation: one shared connection pool is health-checked by a
+background task, and while Redis is marked down operations return their
+"cache miss" value immediately instead of waiting for a socket timeout.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+import redis.asyncio as aioredis
+from redis.client import NEVER_DECODE
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+from app.config import settings
+from app.utils.cache_codec import get_cache_serializer
+from app.utils.redis_client import (
+    INVALIDATE_BATCH_SIZE,
+    RELEASE_LOCK_SCRIPT,
+    SET_WITH_TAGS_SCRIPT,
+    BatchCommands,
+    tag_key,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBatchCommands(BatchCommands):
+    """BatchCommands on a redis.asyncio pipeline"""
+
+    def __init__(self, pipe, serializer, client: "AsyncRedisClient"):
+        super().__init__(pipe, serializer)
+        self._client = client
+
+    async def execute(self) -> List[Any]:
+        """Send the queued commands (AsyncRedisClient.pipeline calls this on exit)"""
+        if self._pipe is None or not self._decoders:
+            return self._resolve(None)
+        try:
+            raw = await self._pipe.execute(raise_on_error=False)
+        except Exception as e:
+            self._client._failed("pipeline", e)
+            return self._resolve(None)
+        self._client._healthy = True
+        return self._resolve(raw)
+
+
+class AsyncRedisClient:
+    """Redis client for caching operations (redis.asyncio, pooled)"""
+
+    def __init__(self, pool: Optional[aioredis.ConnectionPool] = None, health_check_interval: Optional[float] = None):
+        self.health_check_interval = health_check_interval or settings.REDIS_HEALTH_CHECK_INTERVAL
+        self.pool = pool or aioredis.ConnectionPool(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            password=settings.REDIS_PASSWORD if settings.REDIS_PASSWORD else None,
+            decode_responses=True,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+            socket_connect_timeout=2,
+            socket_timeout=2,
+        )
+        self.client = aioredis.Redis(connection_pool=self.pool)
+        self.serializer = get_cache_serializer()
+        self._healthy = True
+        self._down_since = 0.0
+        self._health_task: Optional[asyncio.Task] = None
+        self._scripts: Dict[str, Any] = {}
+
+    @property
+    def connected(self) -> bool:
+        """Whether Redis answered the last health check / operation"""
+        return self._healthy
+
+    async def start(self) -> None:
+        """Check the connection once and start the background health check"""
+        await self._ping()
+        if self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def close(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+        await self.client.aclose()
+        await self.pool.disconnect()
+
+    async def _ping(self) -> bool:
+        try:
+            await self.client.ping()
+        except Exception as e:
+            self._mark_down(e)
+            return False
+        if not self._healthy:
+            logger.info("Redis connection restored")
+        self._healthy = True
+        return True
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            await self._ping()
+
+    def _mark_down(self, error: Exception) -> None:
+        if self._healthy:
+            logger.warning(f"Redis not available: {error}. Continuing without Redis cache.")
+        self._healthy = False
+        self._down_since = time.monotonic()
+
+    def _available(self) -> bool:
+        # Without a running health check, retry once per interval after a failure
+        if self._healthy:
+            return True
+        return self._health_task is None and time.monotonic() - self._down_since >= self.health_check_interval
+
+    def _failed(self, op: str, error: Exception) -> None:
+        if isinstance(error, (RedisConnectionError, RedisTimeoutError, OSError)):
+            self._mark_down(error)
+        else:
+            logger.warning(f"Redis {op} error: {error}")
+
+    def _decode(self, value: Optional[bytes]) -> Optional[Any]:
+        try:
+            return self.serializer.decode(value)
+        except Exception as e:
+            # Unknown codec/compression (or corrupt value): treat as a cache miss
+            logger.warning(f"Redis value decode error: {e}")
+            return None
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get value from Redis"""
+        if not self._available():
+            return None
+        try:
+            # Values are binary (codec header + payload): read them undecoded
+            value = await self.client.execute_command("GET", key, **{NEVER_DECODE: True})
+        except Exception as e:
+            self._failed("get", e)
+            return None
+        self._healthy = True
+        return self._decode(value)
+
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get several values in one round trip (None for missing keys)"""
+        if not keys or not self._available():
+            return [None] * len(keys)
+        try:
+            values = await self.client.execute_command("MGET", *keys, **{NEVER_DECODE: True})
+        except Exception as e:
+            self._failed("mget", e)
+            return [None] * len(keys)
+        self._healthy = True
+        return [self._decode(value) for value in values]
+
+    async def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Optional[List[str]] = None) -> bool:
+        """Set value in Redis with optional TTL, optionally registering it under tags"""
+        if not self._available():
+            return False
+        try:
+            value = self.serializer.encode(key, value)
+            ttl = ttl or settings.CACHE_TTL
+            if tags:
+                keys = [key] + [tag_key(tag) for tag in tags]
+                result = await self.client.eval(SET_WITH_TAGS_SCRIPT, len(keys), *keys, ttl, value)
+            else:
+                result = await self.client.setex(key, ttl, value)
+        except Exception as e:
+            self._failed("set", e)
+            return False
+        self._healthy = True
+        return bool(result)
+
+    async def mset_with_ttl(
+        self, items: Dict[str, Any], ttl: Optional[int] = None, tags: Optional[Dict[str, List[str]]] = None
+    ) -> bool:
+        """Set several values with the same TTL in one round trip (`tags` maps keys to their tags)"""
+        if not items:
+            return True
+        async with self.pipeline() as batch:
+            for key, value in items.items():
+                batch.set(key, value, ttl=ttl, tags=tags.get(key) if tags else None)
+        return all(batch.results)
+
+    @asynccontextmanager
+    async def pipeline(self) -> AsyncIterator[AsyncBatchCommands]:
+        """
+        Queue commands and send them in one round trip when the block exits
+
+            async with redis.pipeline() as batch:
+                batch.get(key)
+                batch.delete(other_key)
+            value, deleted = batch.results
+        """
+        pipe = self.client.pipeline(transaction=False) if self._available() else None
+        batch = AsyncBatchCommands(pipe, self.serializer, self)
+        try:
+            yield batch
+            await batch.execute()
+        finally:
+            if pipe is not None:
+                await pipe.reset()
+
+    async def delete(self, key: str) -> bool:
+        """Delete key from Redis"""
+        if not self._available():
+            return False
+        try:
+            result = await self.client.delete(key)
+        except Exception as e:
+            self._failed("delete", e)
+            return False
+        self._healthy = True
+        return bool(result)
+
+    async def exists(self, key: str) -> bool:
+        """Check if key exists"""
+        if not self._available():
+            return False
+        try:
+            result = await self.client.exists(key)
+        except Exception as e:
+            self._failed("exists", e)
+            return False
+        self._healthy = True
+        return bool(result)
+
+    async def eval_script(self, script: str, keys: List[str], args: List[Any]) -> Any:
+        """
+        Run a Lua script (EVALSHA, loading it on first use)
+
+        Raises:
+            redis.exceptions.RedisError: Redis is unavailable or the script failed
+        """
+        if not self._available():
+            raise RedisConnectionError("Redis is marked down")
+        registered = self._scripts.get(script)
+        if registered is None:
+            registered = self._scripts[script] = self.client.register_script(script)
+        try:
+            result = await registered(keys=keys, args=args)
+        except Exception as e:
+            self._failed("eval", e)
+            raise
+        self._healthy = True
+        return result
+
+    async def acquire_lock(self, key: str, ttl: float) -> Optional[str]:
+        """Try to take a lock (SET NX PX); returns the owner token or None if held elsewhere"""
+        if not self._available():
+            return None
+        token = uuid.uuid4().hex
+        try:
+            acquired = await self.client.set(key, token, nx=True, px=int(ttl * 1000))
+        except Exception as e:
+            self._failed("acquire_lock", e)
+            return None
+        self._healthy = True
+        return token if acquired else None
+
+    async def release_lock(self, key: str, token: str) -> bool:
+        """Release a lock previously taken with acquire_lock"""
+        try:
+            return bool(await self.eval_script(RELEASE_LOCK_SCRIPT, [key], [token]))
+        except Exception:
+            return False
+
+    async def invalidate_tag(self, tag: str) -> int:
+        """Delete every key registered under `tag` (O(tagged keys), no keyspace scan)"""
+        if not self._available():
+            return 0
+        deleted = 0
+        try:
+            members = list(await self.client.smembers(tag_key(tag)))
+            for i in range(0, len(members), INVALIDATE_BATCH_SIZE):
+                deleted += await self.client.unlink(*members[i:i + INVALIDATE_BATCH_SIZE])
+            await self.client.unlink(tag_key(tag))
+        except Exception as e:
+            self._failed("invalidate_tag", e)
+        return deleted
+
+    async def invalidate_pattern(self, pattern: str) -> int:
+        """Invalidate all keys matching pattern (incremental SCAN, never KEYS)"""
+        if not self._available():
+            return 0
+        deleted = 0
+        try:
+            batch = []
+            async for key in self.client.scan_iter(match=pattern, count=INVALIDATE_BATCH_SIZE):
+                batch.append(key)
+                if len(batch) >= INVALIDATE_BATCH_SIZE:
+                    deleted += await self.client.unlink(*batch)
+                    batch = []
+            if batch:
+                deleted += await self.client.unlink(*batch)
+        except Exception as e:
+            self._failed("invalidate_pattern", e)
+        return deleted
+
+
+# Global instance
+_async_redis: Optional[AsyncRedisClient] = None
+
+
+def get_async_redis() -> AsyncRedisClient:
+    """Get or create the process-wide async Redis client (one shared pool)"""
+    global _async_redis
+    if _async_redis is None:
+        _async_redis = AsyncRedisClient()
+    return _async_redis
+
+
+async def close_async_redis() -> None:
+    """Close the global async Redis client and its pool"""
+    global _async_redis
+    if _async_redis is not None:
+        await _async_redis.close()
+        _async_redis = None
@@ -0,0 +1,184 @@
+"""
+Cache value serialization
+
+Values are encoded with a codec chosen by key namespace (the part before the
+first ':') and compressed above a size threshold. Every encoded value starts
+with a small header:
+
+    magic (0x00) | version (1) | codec id | compression id | payload
+
+A JSON document never starts with a NUL byte, so entries written before the
+header existed (plain JSON or plain strings) are still decoded.
+orjson, msgpack, zstandard and lz4 are optional; without them the stdlib JSON
+codec and no compression are used.
+"""
+import json
+import logging
+import struct
+from typing import Any, Callable, Dict, Optional, Union
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+MAGIC = b"\x00"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<cBBB")  # magic, version, codec id, compression id
+
+
+class Codec:
+    """Serializer for cache values"""
+
+    def __init__(self, codec_id: int, name: str, dumps: Callable[[Any], bytes], loads: Callable[[bytes], Any]):
+        self.id = codec_id
+        self.name = name
+        self.dumps = dumps
+        self.loads = loads
+
+
+class Compression:
+    """Byte-level compressor applied after the codec"""
+
+    def __init__(self, compression_id: int, name: str, compress: Callable[[bytes], bytes], decompress: Callable[[bytes], bytes]):
+        self.id = compression_id
+        self.name = name
+        self.compress = compress
+        self.decompress = decompress
+
+
+CODECS: Dict[str, Codec] = {
+    "json": Codec(0, "json", lambda value: json.dumps(value, separators=(",", ":")).encode(), json.loads),
+}
+if orjson is not None:
+    CODECS["orjson"] = Codec(1, "orjson", lambda value: orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS), orjson.loads)
+if msgpack is not None:
+    CODECS["msgpack"] = Codec(
+        2, "msgpack",
+        lambda value: msgpack.packb(value, use_bin_type=True),
+        lambda data: msgpack.unpackb(data, raw=False, strict_map_key=False),
+    )
+
+COMPRESSIONS: Dict[str, Compression] = {
+    "none": Compression(0, "none", bytes, bytes),
+}
+if zstandard is not None:
+    COMPRESSIONS["zstd"] = Compression(
+        1, "zstd",
+        zstandard.ZstdCompressor(level=3).compress,
+        lambda data: zstandard.ZstdDecompressor().decompress(data),
+    )
+if lz4_frame is not None:
+    COMPRESSIONS["lz4"] = Compression(2, "lz4", lz4_frame.compress, lz4_frame.decompress)
+
+_CODECS_BY_ID = {codec.id: codec for codec in CODECS.values()}
+_COMPRESSIONS_BY_ID = {compression.id: compression for compression in COMPRESSIONS.values()}
+
+
+class CacheSerializer:
+    """Encode/decode cache values with per-namespace codecs and optional compression"""
+
+    def __init__(
+        self,
+        codec: Optional[str] = None,
+        namespaces: Optional[Dict[str, str]] = None,
+        compression: Optional[str] = None,
+        compression_min_size: Optional[int] = None,
+    ):
+        self.default_codec = self._codec(codec or settings.CACHE_CODEC)
+        if namespaces is None:
+            namespaces = settings.cache_codec_namespaces_map
+        self.namespaces = {namespace: self._codec(name) for namespace, name in namespaces.items()}
+        self.compression = self._compression(compression or settings.CACHE_COMPRESSION)
+        self.compression_min_size = (
+            compression_min_size if compression_min_size is not None else settings.CACHE_COMPRESSION_MIN_SIZE
+        )
+
+    @staticmethod
+    def _codec(name: str) -> Codec:
+        codec = CODECS.get(name)
+        if codec is None:
+            logger.warning(f"Cache codec '{name}' not available, using json")
+            return CODECS["json"]
+        return codec
+
+    @staticmethod
+    def _compression(name: str) -> Compression:
+        compression = COMPRESSIONS.get(name)
+        if compression is None:
+            logger.warning(f"Cache compression '{name}' not available, storing values uncompressed")
+            return COMPRESSIONS["none"]
+        return compression
+
+    def codec_for(self, key: str) -> Codec:
+        """Codec for the namespace of `key` (e.g. 'market' for 'market:ticker:XBTUSD')"""
+        return self.namespaces.get(key.split(":", 1)[0], self.default_codec)
+
+    def encode(self, key: str, value: Any) -> bytes:
+        """Serialize `value` for storage under `key`"""
+        codec = self.codec_for(key)
+        payload = codec.dumps(value)
+        compression = COMPRESSIONS["none"]
+        if self.compression.id and len(payload) >= self.compression_min_size:
+            compressed = self.compression.compress(payload)
+            if len(compressed) < len(payload):
+                payload, compression = compressed, self.compression
+        return HEADER.pack(MAGIC, FORMAT_VERSION, codec.id, compression.id) + payload
+
+    @staticmethod
+    def decode(data: Union[bytes, str, None]) -> Optional[Any]:
+        """
+        Deserialize a stored value
+
+        Raises:
+            ValueError: The value was written with a codec or compression not available here
+        """
+        if not data:
+            return None
+        if isinstance(data, bytes) and data[:1] == MAGIC and len(data) >= HEADER.size:
+            _, version, codec_id, compression_id = HEADER.unpack_from(data)
+            codec = _CODECS_BY_ID.get(codec_id)
+            compression = _COMPRESSIONS_BY_ID.get(compression_id)
+            if version != FORMAT_VERSION or codec is None or compression is None:
+                raise ValueError(
+                    f"Unsupported cache entry (version {version}, codec {codec_id}, compression {compression_id})"
+                )
+            return codec.loads(compression.decompress(data[HEADER.size:]))
+
+        # Legacy entry: JSON text, or a plain string stored as-is
+        if isinstance(data, bytes):
+            data = data.decode("utf-8", errors="replace")
+        try:
+            return json.loads(data)
+        except json.JSONDecodeError:
+            return data
+
+
+# Global instance
+_serializer: Optional[CacheSerializer] = None
+
+
+def get_cache_serializer() -> CacheSerializer:
+    """Get or create the process-wide cache serializer"""
+    global _serializer
+    if _serializer is None:
+        _serializer = CacheSerializer()
+    return _serializer
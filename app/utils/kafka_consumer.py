@@ -1,19 +1,41 @@
 """
 Kafka consumer utility for consuming events from Kafka topics
+
+Each (topic, group id) gets exactly one consumer. Messages are routed to
+handlers through an event-type dispatch table, so several event types on
+one topic share a consumer instead of competing consumers in the same group
+splitting the partitions and dropping each other's events.
+
+Broadcast subscriptions (every process must see every event, e.g. cache
+invalidation) use a per-process group that starts at the latest offset and
+never commits, so a restart neither replays the topic history nor leaves
+committed offsets for an orphaned group on the broker.
 """
 import asyncio
 import json
 import logging
 from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, Any, Callable, Optional
+from typing import Dict, Any, Awaitable, Callable, List, NamedTuple, Optional, Tuple
 from confluent_kafka import Consumer, KafkaError, KafkaException
 from app.config import settings
+from app.utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
 # Thread pool for running blocking Kafka poll operations
 _kafka_thread_pool = ThreadPoolExecutor(max_workers=5, thread_name_prefix="kafka-consumer")
 
+# async def handler(event_type: str, message: dict)
+EventHandler = Callable[[str, Dict[str, Any]], Awaitable[None]]
+
+
+class Subscription(NamedTuple):
+    """Handlers for event types on one topic, consumed with `group_id`"""
+    topic: str
+    group_id: str
+    handlers: Dict[str, EventHandler]
+    broadcast: bool = False  # Only new events, no offset commits (per-process group)
+
 
 class KafkaEventConsumer:
     """Kafka consumer for event streaming"""
@@ -23,13 +45,13 @@ class KafkaEventConsumer:
         self.running = False
         self.consume_tasks = []
     
-    def _create_consumer(self, group_id: str) -> Consumer:
+    def _create_consumer(self, group_id: str, broadcast: bool = False) -> Consumer:
         """Create a Kafka consumer instance"""
         config = {
             'bootstrap.servers': settings.KAFKA_BOOTSTRAP_SERVERS,
             'group.id': group_id,
-            'auto.offset.reset': 'earliest',
-            'enable.auto.commit': True,
+            'auto.offset.reset': 'latest' if broadcast else 'earliest',
+            'enable.auto.commit': not broadcast,
         }
         
         # Add SASL authentication if configured
@@ -46,20 +68,20 @@ class KafkaEventConsumer:
     async def consume_topic(
         self,
         topic: str,
-        handler: Callable[[str, Dict[str, Any]], None],
+        handlers: Dict[str, EventHandler],
         group_id: str,
-        event_type_filter: Optional[str] = None
+        broadcast: bool = False
     ):
         """
         Consume messages from a Kafka topic
         
         Args:
             topic: Kafka topic name
-            handler: Async function to handle messages: async def handler(event_type: str, message: dict)
+            handlers: Dispatch table: event type -> async def handler(event_type: str, message: dict)
             group_id: Consumer group ID
-            event_type_filter: Optional event type to filter (if None, handles all events in topic)
+            broadcast: Start at the latest offset and never commit offsets
         """
-        consumer = self._create_consumer(group_id)
+        consumer = self._create_consumer(group_id, broadcast=broadcast)
         
         # Run subscribe in thread pool to avoid blocking (it may fetch metadata)
         loop = asyncio.get_event_loop()
@@ -73,7 +95,7 @@ class KafkaEventConsumer:
         except Exception as e:
             logger.warning(f"Kafka subscribe() failed for topic '{topic}': {e}, continuing anyway")
         
-        logger.info(f"Started consuming from Kafka topic '{topic}' (group: {group_id})")
+        logger.info(f"Started consuming from Kafka topic '{topic}' (group: {group_id}, events: {', '.join(handlers)})")
         
         try:
             while self.running:
@@ -96,8 +118,10 @@ class KafkaEventConsumer:
                     message_data = json.loads(msg.value().decode('utf-8'))
                     event_type = message_data.get('event_type') or topic
                     
-                    # Filter by event type if specified
-                    if event_type_filter and event_type != event_type_filter:
+                    # Route by event type; other services' events on the topic have no handler here
+                    handler = handlers.get(event_type)
+                    if handler is None:
+                        metrics.incr("kafka_events_unhandled_total", topic=topic)
                         continue
                     
                     # Call handler
@@ -118,19 +142,32 @@ class KafkaEventConsumer:
     
     async def start_consuming(
         self,
-        topics: list[tuple[str, Callable, str, Optional[str]]]
+        subscriptions: List[Subscription]
     ):
         """
-        Start consuming from multiple topics
+        Start one consumer per (topic, group id)
         
         Args:
-            topics: List of tuples (topic, handler, group_id, event_type_filter)
+            subscriptions: Subscriptions (or plain (topic, group_id, {event_type: handler}) tuples);
+                entries for the same topic and group are merged into one dispatch table
         """
         self.running = True
         
-        for topic, handler, group_id, event_type_filter in topics:
+        dispatch: Dict[Tuple[str, str], Dict[str, EventHandler]] = {}
+        broadcast_groups = set()
+        for subscription in subscriptions:
+            topic, group_id, handlers, broadcast = Subscription(*subscription)
+            if broadcast:
+                broadcast_groups.add((topic, group_id))
+            table = dispatch.setdefault((topic, group_id), {})
+            for event_type, handler in handlers.items():
+                if event_type in table and table[event_type] is not handler:
+                    raise ValueError(f"Two handlers for '{event_type}' on Kafka topic '{topic}' (group: {group_id})")
+                table[event_type] = handler
+        
+        for (topic, group_id), handlers in dispatch.items():
             task = asyncio.create_task(
-                self.consume_topic(topic, handler, group_id, event_type_filter)
+                self.consume_topic(topic, handlers, group_id, broadcast=(topic, group_id) in broadcast_groups)
             )
             self.consume_tasks.append(task)
             logger.info(f"Started Kafka consumer task for topic '{topic}'")
@@ -0,0 +1,77 @@
+"""
+Bounded worker lanes with per-key ordering
+
+Items with the same key (e.g. a user_id) always go to the same lane, picked
+by a stable hash of the key, and each lane handles one item at a time. Items
+for one key are therefore processed in submission order while different
+keys run concurrently across lanes. Items without a key are spread round
+robin.
+"""
+import asyncio
+import logging
+import zlib
+from typing import Any, Awaitable, Callable, List, Optional
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class KeyedWorkerPool:
+    """Fixed number of lanes, each an asyncio queue drained by one worker task"""
+
+    def __init__(self, lanes: int, handler: Callable[[Any], Awaitable[None]], name: str = "default"):
+        """
+        Args:
+            lanes: Number of items handled concurrently
+            handler: Async function called with each submitted item
+            name: Metric label identifying the pool
+        """
+        self.handler = handler
+        self.name = name
+        # Unbounded queues: callers bound the backlog themselves (e.g. RabbitMQ prefetch)
+        self._queues: List[asyncio.Queue] = [asyncio.Queue() for _ in range(max(1, lanes))]
+        self._workers: List[asyncio.Task] = []
+        self._next_lane = 0
+
+    @property
+    def lanes(self) -> int:
+        return len(self._queues)
+
+    def start(self) -> None:
+        """Start one worker task per lane"""
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._run(queue)) for queue in self._queues]
+
+    def lane_for(self, key: Optional[Any]) -> int:
+        """Lane index for `key` (crc32, so it is stable across processes)"""
+        if key is None:
+            self._next_lane = (self._next_lane + 1) % len(self._queues)
+            return self._next_lane
+        return zlib.crc32(str(key).encode()) % len(self._queues)
+
+    def submit(self, key: Optional[Any], item: Any) -> None:
+        """Queue `item` on the lane for `key` (never blocks)"""
+        self._queues[self.lane_for(key)].put_nowait(item)
+        metrics.gauge("worker_pool_backlog", self.backlog, pool=self.name)
+
+    @property
+    def backlog(self) -> int:
+        return sum(queue.qsize() for queue in self._queues)
+
+    async def _run(self, queue: asyncio.Queue) -> None:
+        while True:
+            item = await queue.get()
+            try:
+                await self.handler(item)
+            except Exception as e:
+                # The handler owns error handling; a failure must not stop the lane
+                logger.error(f"Worker pool '{self.name}' handler failed: {e}", exc_info=True)
+            finally:
+                queue.task_done()
+
+    async def stop(self) -> None:
+        """Cancel the workers; queued items are dropped"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
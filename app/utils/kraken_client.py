@@ -1,10 +1,44 @@
 import httpx
+import base64
+import hashlib
+import hmac
+import importlib.util
 import logging
-from typing import Dict, Any, Optional
+import threading
+import time
+import urllib.parse
+from typing import Dict, Any, List, Optional
 from app.config import settings
+from app.utils.kraken_rate_limiter import KrakenRateGovernor, get_kraken_rate_governor
 
 logger = logging.getLogger(__name__)
 
+# Legacy X/Z-prefixed asset codes returned by Kraken's private endpoints
+LEGACY_ASSET_CODES = {
+    "XXBT": "XBT",
+    "XETH": "ETH",
+    "XETC": "ETC",
+    "XLTC": "LTC",
+    "XXRP": "XRP",
+    "XXLM": "XLM",
+    "XXMR": "XMR",
+    "XZEC": "ZEC",
+    "XXDG": "XDG",
+    "XREP": "REP",
+    "XMLN": "MLN",
+    "ZUSD": "USD",
+    "ZEUR": "EUR",
+    "ZGBP": "GBP",
+    "ZCAD": "CAD",
+    "ZJPY": "JPY",
+    "ZAUD": "AUD",
+    "ZCHF": "CHF",
+}
+
+
+# Candle intervals (minutes) accepted by Kraken's public OHLC endpoint
+OHLC_INTERVALS = (1, 5, 15, 30, 60, 240, 1440, 10080, 21600)
+
 
 def validate_key_mode():
     """Warn if trading keys are used in development"""
@@ -14,43 +48,250 @@ def validate_key_mode():
         logger.warning("   Set KRAKEN_KEY_MODE=readonly for development")
 
 
+def normalize_asset(asset: str) -> str:
+    """Map Kraken's legacy asset codes (e.g. XXBT, ZUSD) to their short form"""
+    return LEGACY_ASSET_CODES.get(asset, asset)
+
+
+def parse_ticker(pair: str, raw: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a raw Kraken ticker entry into the flat shape used by the services
+
+    The REST Ticker endpoint and the WebSocket ticker channel share this format:
+    a/b/c are [price, ...] lists, v/l/h are [today, last 24 hours] lists.
+    """
+    last = float(raw.get("c", [0.0])[0])
+    return {
+        "pair": pair,
+        "price": last,
+        "last": last,
+        "ask": float(raw.get("a", [0.0])[0]),
+        "bid": float(raw.get("b", [0.0])[0]),
+        "volume": float(raw.get("v", [0.0, 0.0])[-1]),
+        "high": float(raw.get("h", [0.0, 0.0])[-1]),
+        "low": float(raw.get("l", [0.0, 0.0])[-1]),
+        "open": float(raw.get("o", 0.0)),
+        "timestamp": int(time.time()),
+    }
+
+
+class KrakenAPIError(Exception):
+    """Raised when Kraken returns a non-empty error list"""
+
+    def __init__(self, errors: list):
+        self.errors = errors
+        super().__init__(", ".join(errors))
+
+
+class KrakenTransport:
+    """
+    Application-scoped HTTP transport for the Kraken REST API
+
+    Owns a single pooled httpx.AsyncClient so connections to api.kraken.com are
+    kept alive and reused across requests. Credentials are not bound to the
+    transport; private calls are signed per request.
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        timeout: Optional[float] = None,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        http2: Optional[bool] = None,
+        rate_governor: Optional[KrakenRateGovernor] = None,
+    ):
+        self.base_url = base_url or settings.KRAKEN_API_BASE_URL
+        if http2 is None:
+            http2 = settings.KRAKEN_HTTP2
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 requested for Kraken API but 'h2' is not installed. Falling back to HTTP/1.1.")
+            http2 = False
+
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=timeout or settings.KRAKEN_HTTP_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=max_connections or settings.KRAKEN_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=max_keepalive_connections or settings.KRAKEN_HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=keepalive_expiry or settings.KRAKEN_HTTP_KEEPALIVE_EXPIRY,
+            ),
+            http2=http2,
+            headers={"User-Agent": "muckard-kraken-service"},
+        )
+        self._nonce_lock = threading.Lock()
+        self._last_nonce = 0
+        self._rate_governor = rate_governor
+
+    @property
+    def rate_governor(self) -> KrakenRateGovernor:
+        if self._rate_governor is None:
+            self._rate_governor = get_kraken_rate_governor()
+        return self._rate_governor
+
+    def _nonce(self) -> int:
+        """Return a strictly increasing nonce (microseconds since epoch)"""
+        with self._nonce_lock:
+            nonce = max(time.time_ns() // 1000, self._last_nonce + 1)
+            self._last_nonce = nonce
+            return nonce
+
+    @staticmethod
+    def sign(url_path: str, data: Dict[str, Any], api_secret: str) -> str:
+        """Compute the API-Sign header for a private request"""
+        postdata = urllib.parse.urlencode(data)
+        encoded = (str(data["nonce"]) + postdata).encode()
+        message = url_path.encode() + hashlib.sha256(encoded).digest()
+        signature = hmac.new(base64.b64decode(api_secret), message, hashlib.sha512)
+        return base64.b64encode(signature.digest()).decode()
+
+    @staticmethod
+    def _parse_response(response: httpx.Response) -> Any:
+        """Raise on HTTP or Kraken-level errors and return the result payload"""
+        response.raise_for_status()
+        payload = response.json()
+        errors = payload.get("error") or []
+        if errors:
+            raise KrakenAPIError(errors)
+        return payload.get("result", {})
+
+    async def public_request(self, method: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """Call a public endpoint (no credentials required)"""
+        response = await self.client.get(f"/0/public/{method}", params=params)
+        return self._parse_response(response)
+
+    async def private_request(
+        self,
+        method: str,
+        api_key: str,
+        api_secret: str,
+        data: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        """Call a private endpoint, signing the request with the given credentials"""
+        # Queue until the key's Kraken call counter has room for this call
+        await self.rate_governor.acquire(api_key, self.rate_governor.cost_for(method))
+
+        url_path = f"/0/private/{method}"
+        payload = dict(data or {})
+        payload["nonce"] = self._nonce()
+        headers = {
+            "API-Key": api_key,
+            "API-Sign": self.sign(url_path, payload, api_secret),
+            "Content-Type": "application/x-www-form-urlencoded; charset=utf-8",
+        }
+        response = await self.client.post(url_path, content=urllib.parse.urlencode(payload), headers=headers)
+        try:
+            return self._parse_response(response)
+        except KrakenAPIError as e:
+            if any("Rate limit exceeded" in error for error in e.errors):
+                # Our model drifted from Kraken's counter (e.g. calls made outside this service)
+                await self.rate_governor.penalize(api_key)
+            raise
+
+    async def close(self):
+        """Close the pooled HTTP client"""
+        await self.client.aclose()
+
+
 class KrakenClient:
     """Kraken API client wrapper"""
-    
-    def __init__(self, api_key: str, api_secret: str):
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        api_secret: Optional[str] = None,
+        transport: Optional[KrakenTransport] = None,
+    ):
+        """Credentials are only needed for private endpoints (balance, connection test)"""
         # Validate key mode on initialization
         validate_key_mode()
-        
+
         self.api_key = api_key
         self.api_secret = api_secret
         self.base_url = settings.KRAKEN_API_BASE_URL
-        self.client = httpx.AsyncClient(timeout=30.0)
+        # Reuse the application transport when given; otherwise own a private one
+        self._owns_transport = transport is None
+        self.transport = transport or KrakenTransport(base_url=self.base_url)
+
+    async def _private(self, method: str, data: Optional[Dict[str, Any]] = None) -> Any:
+        """Call a private endpoint with this client's credentials"""
+        if not self.api_key or not self.api_secret:
+            raise ValueError(f"Kraken API credentials are required for private endpoint '{method}'")
+        return await self.transport.private_request(method, self.api_key, self.api_secret, data)
 
     async def test_connection(self) -> Dict[str, Any]:
         """Test API connection"""
-        # TODO: Implement actual Kraken API connection test
-        # This is a placeholder
-        return {"status": "connected", "permissions": ["trading"]}
+        try:
+            await self._private("Balance")
+            return {"status": "connected", "permissions": ["trading"]}
+        except KrakenAPIError as e:
+            return {"status": "failed", "error": str(e)}
 
     async def get_balance(self) -> Dict[str, Any]:
         """Get account balance"""
-        # TODO: Implement Kraken API balance fetch
-        return {"USD": {"balance": 0.0, "available": 0.0}}
+        result = await self._private("BalanceEx")
+        balances = {}
+        for asset, entry in result.items():
+            balance = float(entry.get("balance", 0.0))
+            hold = float(entry.get("hold_trade", 0.0))
+            balances[normalize_asset(asset)] = {"balance": balance, "available": balance - hold}
+        return balances
 
     async def get_ticker(self, pair: str) -> Dict[str, Any]:
         """Get ticker data for a pair"""
-        # TODO: Implement Kraken API ticker fetch
-        return {"pair": pair, "price": 0.0, "volume": 0.0}
+        result = await self.transport.public_request("Ticker", {"pair": pair})
+        # Kraken keys the result by its canonical pair name, which may differ from the request
+        raw = next(iter(result.values()), {})
+        return parse_ticker(pair, raw)
+
+    async def get_tickers(self, pairs: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get ticker data for several pairs in one call
 
-    async def get_ohlc(self, pair: str, interval: int) -> Dict[str, Any]:
-        """Get OHLC data"""
-        # TODO: Implement Kraken API OHLC fetch
-        return {"pair": pair, "interval": interval, "data": []}
+        Returns:
+            dict: Ticker per pair, keyed by Kraken's canonical pair name (e.g. XXBTZUSD)
+        """
+        result = await self.transport.public_request("Ticker", {"pair": ",".join(pairs)})
+        return {name: parse_ticker(name, raw) for name, raw in result.items()}
+
+    async def get_ohlc(self, pair: str, interval: int, since: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Get OHLC data
+
+        Args:
+            pair: Trading pair
+            interval: Candle interval in minutes
+            since: Only return candles after this cursor (the `last` of a previous call)
+
+        Returns:
+            dict: `data` (candle dicts), `rows` ([time, open, high, low, close, vwap, volume, count])
+                and `last` (cursor for the next incremental call)
+        """
+        params = {"pair": pair, "interval": interval}
+        if since is not None:
+            params["since"] = since
+        result = await self.transport.public_request("OHLC", params)
+        last = result.pop("last", 0)
+        rows = [
+            [int(row[0]), float(row[1]), float(row[2]), float(row[3]), float(row[4]),
+             float(row[5]), float(row[6]), int(row[7])]
+            for row in next(iter(result.values()), [])
+        ]
+        data = [
+            {"time": row[0], "open": row[1], "high": row[2], "low": row[3], "close": row[4], "volume": row[6]}
+            for row in rows
+        ]
+        return {"pair": pair, "interval": interval, "data": data, "rows": rows, "last": int(last)}
+
+    async def get_asset_pairs(self) -> Dict[str, Dict[str, Any]]:
+        """Get asset pair metadata keyed by canonical pair name"""
+        return await self.transport.public_request("AssetPairs")
 
     async def get_trading_pairs(self) -> list[str]:
         """Get available trading pairs"""
-        # TODO: Implement Kraken API pairs fetch
-        return ["BTC/USD", "ETH/USD", "XRP/USD"]
+        result = await self.get_asset_pairs()
+        return [info["wsname"] for info in result.values() if info.get("wsname")]
 
     async def validate_permissions(self) -> Dict[str, Any]:
         """Validate API key permissions"""
@@ -59,6 +300,26 @@ class KrakenClient:
         return {"has_withdraw": False, "has_trade": True}
 
     async def close(self):
-        """Close HTTP client"""
-        await self.client.aclose()
+        """Close HTTP client (no-op when using the shared application transport)"""
+        if self._owns_transport:
+            await self.transport.close()
+
+
+# Global instance
+_kraken_transport: Optional[KrakenTransport] = None
+
+
+def get_kraken_transport() -> KrakenTransport:
+    """Get or create the application-scoped Kraken transport"""
+    global _kraken_transport
+    if _kraken_transport is None:
+        _kraken_transport = KrakenTransport()
+    return _kraken_transport
+
 
+async def close_kraken_transport():
+    """Close the application-scoped Kraken transport (call on shutdown)"""
+    global _kraken_transport
+    if _kraken_transport is not None:
+        await _kraken_transport.close()
+        _kraken_transport = None
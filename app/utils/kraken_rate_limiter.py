@@ -0,0 +1,201 @@
+"""
+Kraken API rate-limit governor
+
+Models Kraken's per-API-key call counter: every private call adds a cost to
+the counter, the counter decays at a tier-dependent rate, and calls that would
+push it over the tier maximum fail with "EAPI:Rate limit exceeded". The
+governor queues such calls until the counter has decayed enough.
+
+Counter state lives in Redis (updated atomically by a Lua script) so all
+uvicorn workers share it; if Redis is unavailable each process keeps its own
+counter.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Dict, Optional, Tuple
+from app.config import settings
+from app.utils.metrics import metrics
+from app.utils.async_redis_client import AsyncRedisClient, get_async_redis
+
+logger = logging.getLogger(__name__)
+
+# (max counter, decay per second) for each Kraken verification tier
+KRAKEN_TIERS: Dict[str, Tuple[float, float]] = {
+    "starter": (15, 0.33),
+    "intermediate": (20, 0.5),
+    "pro": (20, 1.0),
+}
+
+# Private endpoints whose cost differs from the default of 1.
+# Order placement/cancellation is limited by the matching engine, not this counter.
+ENDPOINT_COSTS: Dict[str, int] = {
+    "Ledgers": 2,
+    "QueryLedgers": 2,
+    "TradesHistory": 2,
+    "QueryTrades": 2,
+    "AddOrder": 0,
+    "AddOrderBatch": 0,
+    "EditOrder": 0,
+    "CancelOrder": 0,
+    "CancelAll": 0,
+    "CancelAllOrdersAfter": 0,
+}
+
+REDIS_KEY_PREFIX = "kraken:ratelimit:"
+
+# Returns "0" when the cost was admitted, otherwise the seconds to wait (as a string,
+# since Redis truncates Lua numbers to integers)
+_ACQUIRE_SCRIPT = """
+local cost = tonumber(ARGV[1])
+local max = tonumber(ARGV[2])
+local decay = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'counter', 'ts')
+local counter = tonumber(state[1]) or 0
+local ts = tonumber(state[2]) or now
+counter = math.max(0, counter - (now - ts) * decay)
+if counter + cost <= max then
+    counter = counter + cost
+    redis.call('HSET', KEYS[1], 'counter', tostring(counter), 'ts', tostring(now))
+    redis.call('EXPIRE', KEYS[1], math.ceil(max / decay) + 1)
+    return '0'
+end
+return tostring((counter + cost - max) / decay)
+"""
+
+_PENALIZE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+redis.call('HSET', KEYS[1], 'counter', ARGV[1], 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(tonumber(ARGV[1]) / tonumber(ARGV[2])) + 1)
+return 1
+"""
+
+
+class KrakenRateLimitError(Exception):
+    """Raised when a call would have to wait longer than the configured maximum"""
+
+
+class KrakenRateGovernor:
+    """Per-API-key call counter shared across workers via Redis"""
+
+    def __init__(self, redis: Optional[AsyncRedisClient] = None, tier: Optional[str] = None, max_wait: Optional[float] = None):
+        self._redis = redis
+        self.tier = tier or settings.KRAKEN_RATE_TIER
+        self.max_wait = max_wait if max_wait is not None else settings.KRAKEN_RATE_MAX_WAIT
+        # Local fallback state: key -> (counter, timestamp)
+        self._local: Dict[str, Tuple[float, float]] = {}
+        # One FIFO lock per key so queued callers are admitted in arrival order
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._waiting: Dict[str, int] = {}
+
+    @property
+    def redis(self) -> AsyncRedisClient:
+        if self._redis is None:
+            self._redis = get_async_redis()
+        return self._redis
+
+    @staticmethod
+    def cost_for(method: str) -> int:
+        """Counter cost of a private endpoint"""
+        return ENDPOINT_COSTS.get(method, 1)
+
+    @staticmethod
+    def _key_id(api_key: str) -> str:
+        """Stable identifier for a key that never exposes the key itself"""
+        return hashlib.sha256(api_key.encode()).hexdigest()[:16]
+
+    def _limits(self, tier: Optional[str]) -> Tuple[float, float]:
+        return KRAKEN_TIERS.get(tier or self.tier, KRAKEN_TIERS["starter"])
+
+    async def _try_acquire(self, key_id: str, cost: int, max_counter: float, decay: float) -> float:
+        """Try to add cost to the counter. Returns 0 on success, else seconds to wait."""
+        if self.redis.connected:
+            try:
+                wait = await self.redis.eval_script(_ACQUIRE_SCRIPT, [REDIS_KEY_PREFIX + key_id], [cost, max_counter, decay])
+                return float(wait)
+            except Exception as e:
+                logger.warning(f"Kraken rate governor Redis error, using local counter: {e}")
+
+        now = time.monotonic()
+        counter, ts = self._local.get(key_id, (0.0, now))
+        counter = max(0.0, counter - (now - ts) * decay)
+        if counter + cost <= max_counter:
+            self._local[key_id] = (counter + cost, now)
+            return 0.0
+        self._local[key_id] = (counter, now)
+        return (counter + cost - max_counter) / decay
+
+    async def acquire(self, api_key: str, cost: int = 1, tier: Optional[str] = None) -> float:
+        """
+        Wait until the key's counter has room for `cost`, then reserve it
+
+        Args:
+            api_key: Kraken API key the call is made with
+            cost: Counter cost of the call
+            tier: Verification tier of the key (defaults to KRAKEN_RATE_TIER)
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        if cost <= 0:
+            return 0.0
+        tier_name = tier or self.tier
+        max_counter, decay = self._limits(tier_name)
+        key_id = self._key_id(api_key)
+        lock = self._locks.setdefault(key_id, asyncio.Lock())
+
+        started = time.monotonic()
+        self._waiting[key_id] = self._waiting.get(key_id, 0) + 1
+        metrics.gauge("kraken_rate_queue_depth", sum(self._waiting.values()))
+        try:
+            async with lock:
+                while True:
+                    wait = await self._try_acquire(key_id, cost, max_counter, decay)
+                    if wait <= 0:
+                        break
+                    if time.monotonic() - started + wait > self.max_wait:
+                        metrics.incr("kraken_rate_rejected_total", tier=tier_name)
+                        raise KrakenRateLimitError(
+                            f"Kraken rate limit: call would wait more than {self.max_wait}s"
+                        )
+                    await asyncio.sleep(wait)
+        finally:
+            self._waiting[key_id] -= 1
+            if not self._waiting[key_id]:
+                # Nobody holds or waits on the lock any more
+                del self._waiting[key_id]
+                self._locks.pop(key_id, None)
+            metrics.gauge("kraken_rate_queue_depth", sum(self._waiting.values()))
+
+        waited = time.monotonic() - started
+        metrics.observe("kraken_rate_wait_seconds", waited, tier=tier_name)
+        return waited
+
+    async def penalize(self, api_key: str, tier: Optional[str] = None) -> None:
+        """Mark the key's counter as full after Kraken reported a rate-limit error"""
+        max_counter, decay = self._limits(tier)
+        key_id = self._key_id(api_key)
+        metrics.incr("kraken_rate_limit_exceeded_total", tier=tier or self.tier)
+        if self.redis.connected:
+            try:
+                await self.redis.eval_script(_PENALIZE_SCRIPT, [REDIS_KEY_PREFIX + key_id], [max_counter, decay])
+                return
+            except Exception as e:
+                logger.warning(f"Kraken rate governor Redis error, using local counter: {e}")
+        self._local[key_id] = (float(max_counter), time.monotonic())
+
+
+# Global instance
+_rate_governor: Optional[KrakenRateGovernor] = None
+
+
+def get_kraken_rate_governor() -> KrakenRateGovernor:
+    """Get or create the Kraken rate governor"""
+    global _rate_governor
+    if _rate_governor is None:
+        _rate_governor = KrakenRateGovernor()
+    return _rate_governor
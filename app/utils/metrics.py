@@ -0,0 +1,60 @@
+"""
+Lightweight in-process metrics registry
+
+Counters, gauges and timing summaries keyed by metric name plus optional
+labels. Services expose `metrics.snapshot()` through a JSON endpoint.
+"""
+import threading
+from typing import Dict, Any
+
+
+def _metric_key(name: str, labels: Dict[str, Any]) -> str:
+    """Build a Prometheus-style key, e.g. kraken_rate_wait_seconds{tier=starter}"""
+    if not labels:
+        return name
+    rendered = ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
+    return f"{name}{{{rendered}}}"
+
+
+class Metrics:
+    """Thread-safe registry of counters, gauges and timing summaries"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._summaries: Dict[str, Dict[str, float]] = {}
+
+    def incr(self, name: str, value: float = 1, **labels) -> None:
+        """Increment a counter"""
+        key = _metric_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def gauge(self, name: str, value: float, **labels) -> None:
+        """Set a gauge to an absolute value"""
+        key = _metric_key(name, labels)
+        with self._lock:
+            self._gauges[key] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        """Record an observation (e.g. a latency) in a count/sum/max summary"""
+        key = _metric_key(name, labels)
+        with self._lock:
+            summary = self._summaries.setdefault(key, {"count": 0, "sum": 0.0, "max": 0.0})
+            summary["count"] += 1
+            summary["sum"] += value
+            summary["max"] = max(summary["max"], value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a copy of all metrics"""
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "gauges": dict(self._gauges),
+                "summaries": {key: dict(value) for key, value in self._summaries.items()},
+            }
+
+
+# Global instance
+metrics = Metrics()
@@ -2,19 +2,82 @@ import aio_pika
 import json
 import logging
 import asyncio
-from typing import Callable, Optional, Dict, Any
+import time
+from datetime import datetime, timezone
+from typing import Callable, Iterable, List, Optional, Dict, Any, Set
 from app.config import settings
+from app.utils.keyed_workers import KeyedWorkerPool
+from app.utils.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+# Command queues: messages are published persistent so they survive a broker restart
+COMMAND_QUEUES = frozenset({"bot.start", "bot.stop", "bot.trigger_trade"})
+
+# Retry accounting headers set when a failed message is redelivered or dead-lettered
+ATTEMPTS_HEADER = "x-attempts"
+ERROR_HEADER = "x-last-error"
+FAILED_AT_HEADER = "x-failed-at"
+# Headers describing past failures; never carried over when a message is republished
+# (x-death and friends are the broker's own record of the retry queue hops)
+FAILURE_HEADERS = frozenset({
+    ATTEMPTS_HEADER, ERROR_HEADER, FAILED_AT_HEADER,
+    "x-death", "x-first-death-exchange", "x-first-death-queue", "x-first-death-reason",
+    "x-last-death-exchange", "x-last-death-queue", "x-last-death-reason",
+})
+
+
+def original_headers(message: aio_pika.abc.AbstractMessage) -> Dict[str, Any]:
+    """The publisher's headers of `message`, without failure accounting"""
+    return {key: value for key, value in (message.headers or {}).items() if key not in FAILURE_HEADERS}
+
+
+def retry_queue_name(queue_name: str, delay_ms: int) -> str:
+    """Delay queue: messages expire after `delay_ms` and dead-letter back to `queue_name`"""
+    return f"{queue_name}.retry.{delay_ms}"
+
+
+def dead_letter_queue_name(queue_name: str) -> str:
+    """Queue holding messages of `queue_name` that failed every attempt"""
+    return f"{queue_name}.dead"
+
+
+def retry_delay_ms(attempt: int) -> int:
+    """Exponential redelivery delay after the given (1-based) failed attempt"""
+    delay = settings.RABBITMQ_RETRY_BASE_DELAY_MS * 2 ** (attempt - 1)
+    return min(delay, settings.RABBITMQ_RETRY_MAX_DELAY_MS)
+
 
 class RabbitMQClient:
-    """RabbitMQ client for async message publishing and consuming"""
+    """
+    RabbitMQ client for async message publishing and consuming
+
+    Publishes use publisher confirms on a small set of channels. Many
+    publishes are in flight at once and each resolves when the broker acks
+    it (RabbitMQ acks in batches), so confirms add durability without
+    serializing throughput. Each queue is declared once per connection
+    (memoized) instead of on every publish.
+
+    Each consumer gets its own channel with a prefetch limit and hands
+    messages to a KeyedWorkerPool, so a queue is processed concurrently while
+    messages sharing an ordering key (e.g. user_id) stay in order. A message
+    whose handler fails is redelivered through a delay queue (TTL + dead
+    letter back to the queue) with exponential backoff, and moved to
+    '<queue>.dead' after RABBITMQ_MAX_DELIVERY_ATTEMPTS, so one poison
+    message cannot starve the queue.
+    """
     
     def __init__(self):
         self.connection: Optional[aio_pika.Connection] = None
-        self.channel: Optional[aio_pika.Channel] = None
+        self.channel: Optional[aio_pika.Channel] = None  # General-purpose channel; consumers open their own
         self._connection_url = self._build_connection_url()
+        self._connect_lock = asyncio.Lock()
+        self._publish_channels: List[aio_pika.abc.AbstractChannel] = []
+        self._next_channel = 0
+        self._declared_queues: Set[str] = set()
+        self._inflight = asyncio.Semaphore(settings.RABBITMQ_MAX_INFLIGHT_PUBLISHES)
+        self._inflight_count = 0
+        self._consumers: List[tuple] = []  # (channel, worker pool) per consumed queue
     
     def _build_connection_url(self) -> str:
         """Build RabbitMQ connection URL from settings"""
@@ -37,103 +100,375 @@ class RabbitMQClient:
         Args:
             timeout: Connection timeout in seconds (default: 5.0)
         """
-        if self.connection and not self.connection.is_closed:
-            return
-        
-        try:
-            # Wrap connection in timeout to prevent hanging
-            self.connection = await asyncio.wait_for(
-                aio_pika.connect_robust(self._connection_url),
-                timeout=timeout
-            )
-            self.channel = await asyncio.wait_for(
-                self.connection.channel(),
-                timeout=timeout
-            )
-            logger.info("Connected to RabbitMQ")
-        except asyncio.TimeoutError:
-            logger.error(f"Connection to RabbitMQ timed out after {timeout} seconds")
-            raise
-        except Exception as e:
-            logger.error(f"Failed to connect to RabbitMQ: {e}")
-            raise
+        async with self._connect_lock:
+            if self.connection and not self.connection.is_closed:
+                return
+            
+            try:
+                # Wrap connection in timeout to prevent hanging
+                self.connection = await asyncio.wait_for(
+                    aio_pika.connect_robust(self._connection_url),
+                    timeout=timeout
+                )
+                self.channel = await asyncio.wait_for(
+                    self.connection.channel(),
+                    timeout=timeout
+                )
+                # Robust channels re-declare their queues after a reconnect; a new connection starts over
+                self._declared_queues.clear()
+                self._publish_channels = [
+                    await asyncio.wait_for(self.connection.channel(publisher_confirms=True), timeout=timeout)
+                    for _ in range(settings.RABBITMQ_PUBLISH_CHANNELS)
+                ]
+                logger.info("Connected to RabbitMQ")
+            except asyncio.TimeoutError:
+                logger.error(f"Connection to RabbitMQ timed out after {timeout} seconds")
+                raise
+            except Exception as e:
+                logger.error(f"Failed to connect to RabbitMQ: {e}")
+                raise
+    
+    async def _publish_channel(self) -> aio_pika.abc.AbstractChannel:
+        """Next confirm-mode channel (round robin), reopened if the broker closed it"""
+        index = self._next_channel % len(self._publish_channels)
+        self._next_channel += 1
+        channel = self._publish_channels[index]
+        if channel.is_closed:
+            channel = await self.connection.channel(publisher_confirms=True)
+            self._publish_channels[index] = channel
+        return channel
     
     async def disconnect(self):
         """Close RabbitMQ connection"""
+        for channel, workers in self._consumers:
+            await workers.stop()
+            if not channel.is_closed:
+                await channel.close()
+        self._consumers = []
+        for channel in self._publish_channels:
+            if not channel.is_closed:
+                await channel.close()
+        self._publish_channels = []
         if self.channel and not self.channel.is_closed:
             await self.channel.close()
         if self.connection and not self.connection.is_closed:
             await self.connection.close()
         logger.info("Disconnected from RabbitMQ")
     
-    async def publish(self, queue_name: str, message: Dict[str, Any], durable: bool = True):
+    async def _ensure_queue(
+        self,
+        channel: aio_pika.abc.AbstractChannel,
+        queue_name: str,
+        durable: bool = True,
+        arguments: Optional[Dict[str, Any]] = None
+    ):
+        """Declare a queue the first time it is used on this connection"""
+        if queue_name in self._declared_queues:
+            return
+        await channel.declare_queue(queue_name, durable=durable, arguments=arguments)
+        self._declared_queues.add(queue_name)
+    
+    async def declare_queues(self, queue_names: Iterable[str], durable: bool = True):
+        """Declare publish topology up front (e.g. at startup) so the first publish skips it"""
+        if not self.connection or self.connection.is_closed:
+            await self.connect(timeout=5.0)
+        channel = await self._publish_channel()
+        for queue_name in queue_names:
+            await self._ensure_queue(channel, queue_name, durable=durable)
+    
+    async def publish(
+        self,
+        queue_name: str,
+        message: Dict[str, Any],
+        durable: bool = True,
+        persistent: Optional[bool] = None
+    ):
         """
-        Publish a message to a queue
+        Publish a message to a queue and wait for the broker to confirm it
         
         Args:
             queue_name: Name of the queue
             message: Message data (dict) to publish
             durable: Whether the queue should survive broker restarts
+            persistent: Persistent delivery mode (defaults to True for COMMAND_QUEUES)
+            
+        Raises:
+            aio_pika.exceptions.DeliveryError: The broker nacked or returned the message
         """
         if not self.connection or self.connection.is_closed:
             await self.connect(timeout=5.0)
+        if persistent is None:
+            persistent = queue_name in COMMAND_QUEUES
         
-        try:
-            # Declare queue
-            queue = await self.channel.declare_queue(queue_name, durable=durable)
-            
-            # Serialize message
-            message_body = json.dumps(message).encode()
-            
-            # Publish message
-            await self.channel.default_exchange.publish(
-                aio_pika.Message(message_body),
-                routing_key=queue_name
-            )
-            logger.debug(f"Published message to queue '{queue_name}': {message}")
-        except Exception as e:
-            logger.error(f"Failed to publish message to queue '{queue_name}': {e}")
-            raise
+        # Serialize message
+        await self._publish_body(queue_name, json.dumps(message).encode(), durable=durable, persistent=persistent)
+        logger.debug(f"Published message to queue '{queue_name}': {message}")
+    
+    async def _publish_body(
+        self,
+        queue_name: str,
+        message_body: bytes,
+        durable: bool = True,
+        persistent: bool = False,
+        headers: Optional[Dict[str, Any]] = None
+    ):
+        """Publish an encoded body with publisher confirms"""
+        delivery_mode = aio_pika.DeliveryMode.PERSISTENT if persistent else aio_pika.DeliveryMode.NOT_PERSISTENT
+        
+        # Bound unconfirmed publishes so a broker stall applies backpressure instead of piling up memory
+        async with self._inflight:
+            self._inflight_count += 1
+            metrics.gauge("rabbitmq_publish_inflight", self._inflight_count)
+            started = time.monotonic()
+            try:
+                channel = await self._publish_channel()
+                # Declare queue (first publish only)
+                await self._ensure_queue(channel, queue_name, durable=durable)
+                
+                # Publish message; resolves when the broker's ack for it arrives
+                await channel.default_exchange.publish(
+                    aio_pika.Message(
+                        message_body,
+                        delivery_mode=delivery_mode,
+                        content_type="application/json",
+                        headers=headers
+                    ),
+                    routing_key=queue_name
+                )
+                metrics.observe("rabbitmq_publish_seconds", time.monotonic() - started, queue=queue_name)
+            except Exception as e:
+                metrics.incr("rabbitmq_publish_failed_total", queue=queue_name)
+                logger.error(f"Failed to publish message to queue '{queue_name}': {e}")
+                raise
+            finally:
+                self._inflight_count -= 1
     
-    async def consume(self, queue_name: str, callback: Callable, durable: bool = True, auto_ack: bool = False):
+    async def publish_many(
+        self,
+        queue_name: str,
+        messages: Iterable[Dict[str, Any]],
+        durable: bool = True,
+        persistent: Optional[bool] = None
+    ) -> List[bool]:
+        """
+        Publish several messages concurrently (pipelined confirms)
+        
+        Returns:
+            list: Whether each message was confirmed by the broker
+        """
+        results = await asyncio.gather(
+            *(self.publish(queue_name, message, durable=durable, persistent=persistent) for message in messages),
+            return_exceptions=True
+        )
+        return [not isinstance(result, BaseException) for result in results]
+    
+    async def consume(
+        self,
+        queue_name: str,
+        callback: Callable,
+        durable: bool = True,
+        auto_ack: bool = False,
+        prefetch_count: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        ordering_key: Optional[Callable[[dict], Any]] = None
+    ):
         """
         Consume messages from a queue
         
+        Registers the consumer and returns; messages are then handled in the
+        background until disconnect().
+        
         Args:
             queue_name: Name of the queue
             callback: Async function to handle messages: async def callback(message: dict)
             durable: Whether the queue should survive broker restarts
             auto_ack: Whether to automatically acknowledge messages
+            prefetch_count: Unacked messages the broker may push (default RABBITMQ_PREFETCH_COUNT)
+            concurrency: Messages handled in parallel (default RABBITMQ_CONSUMER_LANES)
+            ordering_key: Returns the key (e.g. user_id) whose messages must be handled in order
         """
         if not self.connection or self.connection.is_closed:
             await self.connect(timeout=5.0)
         
         try:
+            # Dedicated channel so the prefetch limit applies to this queue only
+            channel = await self.connection.channel()
+            await channel.set_qos(prefetch_count=prefetch_count or settings.RABBITMQ_PREFETCH_COUNT)
+            
             # Declare queue
-            queue = await self.channel.declare_queue(queue_name, durable=durable)
+            queue = await channel.declare_queue(queue_name, durable=durable)
+            
+            async def handle(item):
+                await self._handle_message(queue_name, callback, auto_ack, *item)
+            
+            workers = KeyedWorkerPool(concurrency or settings.RABBITMQ_CONSUMER_LANES, handle, name=queue_name)
+            workers.start()
             
             async def message_handler(message: aio_pika.IncomingMessage):
-                async with message.process():
-                    try:
-                        # Deserialize message
-                        message_body = json.loads(message.body.decode())
-                        logger.debug(f"Received message from queue '{queue_name}': {message_body}")
-                        
-                        # Call callback
-                        await callback(message_body)
-                    except Exception as e:
-                        logger.error(f"Error processing message from queue '{queue_name}': {e}")
-                        if not auto_ack:
-                            # Reject message and requeue
-                            await message.nack(requeue=True)
-                        raise
+                # Deliveries start in broker order; hand off to a lane before the first await to keep it
+                try:
+                    message_body = json.loads(message.body.decode())
+                    key = ordering_key(message_body) if ordering_key else None
+                except Exception as e:
+                    # Retrying cannot fix the payload
+                    logger.error(f"Dead-lettering undecodable message from queue '{queue_name}': {e}")
+                    await self._dead_letter(queue_name, message, f"Undecodable message: {e}")
+                    return
+                workers.submit(key, (message, message_body))
             
             # Start consuming
             await queue.consume(message_handler)
-            logger.info(f"Started consuming from queue '{queue_name}'")
+            self._consumers.append((channel, workers))
+            logger.info(f"Started consuming from queue '{queue_name}' ({workers.lanes} lanes)")
         except Exception as e:
             logger.error(f"Failed to consume from queue '{queue_name}': {e}")
             raise
+    
+    async def _handle_message(
+        self,
+        queue_name: str,
+        callback: Callable,
+        auto_ack: bool,
+        message: aio_pika.IncomingMessage,
+        message_body: dict
+    ):
+        """Run the callback for one message, then ack it (or schedule a retry on failure)"""
+        logger.debug(f"Received message from queue '{queue_name}': {message_body}")
+        started = time.monotonic()
+        try:
+            await callback(message_body)
+        except Exception as e:
+            logger.error(f"Error processing message from queue '{queue_name}': {e}")
+            metrics.incr("rabbitmq_handle_failed_total", queue=queue_name)
+            if auto_ack:
+                await message.nack(requeue=False)
+            else:
+                await self._retry_or_dead_letter(queue_name, message, e)
+            return
+        await message.ack()
+        metrics.observe("rabbitmq_handle_seconds", time.monotonic() - started, queue=queue_name)
+    
+    async def _retry_or_dead_letter(self, queue_name: str, message: aio_pika.IncomingMessage, error: Exception):
+        """Redeliver a failed message after a delay, or dead-letter it once attempts run out"""
+        attempts = int((message.headers or {}).get(ATTEMPTS_HEADER, 0)) + 1
+        if attempts >= settings.RABBITMQ_MAX_DELIVERY_ATTEMPTS:
+            await self._dead_letter(queue_name, message, str(error), attempts=attempts)
+            return
+        
+        delay_ms = retry_delay_ms(attempts)
+        retry_queue = retry_queue_name(queue_name, delay_ms)
+        try:
+            channel = await self._publish_channel()
+            # Expired messages go back to the original queue through the default exchange
+            await self._ensure_queue(channel, retry_queue, durable=True, arguments={
+                "x-message-ttl": delay_ms,
+                "x-dead-letter-exchange": "",
+                "x-dead-letter-routing-key": queue_name,
+            })
+            await self._publish_body(
+                retry_queue,
+                message.body,
+                persistent=message.delivery_mode == aio_pika.DeliveryMode.PERSISTENT,
+                headers={**original_headers(message), ATTEMPTS_HEADER: attempts, ERROR_HEADER: str(error)[:500]}
+            )
+        except Exception as e:
+            # Without a confirmed copy the original must stay on the broker
+            logger.error(f"Failed to schedule retry for message from queue '{queue_name}': {e}")
+            await message.nack(requeue=True)
+            return
+        await message.ack()
+        metrics.incr("rabbitmq_retry_total", queue=queue_name)
+        logger.warning(f"Retrying message from queue '{queue_name}' in {delay_ms}ms (attempt {attempts})")
+    
+    async def _dead_letter(self, queue_name: str, message: aio_pika.IncomingMessage, error: str, attempts: int = 1):
+        """Move a message to the queue's dead-letter queue"""
+        try:
+            await self._publish_body(
+                dead_letter_queue_name(queue_name),
+                message.body,
+                persistent=True,
+                headers={
+                    **original_headers(message),
+                    ATTEMPTS_HEADER: attempts,
+                    ERROR_HEADER: error[:500],
+                    FAILED_AT_HEADER: datetime.now(timezone.utc).isoformat(),
+                }
+            )
+        except Exception as e:
+            logger.error(f"Failed to dead-letter message from queue '{queue_name}': {e}")
+            await message.nack(requeue=True)
+            return
+        await message.ack()
+        metrics.incr("rabbitmq_dead_lettered_total", queue=queue_name)
+        logger.error(f"Dead-lettered message from queue '{queue_name}' after {attempts} attempt(s): {error}")
+    
+    async def get_dead_letters(self, queue_name: str, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Inspect dead letters of a queue without removing them
+        
+        Args:
+            queue_name: Original queue name (e.g. bot.started)
+            limit: Maximum number of messages to return (oldest first)
+        """
+        if not self.connection or self.connection.is_closed:
+            await self.connect(timeout=5.0)
+        
+        channel = await self.connection.channel()
+        letters = []
+        try:
+            queue = await channel.declare_queue(dead_letter_queue_name(queue_name), durable=True)
+            for _ in range(limit):
+                message = await queue.get(no_ack=False, fail=False)
+                if message is None:
+                    break
+                headers = message.headers or {}
+                try:
+                    body = json.loads(message.body.decode())
+                except ValueError:
+                    body = message.body.decode(errors="replace")
+                letters.append({
+                    "queue": queue_name,
+                    "body": body,
+                    "attempts": int(headers.get(ATTEMPTS_HEADER, 0)),
+                    "error": headers.get(ERROR_HEADER),
+                    "failed_at": headers.get(FAILED_AT_HEADER),
+                })
+        finally:
+            # Closing the channel returns every unacked message to the queue
+            await channel.close()
+        return letters
+    
+    async def replay_dead_letters(self, queue_name: str, limit: int = 100) -> int:
+        """
+        Move dead letters back to their original queue with a fresh attempt count
+        
+        Args:
+            queue_name: Original queue name (e.g. bot.started)
+            limit: Maximum number of messages to replay (oldest first)
+            
+        Returns:
+            int: Number of messages replayed
+        """
+        if not self.connection or self.connection.is_closed:
+            await self.connect(timeout=5.0)
+        
+        channel = await self.connection.channel()
+        replayed = 0
+        try:
+            queue = await channel.declare_queue(dead_letter_queue_name(queue_name), durable=True)
+            for _ in range(limit):
+                message = await queue.get(no_ack=False, fail=False)
+                if message is None:
+                    break
+                # Ack only after the broker confirmed the copy on the original queue
+                await self._publish_body(queue_name, message.body, persistent=True, headers=original_headers(message) or None)
+                await message.ack()
+                replayed += 1
+        finally:
+            await channel.close()
+        metrics.incr("rabbitmq_dead_letters_replayed_total", replayed, queue=queue_name)
+        logger.info(f"Replayed {replayed} dead letter(s) to queue '{queue_name}'")
+        return replayed
 
 
 # Global instance
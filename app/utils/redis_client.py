@@ -1,11 +1,123 @@
 import redis
-import json
-from typing import Any, Optional
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from redis.client import NEVER_DECODE
 from app.config import settings
+from app.utils.cache_codec import get_cache_serializer
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Delete a lock only if it is still held by the caller's token
+RELEASE_LOCK_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+# SETEX a value and register it in tag sets; each tag set lives as long as its longest-lived member
+SET_WITH_TAGS_SCRIPT = """
+local ttl = tonumber(ARGV[1])
+redis.call('SETEX', KEYS[1], ttl, ARGV[2])
+for i = 2, #KEYS do
+    redis.call('SADD', KEYS[i], KEYS[1])
+    if redis.call('TTL', KEYS[i]) < ttl then
+        redis.call('EXPIRE', KEYS[i], ttl)
+    end
+end
+return 1
+"""
+
+TAG_KEY_PREFIX = "tag:"
+INVALIDATE_BATCH_SIZE = 500  # Keys per SCAN page / UNLINK call
+
+
+def tag_key(tag: str) -> str:
+    """Redis key of the set holding every cache key registered under `tag`"""
+    return TAG_KEY_PREFIX + tag
+
+
+def user_tag(user_id: Any) -> str:
+    """Tag for every cache entry belonging to a user"""
+    return f"user:{user_id}"
+
+
+def pair_tag(pair: str) -> str:
+    """Tag for every cache entry of a trading pair"""
+    return f"pair:{pair}"
+
+
+class BatchCommands:
+    """
+    Commands queued on a non-transactional pipeline and sent in one round trip
+
+    Same value encoding as RedisClient. After execution `results` holds one
+    entry per queued command: the decoded value for get, a bool for set,
+    the number of removed keys for delete, and None for a failed command.
+    """
+
+    def __init__(self, pipe, serializer):
+        self._pipe = pipe  # None when Redis is unavailable: commands are dropped
+        self._serializer = serializer
+        self._decoders: List[Callable[[Any], Any]] = []
+        self.results: List[Any] = []
+
+    def __len__(self) -> int:
+        return len(self._decoders)
+
+    def _queue(self, decoder: Callable[[Any], Any], queue: Callable[[Any], Any]) -> "BatchCommands":
+        self._decoders.append(decoder)
+        if self._pipe is not None:
+            queue(self._pipe)
+        return self
+
+    def _decode_value(self, value: Any) -> Any:
+        try:
+            return self._serializer.decode(value)
+        except Exception as e:
+            logger.warning(f"Redis value decode error: {e}")
+            return None
+
+    def get(self, key: str) -> "BatchCommands":
+        return self._queue(self._decode_value, lambda pipe: pipe.execute_command("GET", key, **{NEVER_DECODE: True}))
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Optional[List[str]] = None) -> "BatchCommands":
+        value = self._serializer.encode(key, value)
+        ttl = ttl or settings.CACHE_TTL
+        if tags:
+            keys = [key] + [tag_key(tag) for tag in tags]
+            return self._queue(bool, lambda pipe: pipe.eval(SET_WITH_TAGS_SCRIPT, len(keys), *keys, ttl, value))
+        return self._queue(bool, lambda pipe: pipe.setex(key, ttl, value))
+
+    def delete(self, *keys: str) -> "BatchCommands":
+        return self._queue(int, lambda pipe: pipe.delete(*keys))
+
+    def expire(self, key: str, ttl: int) -> "BatchCommands":
+        return self._queue(bool, lambda pipe: pipe.expire(key, ttl))
+
+    def _resolve(self, raw: Optional[List[Any]]) -> List[Any]:
+        if raw is None:
+            self.results = [None] * len(self._decoders)
+        else:
+            self.results = [
+                None if isinstance(value, Exception) else decode(value)
+                for decode, value in zip(self._decoders, raw)
+            ]
+        return self.results
+
+    def execute(self) -> List[Any]:
+        """Send the queued commands (RedisClient.pipeline calls this on exit)"""
+        if self._pipe is None or not self._decoders:
+            return self._resolve(None)
+        try:
+            return self._resolve(self._pipe.execute(raise_on_error=False))
+        except Exception as e:
+            logger.warning(f"Redis pipeline error: {e}")
+            return self._resolve(None)
+
 
 class RedisClient:
     """Redis client for caching operations"""
@@ -13,6 +125,7 @@ class RedisClient:
     def __init__(self):
         self.client = None
         self._connected = False
+        self.serializer = get_cache_serializer()
         try:
             self.client = redis.Redis(
                 host=settings.REDIS_HOST,
@@ -31,6 +144,11 @@ class RedisClient:
             self._connected = False
             self.client = None
 
+    @property
+    def connected(self) -> bool:
+        """Whether a Redis connection was established"""
+        return self._connected
+
     def _check_connection(self) -> bool:
         """Check if Redis is connected"""
         if not self._connected or not self.client:
@@ -47,29 +165,75 @@ class RedisClient:
         if not self._check_connection():
             return None
         try:
-            value = self.client.get(key)
-            if value:
-                try:
-                    return json.loads(value)
-                except json.JSONDecodeError:
-                    return value
+            # Values are binary (codec header + payload): read them undecoded
+            value = self.client.execute_command("GET", key, **{NEVER_DECODE: True})
+            return self.serializer.decode(value)
         except Exception as e:
             logger.warning(f"Redis get error: {e}")
         return None
 
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> bool:
-        """Set value in Redis with optional TTL"""
+    def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """Get several values in one round trip (None for missing keys)"""
+        if not keys or not self._check_connection():
+            return [None] * len(keys)
+        try:
+            values = self.client.execute_command("MGET", *keys, **{NEVER_DECODE: True})
+            return [self.serializer.decode(value) for value in values]
+        except Exception as e:
+            logger.warning(f"Redis mget error: {e}")
+            return [None] * len(keys)
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, tags: Optional[List[str]] = None) -> bool:
+        """
+        Set value in Redis with optional TTL
+
+        Args:
+            tags: Register the key under these tags (e.g. "user:<id>", "pair:XBT/USD")
+                so invalidate_tag can drop it without scanning the keyspace
+        """
         if not self._check_connection():
             return False
         try:
-            if isinstance(value, (dict, list)):
-                value = json.dumps(value)
+            value = self.serializer.encode(key, value)
             ttl = ttl or settings.CACHE_TTL
+            if tags:
+                keys = [key] + [tag_key(tag) for tag in tags]
+                return bool(self.client.eval(SET_WITH_TAGS_SCRIPT, len(keys), *keys, ttl, value))
             return self.client.setex(key, ttl, value)
         except Exception as e:
             logger.warning(f"Redis set error: {e}")
             return False
 
+    def mset_with_ttl(
+        self, items: Dict[str, Any], ttl: Optional[int] = None, tags: Optional[Dict[str, List[str]]] = None
+    ) -> bool:
+        """Set several values with the same TTL in one round trip (`tags` maps keys to their tags)"""
+        if not items:
+            return True
+        with self.pipeline() as batch:
+            for key, value in items.items():
+                batch.set(key, value, ttl=ttl, tags=tags.get(key) if tags else None)
+        return all(batch.results)
+
+    @contextmanager
+    def pipeline(self) -> Iterator[BatchCommands]:
+        """
+        Queue commands and send them in one round trip when the block exits
+
+            with redis.pipeline() as batch:
+                batch.delete(old_key)
+                batch.set(new_key, value, ttl=600)
+            deleted, stored = batch.results
+        """
+        pipe = self.client.pipeline(transaction=False) if self._check_connection() else None
+        batch = BatchCommands(pipe, self.serializer)
+        try:
+            yield batch
+            batch.execute()
+        finally:
+            if pipe is not None:
+                pipe.reset()
+
     def delete(self, key: str) -> bool:
         """Delete key from Redis"""
         if not self._check_connection():
@@ -80,17 +244,74 @@ class RedisClient:
             logger.warning(f"Redis delete error: {e}")
             return False
 
+    def invalidate_tag(self, tag: str) -> int:
+        """Delete every key registered under `tag` (O(tagged keys), no keyspace scan)"""
+        if not self._check_connection():
+            return 0
+        deleted = 0
+        try:
+            members = list(self.client.smembers(tag_key(tag)))
+            for i in range(0, len(members), INVALIDATE_BATCH_SIZE):
+                deleted += self.client.unlink(*members[i:i + INVALIDATE_BATCH_SIZE])
+            self.client.unlink(tag_key(tag))
+        except Exception as e:
+            logger.warning(f"Redis invalidate_tag error: {e}")
+        return deleted
+
     def invalidate_pattern(self, pattern: str) -> int:
-        """Invalidate all keys matching pattern"""
+        """
+        Invalidate all keys matching pattern
+
+        Uses incremental SCAN rather than KEYS so Redis is never blocked for the
+        whole keyspace; prefer invalidate_tag for keys that were set with tags.
+        """
         if not self._check_connection():
             return 0
+        deleted = 0
         try:
-            keys = self.client.keys(pattern)
-            if keys:
-                return self.client.delete(*keys)
+            batch = []
+            for key in self.client.scan_iter(match=pattern, count=INVALIDATE_BATCH_SIZE):
+                batch.append(key)
+                if len(batch) >= INVALIDATE_BATCH_SIZE:
+                    deleted += self.client.unlink(*batch)
+                    batch = []
+            if batch:
+                deleted += self.client.unlink(*batch)
         except Exception as e:
             logger.warning(f"Redis invalidate_pattern error: {e}")
-        return 0
+        return deleted
+
+    def register_script(self, script: str):
+        """Register a Lua script; returns a callable Script or None if Redis is unavailable"""
+        if not self._check_connection():
+            return None
+        try:
+            return self.client.register_script(script)
+        except Exception as e:
+            logger.warning(f"Redis register_script error: {e}")
+            return None
+
+    def acquire_lock(self, key: str, ttl: float) -> Optional[str]:
+        """Try to take a lock (SET NX PX); returns the owner token or None if held elsewhere"""
+        if not self._check_connection():
+            return None
+        token = uuid.uuid4().hex
+        try:
+            if self.client.set(key, token, nx=True, px=int(ttl * 1000)):
+                return token
+        except Exception as e:
+            logger.warning(f"Redis acquire_lock error: {e}")
+        return None
+
+    def release_lock(self, key: str, token: str) -> bool:
+        """Release a lock previously taken with acquire_lock"""
+        if not self._check_connection():
+            return False
+        try:
+            return bool(self.client.eval(RELEASE_LOCK_SCRIPT, 1, key, token))
+        except Exception as e:
+            logger.warning(f"Redis release_lock error: {e}")
+            return False
 
     def exists(self, key: str) -> bool:
         """Check if key exists"""
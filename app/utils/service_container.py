@@ -0,0 +1,78 @@
+"""
+Application-scoped service container
+
+Clients that hold sockets or pools (Redis and the two-tier cache, Vault, the
+Kraken HTTP transport, the event publisher) are created once in the service lifespan and stored on
+`app.state.container`. Request handlers receive them through FastAPI
+dependencies instead of constructing new clients per request.
+"""
+import logging
+from typing import Any, Optional
+from fastapi import Request
+from app.utils.event_publisher import UnifiedEventPublisher, get_unified_event_publisher
+from app.utils.async_redis_client import AsyncRedisClient, close_async_redis, get_async_redis
+from app.utils.stale_cache import close_stale_cache
+from app.utils.tiered_cache import TieredCache, close_tiered_cache, get_tiered_cache
+from app.utils.vault_service import AsyncVaultService, close_async_vault, get_async_vault
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    """Long-lived clients shared by every request of one service process"""
+
+    def __init__(
+        self,
+        redis: AsyncRedisClient,
+        cache: TieredCache,
+        event_publisher: UnifiedEventPublisher,
+        vault: Optional[AsyncVaultService] = None,
+        kraken_transport: Optional[Any] = None,
+    ):
+        self.redis = redis
+        self.cache = cache
+        self.event_publisher = event_publisher
+        self.vault = vault
+        self.kraken_transport = kraken_transport
+
+    async def close(self) -> None:
+        """Release pooled connections (called once on shutdown)"""
+        # Cancel background refreshes first: they use the cache, transport and Vault
+        await close_stale_cache()
+        if self.vault is not None:
+            await close_async_vault()
+        if self.kraken_transport is not None:
+            from app.utils.kraken_client import close_kraken_transport
+            await close_kraken_transport()
+        await close_tiered_cache()
+        await close_async_redis()
+
+
+async def create_service_container(vault: bool = True, kraken: bool = False) -> ServiceContainer:
+    """
+    Build the container for a service lifespan
+
+    Args:
+        vault: Create the async Vault client (skipped when VAULT_URL is unset)
+        kraken: Create the shared Kraken HTTP transport
+    """
+    kraken_transport = None
+    if kraken:
+        from app.utils.kraken_client import get_kraken_transport
+        kraken_transport = get_kraken_transport()
+    redis = get_async_redis()
+    await redis.start()  # Initial PING, then background health checks
+    cache = get_tiered_cache()
+    await cache.start()  # Listen for L1 invalidations from other workers
+    return ServiceContainer(
+        redis=redis,
+        cache=cache,
+        event_publisher=await get_unified_event_publisher(),
+        vault=get_async_vault() if vault else None,
+        kraken_transport=kraken_transport,
+    )
+
+
+def get_container(request: Request) -> ServiceContainer:
+    """FastAPI dependency returning the container created in the lifespan"""
+    return request.app.state.container
@@ -0,0 +1,137 @@
+"""
+Single-flight request coalescing
+
+When a cache entry expires, every concurrent request for it would otherwise go
+upstream at once. SingleFlight lets only one fetch per key run at a time in
+this process; all other callers await the same result. With `distributed=True`
+a Redis lock extends this across workers: workers that lose the lock poll the
+cache until the winner has filled it.
+"""
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Union
+from app.config import settings
+from app.utils.metrics import metrics
+from app.utils.async_redis_client import AsyncRedisClient, get_async_redis
+
+logger = logging.getLogger(__name__)
+
+LOCK_KEY_PREFIX = "lock:singleflight:"
+
+
+class SingleFlight:
+    """Collapse concurrent fetches for the same key into one upstream call"""
+
+    def __init__(
+        self,
+        redis: Optional[AsyncRedisClient] = None,
+        lock_ttl: Optional[float] = None,
+        wait_timeout: Optional[float] = None,
+        poll_interval: float = 0.05,
+    ):
+        self._redis = redis
+        self.lock_ttl = lock_ttl or settings.SINGLE_FLIGHT_LOCK_TTL
+        self.wait_timeout = wait_timeout or settings.SINGLE_FLIGHT_WAIT_TIMEOUT
+        self.poll_interval = poll_interval
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    @property
+    def redis(self) -> AsyncRedisClient:
+        if self._redis is None:
+            self._redis = get_async_redis()
+        return self._redis
+
+    def inflight(self, key: str) -> bool:
+        """Whether a fetch for `key` is currently running in this process"""
+        return key in self._inflight
+
+    async def do(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        cache_lookup: Optional[Callable[[], Union[Optional[Any], Awaitable[Optional[Any]]]]] = None,
+        distributed: Optional[bool] = None,
+    ) -> Any:
+        """
+        Run `fetch` once for `key`, sharing its result with concurrent callers
+
+        Args:
+            key: Coalescing key (normally the cache key being filled)
+            fetch: Async function performing the upstream call and filling the cache
+            cache_lookup: Reads the cache (sync or async); used by workers waiting on another worker's lock
+            distributed: Also coalesce across workers via a Redis lock
+                (defaults to SINGLE_FLIGHT_DISTRIBUTED, requires cache_lookup)
+
+        Returns:
+            The value returned by `fetch` (or found in the cache)
+        """
+        task = self._inflight.get(key)
+        if task is not None:
+            metrics.incr("single_flight_shared_total")
+            return await asyncio.shield(task)
+
+        if distributed is None:
+            distributed = settings.SINGLE_FLIGHT_DISTRIBUTED
+        if distributed and cache_lookup is not None:
+            coro = self._run_distributed(key, fetch, cache_lookup)
+        else:
+            coro = fetch()
+
+        # Run the fetch in its own task so a cancelled caller does not cancel it for the others
+        task = asyncio.ensure_future(coro)
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._finish(key, t))
+        metrics.incr("single_flight_leader_total")
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every caller was cancelled
+            task.exception()
+
+    async def _run_distributed(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        cache_lookup: Callable[[], Union[Optional[Any], Awaitable[Optional[Any]]]],
+    ) -> Any:
+        if not self.redis.connected:
+            return await fetch()
+        lock_key = LOCK_KEY_PREFIX + key
+        token = await self.redis.acquire_lock(lock_key, self.lock_ttl)
+        if token is not None:
+            try:
+                return await fetch()
+            finally:
+                await self.redis.release_lock(lock_key, token)
+
+        # Another worker is fetching: wait for it to fill the cache
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            cached = cache_lookup()
+            if inspect.isawaitable(cached):
+                cached = await cached
+            if cached is not None:
+                metrics.incr("single_flight_remote_shared_total")
+                return cached
+            if not await self.redis.exists(lock_key):
+                break
+        # The other worker failed or timed out; fetch ourselves
+        return await fetch()
+
+
+# Global instance
+_single_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> SingleFlight:
+    """Get or create the process-wide SingleFlight instance"""
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight()
+    return _single_flight
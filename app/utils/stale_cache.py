@@ -0,0 +1,142 @@
+"""
+Stale-while-revalidate caching
+
+Entries carry two lifetimes: after the soft TTL a value is stale but is still
+served immediately while one background task refreshes it; only after the hard
+TTL (the Redis key expiry) does a caller block on the upstream fetch. Values
+are stored as {"_v": value, "_fresh_until": epoch seconds} so every worker
+agrees on when an entry went stale.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Set, Tuple
+from app.utils.metrics import metrics
+from app.utils.single_flight import SingleFlight, get_single_flight
+
+logger = logging.getLogger(__name__)
+
+VALUE_FIELD = "_v"
+FRESH_UNTIL_FIELD = "_fresh_until"
+
+
+def wrap(value: Any, soft_ttl: float) -> dict:
+    """Build the cache entry for `value`, fresh for `soft_ttl` seconds"""
+    return {VALUE_FIELD: value, FRESH_UNTIL_FIELD: time.time() + soft_ttl}
+
+
+def unwrap(entry: Optional[Any]) -> Tuple[Optional[Any], bool]:
+    """
+    Split a cache entry into (value, stale)
+
+    Plain values written without an envelope are treated as fresh; they
+    still expire with their Redis TTL.
+    """
+    if isinstance(entry, dict) and VALUE_FIELD in entry and FRESH_UNTIL_FIELD in entry:
+        return entry[VALUE_FIELD], time.time() >= entry[FRESH_UNTIL_FIELD]
+    return entry, False
+
+
+class StaleWhileRevalidate:
+    """Serve stale entries while refreshing them in the background"""
+
+    def __init__(self, single_flight: Optional[SingleFlight] = None):
+        self.single_flight = single_flight or get_single_flight()
+        self._background: Set[asyncio.Task] = set()
+
+    async def get(
+        self,
+        cache,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        soft_ttl: float,
+        hard_ttl: int,
+        tags: Optional[List[str]] = None,
+        name: str = "default",
+        **set_kwargs,
+    ) -> Any:
+        """
+        Return the cached value for `key`, refreshing it as needed
+
+        Args:
+            cache: AsyncRedisClient or TieredCache
+            key: Cache key
+            fetch: Async function returning the fresh value (the result is cached here)
+            soft_ttl: Seconds the value is served without a refresh
+            hard_ttl: Seconds the value may be served at all (Redis key TTL)
+            tags: Invalidation tags for the cache entry
+            name: Metric label identifying the cache
+            **set_kwargs: Extra arguments for cache.get/set (e.g. l1_ttl for TieredCache)
+        """
+        value, stale = unwrap(await cache.get(key, **set_kwargs))
+        if value is not None:
+            if stale:
+                metrics.incr("cache_stale_served_total", cache=name)
+                self.refresh_in_background(
+                    key, lambda: self._refresh(cache, key, fetch, soft_ttl, hard_ttl, tags, name, "background", **set_kwargs)
+                )
+            else:
+                metrics.incr("cache_fresh_hit_total", cache=name)
+            return value
+
+        metrics.incr("cache_blocking_refresh_total", cache=name)
+        return await self._refresh(cache, key, fetch, soft_ttl, hard_ttl, tags, name, "blocking", **set_kwargs)
+
+    def refresh_in_background(self, key: str, refresh: Callable[[], Awaitable[Any]]) -> None:
+        """Run `refresh` as a background task unless a fetch for `key` is already running in this process"""
+        if self.single_flight.inflight(key):
+            return
+        task = asyncio.ensure_future(refresh())
+        self._background.add(task)
+        task.add_done_callback(self._background_done)
+
+    def _background_done(self, task: asyncio.Task) -> None:
+        self._background.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            # The stale value keeps being served until the hard TTL
+            metrics.incr("cache_background_refresh_failed_total")
+            logger.warning(f"Background cache refresh failed: {error}")
+
+    async def _refresh(self, cache, key, fetch, soft_ttl, hard_ttl, tags, name, mode, **set_kwargs) -> Any:
+        async def fetch_and_cache():
+            started = time.monotonic()
+            value = await fetch()
+            metrics.observe("cache_refresh_seconds", time.monotonic() - started, cache=name, mode=mode)
+            await cache.set(key, wrap(value, soft_ttl), ttl=hard_ttl, tags=tags, **set_kwargs)
+            return value
+
+        async def lookup_fresh():
+            # Workers waiting on another worker's lock accept only a refreshed entry
+            value, stale = unwrap(await cache.get(key, **set_kwargs))
+            return None if stale else value
+
+        return await self.single_flight.do(key, fetch_and_cache, cache_lookup=lookup_fresh)
+
+    async def close(self) -> None:
+        """Cancel background refreshes (called on shutdown)"""
+        for task in list(self._background):
+            task.cancel()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        self._background.clear()
+
+
+# Global instance
+_stale_cache: Optional[StaleWhileRevalidate] = None
+
+
+def get_stale_cache() -> StaleWhileRevalidate:
+    """Get or create the process-wide stale-while-revalidate helper"""
+    global _stale_cache
+    if _stale_cache is None:
+        _stale_cache = StaleWhileRevalidate()
+    return _stale_cache
+
+
+async def close_stale_cache() -> None:
+    global _stale_cache
+    if _stale_cache is not None:
+        await _stale_cache.close()
+        _stale_cache = None
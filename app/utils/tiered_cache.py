@@ -0,0 +1,389 @@
+"""
+Two-tier cache: in-process LRU (L1) in front of Redis (L2)
+
+Hot, rarely changing values (trading pairs, tickers) are served from process
+memory without a network round trip or JSON decode. Writes and invalidations
+are published on a Redis pub/sub channel so every worker drops its L1 copy.
+L1 values are shared objects: callers must treat them as read-only.
+
+Keys under CACHE_TRACKING_PREFIXES additionally use Redis server-assisted
+client-side caching (CLIENT TRACKING, Redis >= 6): Redis itself pushes an
+invalidation whenever such a key is modified by anyone - including processes
+that write Redis directly - so these keys can stay in L1 for much longer.
+"""
+import asyncio
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from redis.exceptions import ResponseError
+from app.config import settings
+from app.utils.async_redis_client import AsyncRedisClient, get_async_redis
+from app.utils.metrics import metrics
+from app.utils.redis_client import tag_key
+
+logger = logging.getLogger(__name__)
+
+TRACKING_CHANNEL = "__redis__:invalidate"  # Where Redis redirects CLIENT TRACKING invalidations
+
+
+class LRUCache:
+    """Bounded in-process cache with a TTL per entry and optional tags"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, Tuple[float, Any, Tuple[str, ...]]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value, _ = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float, tags: Iterable[str] = ()) -> None:
+        self._entries[key] = (time.monotonic() + ttl, value, tuple(tags))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+    def delete_tag(self, tag: str) -> None:
+        for key in [key for key, (_, _, tags) in self._entries.items() if tag in tags]:
+            del self._entries[key]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class TieredCache:
+    """
+    L1 (LRUCache) + L2 (AsyncRedisClient) with pub/sub invalidation
+
+    Same get/mget/set/delete shape as AsyncRedisClient. `l1_ttl` bounds how long
+    a worker may serve its own copy if an invalidation message is missed.
+    """
+
+    def __init__(
+        self,
+        redis: Optional[AsyncRedisClient] = None,
+        max_size: Optional[int] = None,
+        l1_ttl: Optional[float] = None,
+        channel: Optional[str] = None,
+        tracked_prefixes: Optional[List[str]] = None,
+    ):
+        self.redis = redis or get_async_redis()
+        self.l1 = LRUCache(max_size or settings.L1_CACHE_MAX_SIZE)
+        self.l1_ttl = l1_ttl or settings.L1_CACHE_TTL
+        self.channel = channel or settings.CACHE_INVALIDATION_CHANNEL
+        if tracked_prefixes is None:
+            tracked_prefixes = settings.cache_tracking_prefixes_list
+        self.tracked_prefixes = tuple(tracked_prefixes)
+        self.tracking_l1_ttl = settings.CACHE_TRACKING_L1_TTL
+        self._origin = uuid.uuid4().hex  # Ignore our own invalidation messages
+        self._listener: Optional[asyncio.Task] = None
+        self._subscribed = False
+        self._tracking = False  # CLIENT TRACKING invalidations are being received
+        self._tracking_supported = True
+        # Tracked keys this process wrote whose CLIENT TRACKING notification is still due
+        self._own_writes: Dict[str, int] = {}
+        self._generation = 0  # Bumped on every invalidation received
+
+    @property
+    def l1_enabled(self) -> bool:
+        """L1 is bypassed while the listener runs but is not subscribed (it would miss invalidations)"""
+        return self._listener is None or self._subscribed
+
+    @property
+    def tracking(self) -> bool:
+        """Whether Redis is pushing invalidations for the tracked prefixes"""
+        return self._tracking
+
+    def _default_l1_ttl(self, key: str) -> float:
+        if self._tracking and key.startswith(self.tracked_prefixes):
+            return self.tracking_l1_ttl
+        return self.l1_ttl
+
+    def _expect_own_writes(self, keys: Iterable[str]) -> List[str]:
+        """
+        Count writes to tracked keys, so their tracking notifications do not evict our L1 copy
+
+        The writes go through pooled connections, which NOLOOP (set on the tracking
+        connection) does not cover.
+        """
+        if not self._tracking:
+            return []
+        own = [key for key in keys if key.startswith(self.tracked_prefixes)]
+        for key in own:
+            self._own_writes[key] = self._own_writes.get(key, 0) + 1
+        return own
+
+    def _forget_own_writes(self, keys: Iterable[str]) -> None:
+        """Undo _expect_own_writes for writes that did not reach Redis"""
+        for key in keys:
+            count = self._own_writes.pop(key, 0) - 1
+            if count > 0:
+                self._own_writes[key] = count
+
+    def _l1_ttl(self, key: str, ttl: Optional[int], l1_ttl: Optional[float]) -> float:
+        l1_ttl = l1_ttl or self._default_l1_ttl(key)
+        return min(l1_ttl, ttl) if ttl else l1_ttl
+
+    async def get(self, key: str, l1_ttl: Optional[float] = None) -> Optional[Any]:
+        """Get value from L1, falling back to Redis (and filling L1)"""
+        if not self.l1_enabled:
+            return await self.redis.get(key)
+        value = self.l1.get(key)
+        if value is not None:
+            metrics.incr("cache_l1_hit_total")
+            return value
+        metrics.incr("cache_l1_miss_total")
+        generation = self._generation
+        value = await self.redis.get(key)
+        # Skip the fill if an invalidation arrived during the read: the value may already be stale
+        if value is not None and generation == self._generation:
+            self.l1.set(key, value, l1_ttl or self._default_l1_ttl(key))
+        return value
+
+    async def mget(self, keys: List[str], l1_ttl: Optional[float] = None) -> List[Optional[Any]]:
+        """Get several values; only L1 misses go to Redis (one MGET)"""
+        if not self.l1_enabled:
+            return await self.redis.mget(keys)
+        values = [self.l1.get(key) for key in keys]
+        missing = [i for i, value in enumerate(values) if value is None]
+        metrics.incr("cache_l1_hit_total", len(keys) - len(missing))
+        metrics.incr("cache_l1_miss_total", len(missing))
+        if missing:
+            generation = self._generation
+            fetched = await self.redis.mget([keys[i] for i in missing])
+            fill = generation == self._generation
+            for i, value in zip(missing, fetched):
+                if value is not None:
+                    if fill:
+                        self.l1.set(keys[i], value, l1_ttl or self._default_l1_ttl(keys[i]))
+                    values[i] = value
+        return values
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[int] = None,
+        tags: Optional[List[str]] = None,
+        l1_ttl: Optional[float] = None,
+    ) -> bool:
+        """Write through to Redis and L1, and tell other workers to drop their copy"""
+        if self.l1_enabled:
+            self.l1.set(key, value, self._l1_ttl(key, ttl, l1_ttl), tags or ())
+        own = self._expect_own_writes([key])
+        result = await self.redis.set(key, value, ttl=ttl, tags=tags)
+        if not result:
+            self._forget_own_writes(own)
+        await self._publish({"keys": [key]})
+        return result
+
+    async def mset_with_ttl(
+        self,
+        items: Dict[str, Any],
+        ttl: Optional[int] = None,
+        tags: Optional[Dict[str, List[str]]] = None,
+        l1_ttl: Optional[float] = None,
+    ) -> bool:
+        """Write several values through in one Redis round trip and one invalidation message"""
+        if not items:
+            return True
+        if self.l1_enabled:
+            for key, value in items.items():
+                self.l1.set(key, value, self._l1_ttl(key, ttl, l1_ttl), (tags or {}).get(key, ()))
+        own = self._expect_own_writes(items)
+        result = await self.redis.mset_with_ttl(items, ttl=ttl, tags=tags)
+        if not result:
+            self._forget_own_writes(own)
+        await self._publish({"keys": list(items)})
+        return result
+
+    async def delete(self, key: str) -> bool:
+        self.l1.delete(key)
+        result = await self.redis.delete(key)
+        await self._publish({"keys": [key]})
+        return result
+
+    async def invalidate_tag(self, tag: str) -> int:
+        # L1 copies filled from Redis carry no tags, so name the tagged keys explicitly
+        keys: List[str] = []
+        if self.redis.connected:
+            try:
+                keys = list(await self.redis.client.smembers(tag_key(tag)))
+            except Exception as e:
+                logger.warning(f"Failed to read cache tag {tag}: {e}")
+        self.l1.delete_tag(tag)
+        for key in keys:
+            self.l1.delete(key)
+        deleted = await self.redis.invalidate_tag(tag)
+        await self._publish({"keys": keys, "tags": [tag]})
+        return deleted
+
+    async def _publish(self, message: Dict[str, Any]) -> None:
+        if not self.redis.connected:
+            return
+        message["origin"] = self._origin
+        try:
+            await self.redis.client.publish(self.channel, json.dumps(message))
+        except Exception as e:
+            logger.warning(f"Failed to publish cache invalidation: {e}")
+
+    def apply_invalidation(self, message: Dict[str, Any]) -> None:
+        """Drop L1 entries named in an invalidation message from another worker"""
+        if message.get("origin") == self._origin:
+            return
+        self._generation += 1
+        for key in message.get("keys", ()):
+            self.l1.delete(key)
+        for tag in message.get("tags", ()):
+            self.l1.delete_tag(tag)
+        metrics.incr("cache_l1_remote_invalidations_total")
+
+    def apply_tracking_invalidation(self, keys: Optional[List[str]]) -> None:
+        """Drop L1 entries Redis reported as modified (None means the database was flushed)"""
+        if keys is None:
+            self._own_writes.clear()
+            self.l1.clear()
+        else:
+            # Our own writes already updated L1; each of them is reported once
+            stale = []
+            for key in keys:
+                if key in self._own_writes:
+                    self._forget_own_writes([key])
+                else:
+                    stale.append(key)
+            if not stale:
+                return
+            for key in stale:
+                self.l1.delete(key)
+        self._generation += 1
+        metrics.incr("cache_l1_tracking_invalidations_total")
+
+    async def start(self) -> None:
+        """Start listening for invalidations from other workers"""
+        if self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        self.l1.clear()
+
+    async def _enable_tracking(self, pubsub) -> Optional[Any]:
+        """
+        Turn on CLIENT TRACKING in broadcast mode, redirected to the pubsub connection
+
+        BCAST tracks every key under the prefixes no matter which pooled
+        connection read it, so one dedicated connection holds the tracking
+        state. NOLOOP skips notifications for writes made on that connection.
+        Returns that connection, or None if Redis does not support it.
+        """
+        await pubsub.connect()
+        await pubsub.connection.send_command("CLIENT", "ID")
+        client_id = await pubsub.connection.read_response()
+
+        args = ["CLIENT", "TRACKING", "ON", "REDIRECT", client_id, "BCAST", "NOLOOP"]
+        for prefix in self.tracked_prefixes:
+            args += ["PREFIX", prefix]
+        connection = await self.redis.pool.get_connection("CLIENT")
+        try:
+            await connection.send_command(*args)
+            await connection.read_response()
+        except ResponseError as e:
+            await self.redis.pool.release(connection)
+            self._tracking_supported = False
+            logger.warning(f"Redis client-side caching not available ({e}); tracked keys use pub/sub invalidation only")
+            return None
+        except BaseException:
+            await self._disable_tracking(connection)
+            raise
+        return connection
+
+    async def _disable_tracking(self, connection) -> None:
+        # Closing the connection ends its tracking; the pool reconnects it on next use
+        try:
+            await connection.disconnect()
+        finally:
+            await self.redis.pool.release(connection)
+
+    async def _listen(self) -> None:
+        """Subscribe to the invalidation channels, reconnecting with backoff"""
+        retry_delay = 1.0
+        while True:
+            pubsub = self.redis.client.pubsub(ignore_subscribe_messages=True)
+            tracking_connection = None
+            try:
+                channels = [self.channel]
+                if self.tracked_prefixes and self._tracking_supported:
+                    tracking_connection = await self._enable_tracking(pubsub)
+                    if tracking_connection is not None:
+                        channels.append(TRACKING_CHANNEL)
+                await pubsub.subscribe(*channels)
+                self._subscribed = True
+                self._tracking = tracking_connection is not None
+                retry_delay = 1.0
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    if message.get("channel") == TRACKING_CHANNEL:
+                        self.apply_tracking_invalidation(message["data"])
+                        continue
+                    try:
+                        self.apply_invalidation(json.loads(message["data"]))
+                    except (ValueError, TypeError) as e:
+                        logger.warning(f"Ignoring malformed cache invalidation: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener error: {e}. Reconnecting in {retry_delay:.1f}s...")
+            finally:
+                # Invalidations may be missed until we resubscribe: drop and bypass L1
+                self._subscribed = False
+                self._tracking = False
+                self._own_writes.clear()
+                self._generation += 1
+                self.l1.clear()
+                try:
+                    if tracking_connection is not None:
+                        await self._disable_tracking(tracking_connection)
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+            await asyncio.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, 60.0)
+
+
+# Global instance
+_tiered_cache: Optional[TieredCache] = None
+
+
+def get_tiered_cache() -> TieredCache:
+    """Get or create the process-wide two-tier cache"""
+    global _tiered_cache
+    if _tiered_cache is None:
+        _tiered_cache = TieredCache()
+    return _tiered_cache
+
+
+async def close_tiered_cache() -> None:
+    global _tiered_cache
+    if _tiered_cache is not None:
+        await _tiered_cache.stop()
+        _tiered_cache = None
@@ -5,8 +5,16 @@ except ImportError:
     HVAC_AVAILABLE = False
     hvac = None
 
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+import httpx
 from app.config import settings
-from typing import Dict, Any
+from app.utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
 
 
 class VaultService:
@@ -58,3 +66,180 @@ class VaultService:
         """Update secret in Vault"""
         self.store_secret(path, secret)
 
+
+
+class SecretCache:
+    """
+    Size-bounded, TTL-expiring in-process cache of decrypted secrets
+
+    Entries are plain string copies; the cache bounds how many secrets are
+    held and for how long, it does not protect them in process memory.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, str]]]" = OrderedDict()
+
+    def get(self, path: str) -> Optional[Dict[str, str]]:
+        entry = self._entries.get(path)
+        if entry is None:
+            return None
+        expires_at, fields = entry
+        if time.monotonic() >= expires_at:
+            self.invalidate(path)
+            return None
+        self._entries.move_to_end(path)
+        return dict(fields)
+
+    def set(self, path: str, secret: Dict[str, Any]) -> None:
+        self._entries.pop(path, None)
+        self._entries[path] = (time.monotonic() + self.ttl, {key: str(value) for key, value in secret.items()})
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, path: str) -> None:
+        self._entries.pop(path, None)
+
+    def invalidate_prefix(self, prefix: str) -> int:
+        """Drop every entry whose path starts with `prefix`; returns the number dropped"""
+        paths = [path for path in self._entries if path.startswith(prefix)]
+        for path in paths:
+            self.invalidate(path)
+        return len(paths)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class AsyncVaultService:
+    """
+    Non-blocking Vault KV v2 access over a pooled httpx client
+
+    Reads go through a SecretCache, so Vault is only contacted on the first
+    request for a key and after the cache TTL; concurrent misses for the same
+    path share a single Vault round trip. Invalidation bumps a per-path
+    generation, and a read only fills the cache if no invalidation happened
+    while it was in flight, so a rotated or deleted key is never written
+    back by a read that started before the change.
+    """
+
+    def __init__(self, cache: Optional[SecretCache] = None):
+        if not settings.VAULT_URL:
+            raise ValueError("VAULT_URL is not configured")
+        self.client = httpx.AsyncClient(
+            base_url=settings.VAULT_URL.rstrip("/"),
+            headers={"X-Vault-Token": settings.VAULT_TOKEN} if settings.VAULT_TOKEN else None,
+            timeout=settings.VAULT_TIMEOUT,
+        )
+        self.cache = cache or SecretCache(settings.VAULT_SECRET_CACHE_SIZE, settings.VAULT_SECRET_CACHE_TTL)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._generations: Dict[str, int] = {}
+
+    def _data_url(self, path: str) -> str:
+        return f"/v1/{settings.VAULT_MOUNT_PATH}/data/{path}"
+
+    def _metadata_url(self, path: str) -> str:
+        return f"/v1/{settings.VAULT_MOUNT_PATH}/metadata/{path}"
+
+    async def _read(self, path: str, generation: int) -> Dict[str, Any]:
+        response = await self.client.get(self._data_url(path))
+        response.raise_for_status()
+        secret = response.json()["data"]["data"]
+        if self._generations.get(path, 0) == generation:
+            self.cache.set(path, secret)
+        return secret
+
+    async def get_secret(self, path: str) -> Dict[str, Any]:
+        """Retrieve secret, from the in-process cache when possible"""
+        cached = self.cache.get(path)
+        if cached is not None:
+            metrics.incr("vault_cache_hit_total")
+            return cached
+        metrics.incr("vault_cache_miss_total")
+
+        task = self._inflight.get(path)
+        if task is None:
+            task = asyncio.ensure_future(self._read(path, self._generations.get(path, 0)))
+            self._inflight[path] = task
+            task.add_done_callback(lambda t: self._read_done(path, t))
+        try:
+            return dict(await asyncio.shield(task))
+        except Exception as e:
+            raise Exception(f"Failed to retrieve secret from Vault: {str(e)}")
+
+    def _read_done(self, path: str, task: asyncio.Task) -> None:
+        # An invalidation may already have replaced this read with a newer one
+        if self._inflight.get(path) is task:
+            del self._inflight[path]
+        if not task.cancelled():
+            task.exception()  # Retrieved by the awaiting callers; avoid "never retrieved" warnings
+
+    async def store_secret(self, path: str, secret: Dict[str, Any]) -> None:
+        """Store secret in Vault"""
+        self.invalidate(path)
+        try:
+            response = await self.client.post(self._data_url(path), json={"data": secret})
+            response.raise_for_status()
+        except Exception as e:
+            raise Exception(f"Failed to store secret in Vault: {str(e)}")
+        finally:
+            # Reads that started during the write may have seen the old value
+            self.invalidate(path)
+
+    async def delete_secret(self, path: str) -> None:
+        """Delete secret from Vault"""
+        self.invalidate(path)
+        try:
+            response = await self.client.delete(self._metadata_url(path))
+            response.raise_for_status()
+        except Exception as e:
+            raise Exception(f"Failed to delete secret from Vault: {str(e)}")
+        finally:
+            self.invalidate(path)
+
+    async def update_secret(self, path: str, secret: Dict[str, Any]) -> None:
+        """Update secret in Vault"""
+        await self.store_secret(path, secret)
+
+    def invalidate(self, path: str) -> None:
+        """Drop a cached secret (e.g. after the key was changed by another worker)"""
+        self._generations[path] = self._generations.get(path, 0) + 1
+        # Later reads must not join a read that started before the change
+        self._inflight.pop(path, None)
+        self.cache.invalidate(path)
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Drop every cached Kraken secret of a user (paths are kraken/{user_id}/...)"""
+        prefix = f"kraken/{user_id}/"
+        for path in [path for path in self._inflight if path.startswith(prefix)]:
+            self.invalidate(path)
+        if self.cache.invalidate_prefix(prefix):
+            logger.info(f"Invalidated cached Vault secrets for user {user_id}")
+
+    async def close(self) -> None:
+        self.cache.clear()
+        await self.client.aclose()
+
+
+# Global instance
+_async_vault: Optional[AsyncVaultService] = None
+
+
+def get_async_vault() -> Optional[AsyncVaultService]:
+    """Get or create the process-wide async Vault service (None if Vault is not configured)"""
+    global _async_vault
+    if _async_vault is None:
+        try:
+            _async_vault = AsyncVaultService()
+        except ValueError:
+            return None
+    return _async_vault
+
+
+async def close_async_vault() -> None:
+    """Close the global async Vault service and clear its cache"""
+    global _async_vault
+    if _async_vault is not None:
+        await _async_vault.close()
+        _async_vault = None
@@ -0,0 +1,79 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../..'))
+from fastapi import Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.orm import Session
+from database import get_db
+from app.models.user import User
+from app.schemas.user import UserResponse
+from utils.security import decode_token
+from app.utils.service_container import ServiceContainer, get_container
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/user/api/v1/auth/login")
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> UserResponse:
+    """Get current authenticated user (tokens are issued by the user service)"""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = decode_token(token)
+    except ValueError:
+        raise credentials_exception
+
+    user_id = payload.get("sub")
+    if user_id is None or payload.get("type") != "access":
+        raise credentials_exception
+
+    user = db.query(User).filter(User.id == user_id).first()
+    if user is None:
+        raise credentials_exception
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User account is inactive"
+        )
+    return UserResponse.model_validate(user)
+
+
+async def require_admin(
+    current_user: UserResponse = Depends(get_current_user)
+) -> UserResponse:
+    """Require admin role"""
+    if not current_user.is_admin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required"
+        )
+    return current_user
+
+
+def get_market_data_service(container: ServiceContainer = Depends(get_container)):
+    """MarketDataService wired to the application-scoped clients"""
+    from services.market_data_service import MarketDataService
+    return MarketDataService(cache=container.cache)
+
+
+def get_trading_data_service(
+    db: Session = Depends(get_db),
+    container: ServiceContainer = Depends(get_container)
+):
+    """TradingDataService wired to the application-scoped clients"""
+    from services.trading_data_service import TradingDataService
+    return TradingDataService(db, redis=container.redis, vault=container.vault)
+
+
+def get_kraken_service(
+    db: Session = Depends(get_db),
+    container: ServiceContainer = Depends(get_container)
+):
+    """KrakenService wired to the application-scoped clients"""
+    from services.kraken_service import KrakenService
+    return KrakenService(db, vault=container.vault, event_publisher=container.event_publisher, redis=container.redis)
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from app.schemas.admin import DeadLetterListResponse, DeadLetterReplayResponse
+from app.schemas.user import UserResponse
+from services.rabbitmq_consumer import RabbitMQConsumer
+from utils.rabbitmq_client import RabbitMQClient, get_rabbitmq_client
+from api.deps import require_admin
+
+router = APIRouter()
+
+
+def _check_queue(queue: str) -> None:
+    if queue not in RabbitMQConsumer.QUEUES:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown queue '{queue}'"
+        )
+
+
+async def _rabbitmq() -> RabbitMQClient:
+    try:
+        return await get_rabbitmq_client(timeout=5.0)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="RabbitMQ is not available"
+        )
+
+
+@router.get("/{queue}", response_model=DeadLetterListResponse)
+async def list_dead_letters(
+    queue: str,
+    limit: int = Query(50, ge=1, le=500),
+    current_user: UserResponse = Depends(require_admin)
+):
+    """Inspect messages of `queue` that failed every delivery attempt (they stay dead-lettered)"""
+    _check_queue(queue)
+    rabbitmq = await _rabbitmq()
+    return DeadLetterListResponse(queue=queue, messages=await rabbitmq.get_dead_letters(queue, limit=limit))
+
+
+@router.post("/{queue}/replay", response_model=DeadLetterReplayResponse)
+async def replay_dead_letters(
+    queue: str,
+    limit: int = Query(100, ge=1, le=10000),
+    current_user: UserResponse = Depends(require_admin)
+):
+    """Move dead letters back to `queue` with a fresh attempt count (oldest first)"""
+    _check_queue(queue)
+    rabbitmq = await _rabbitmq()
+    return DeadLetterReplayResponse(queue=queue, replayed=await rabbitmq.replay_dead_letters(queue, limit=limit))
@@ -0,0 +1,97 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from typing import Optional
+import json
+from app.schemas.trading_data import IndicatorResponse, OHLCResponse, TickerBatchResponse
+from app.schemas.user import UserResponse
+from services.market_data_service import MarketDataService
+from services.indicator_service import get_indicator_service
+from api.deps import get_current_user, get_market_data_service
+
+router = APIRouter()
+
+MAX_BATCH_PAIRS = 50
+
+# Compact OHLC encodings (negotiated via the Accept header)
+OHLC_COLUMNS_MEDIA_TYPE = "application/vnd.muckard.ohlc.columns+json"
+OHLC_BINARY_MEDIA_TYPE = "application/vnd.muckard.ohlc+binary"
+
+
+@router.get("/tickers", response_model=TickerBatchResponse)
+async def get_tickers(
+    pairs: str = Query(..., description="Comma-separated trading pairs, e.g. XBT/USD,ETH/USD"),
+    market_data: MarketDataService = Depends(get_market_data_service),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Get tickers for several pairs in one request"""
+    pair_list = [pair.strip() for pair in pairs.split(",") if pair.strip()]
+    if not pair_list:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one pair is required"
+        )
+    if len(pair_list) > MAX_BATCH_PAIRS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_PAIRS} pairs per request"
+        )
+    return TickerBatchResponse(tickers=await market_data.get_tickers(pair_list))
+
+
+@router.get(
+    "/ohlc",
+    response_model=OHLCResponse,
+    responses={200: {"content": {OHLC_COLUMNS_MEDIA_TYPE: {}, OHLC_BINARY_MEDIA_TYPE: {}}}},
+)
+async def get_ohlc(
+    request: Request,
+    pair: str = Query(..., description="Trading pair, e.g. XBT/USD"),
+    interval: int = Query(1, description="Candle interval in minutes"),
+    start: Optional[int] = Query(None, description="Only candles at or after this Unix time"),
+    end: Optional[int] = Query(None, description="Only candles at or before this Unix time"),
+    market_data: MarketDataService = Depends(get_market_data_service),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Get OHLC candles for a pair, optionally limited to a time range
+
+    The encoding is negotiated with the Accept header:
+    - application/json (default): list of candle objects (OHLCResponse)
+    - application/vnd.muckard.ohlc.columns+json: one JSON array per field
+    - application/vnd.muckard.ohlc+binary: header plus little-endian int64/float64
+      columns (see OHLCColumns.to_bytes)
+    """
+    accept = request.headers.get("accept", "")
+    headers = {"X-OHLC-Pair": pair, "X-OHLC-Interval": str(interval), "Vary": "Accept"}
+
+    if OHLC_BINARY_MEDIA_TYPE in accept:
+        columns = await market_data.get_ohlc_columns(pair, interval, start=start, end=end)
+        return Response(content=columns.to_bytes(), media_type=OHLC_BINARY_MEDIA_TYPE, headers=headers)
+    if OHLC_COLUMNS_MEDIA_TYPE in accept:
+        columns = await market_data.get_ohlc_columns(pair, interval, start=start, end=end)
+        body = {"pair": pair, "interval": interval, "columns": columns.to_column_dict()}
+        return Response(content=json.dumps(body, separators=(",", ":")), media_type=OHLC_COLUMNS_MEDIA_TYPE, headers=headers)
+
+    return await market_data.get_ohlc(pair, interval, start=start, end=end)
+
+
+@router.get("/indicators/{name}", response_model=IndicatorResponse)
+async def get_indicator(
+    name: str,
+    pair: str = Query(..., description="Trading pair, e.g. XBT/USD"),
+    interval: int = Query(1, description="Candle interval in minutes"),
+    period: Optional[int] = Query(None, description="Lookback for sma, ema, rsi and bollinger"),
+    fast: Optional[int] = Query(None, description="MACD fast EMA period"),
+    slow: Optional[int] = Query(None, description="MACD slow EMA period"),
+    signal: Optional[int] = Query(None, description="MACD signal EMA period"),
+    stddev: Optional[float] = Query(None, description="Bollinger band width in standard deviations"),
+    start: Optional[int] = Query(None, description="Only values at or after this Unix time"),
+    end: Optional[int] = Query(None, description="Only values at or before this Unix time"),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Compute a technical indicator (sma, ema, rsi, macd, bollinger) over cached OHLC closes
+
+    Omitted parameters use the usual defaults (period 20, RSI 14, MACD 12/26/9, 2 stddev).
+    """
+    params = {"period": period, "fast": fast, "slow": slow, "signal": signal, "stddev": stddev}
+    return await get_indicator_service().get_indicator(pair, interval, name.lower(), params, start=start, end=end)
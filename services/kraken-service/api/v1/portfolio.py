@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends, Query
+from app.schemas.trading_data import PortfolioResponse
+from app.schemas.user import UserResponse
+from services.trading_data_service import TradingDataService
+from api.deps import get_current_user, get_trading_data_service
+
+router = APIRouter()
+
+
+@router.get("/balances", response_model=PortfolioResponse)
+async def get_balances(
+    quote: str = Query("USD", description="Currency to value the portfolio in, e.g. USD, EUR, XBT"),
+    trading_data: TradingDataService = Depends(get_trading_data_service),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """Get every asset balance of the connected Kraken account, valued in `quote`"""
+    return await trading_data.get_portfolio(current_user.id, quote=quote.upper())
@@ -1,4 +1,4 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from config import settings
@@ -36,6 +36,11 @@ except ImportError:
     dashboard_router = APIRouter()
     admin_router = APIRouter()
 
+# Kraken service routers
+from api.v1 import market_data, portfolio, dead_letters
+from api.deps import require_admin
+from app.schemas.user import UserResponse
+
 logger = logging.getLogger(__name__)
 
 
@@ -49,6 +54,22 @@ async def lifespan(app: FastAPI):
     app.state.rabbitmq_consumer = None
     app.state.kafka_consumer = None
     
+    # Application-lifetime clients (Redis, Vault, Kraken HTTP transport, event publisher)
+    from app.utils.service_container import create_service_container
+    app.state.container = await create_service_container(kraken=True)
+    logger.info("✅ Service container initialized (Redis, Vault, Kraken HTTP transport, event publisher)")
+    
+    # Start Kraken WebSocket market-data ingester (public ticker/ohlc/book)
+    app.state.market_data_ingester = None
+    from app.config import settings as app_settings
+    if app_settings.KRAKEN_WS_ENABLED:
+        try:
+            from services.market_data_ingester import start_market_data_ingester
+            app.state.market_data_ingester = await start_market_data_ingester()
+            logger.info("✅ Kraken WebSocket market-data ingester started")
+        except Exception as e:
+            logger.warning(f"⚠️  Failed to start market-data ingester: {e}. Continuing with REST polling.")
+    
     # Start RabbitMQ consumer for bot result events
     logger.info("Initializing RabbitMQ consumer...")
     
@@ -89,7 +110,7 @@ async def lifespan(app: FastAPI):
     # Wrap entire Kafka initialization in timeout to ensure we don't block forever
     async def init_kafka():
         try:
-            from app.utils.kafka_consumer import get_kafka_consumer
+            from app.utils.kafka_consumer import Subscription, get_kafka_consumer
             from app.config import settings as app_settings
             from confluent_kafka import KafkaException
             
@@ -156,23 +177,44 @@ async def lifespan(app: FastAPI):
                         if 'db' in locals():
                             db.close()
                 
-                # Start consuming from Kafka topics (non-blocking)
-                topics = [
-                    (app_settings.KAFKA_USER_EVENTS_TOPIC, handle_user_created, "kraken-service", "user.created"),
-                    (app_settings.KAFKA_TRADING_EVENTS_TOPIC, handle_trade_executed, "kraken-service", "bot.trade.executed"),
-                    (app_settings.KAFKA_TRADING_EVENTS_TOPIC, handle_trade_skipped, "kraken-service", "bot.trade.skipped"),
+                async def handle_key_changed(event_type: str, message: dict):
+                    """Drop cached Vault secrets when a key is updated or disconnected on any worker"""
+                    from app.utils.vault_service import get_async_vault
+                    vault = get_async_vault()
+                    if vault is not None and message.get("user_id"):
+                        vault.invalidate_user(message["user_id"])
+                
+                # Every worker holds its own secret cache, so each needs its own consumer group.
+                # It is a broadcast group (latest offset, no commits): a restart starts with an
+                # empty cache, so replaying old key events would only waste work.
+                import socket
+                cache_group_id = f"kraken-service-secrets-{socket.gethostname()}-{os.getpid()}"
+                
+                # Start consuming from Kafka topics (non-blocking), one consumer per topic
+                subscriptions = [
+                    Subscription(app_settings.KAFKA_USER_EVENTS_TOPIC, "kraken-service", {
+                        "user.created": handle_user_created,
+                    }),
+                    Subscription(app_settings.KAFKA_TRADING_EVENTS_TOPIC, "kraken-service", {
+                        "bot.trade.executed": handle_trade_executed,
+                        "bot.trade.skipped": handle_trade_skipped,
+                    }),
+                    Subscription(app_settings.KAFKA_KRAKEN_EVENTS_TOPIC, cache_group_id, {
+                        "kraken.key.updated": handle_key_changed,
+                        "kraken.key.disconnected": handle_key_changed,
+                    }, broadcast=True),
                 ]
                 
                 try:
                     # Start consuming in background (non-blocking - creates tasks and returns immediately)
                     # Give it a small timeout just in case, but it should return instantly
                     try:
-                        await asyncio.wait_for(kafka_consumer.start_consuming(topics), timeout=1.0)
+                        await asyncio.wait_for(kafka_consumer.start_consuming(subscriptions), timeout=1.0)
                     except asyncio.TimeoutError:
                         # This shouldn't happen, but if it does, continue anyway
                         logger.warning("⚠️  Kafka consumer start_consuming timed out (unexpected). Continuing anyway.")
                     app.state.kafka_consumer = kafka_consumer
-                    logger.info("✅ Started Kafka consumers for user.created and trade events")
+                    logger.info("✅ Started Kafka consumers for user.created, trade and key events")
                 except Exception as e:
                     logger.warning(f"⚠️  Failed to start Kafka consumers: {e}. Continuing without Kafka.")
                     # Set consumer anyway so shutdown can handle it
@@ -194,6 +236,7 @@ async def lifespan(app: FastAPI):
     logger.info("✅ Kraken Service started successfully")
     logger.info(f"   - RabbitMQ Consumer: {'✅ Active' if app.state.rabbitmq_consumer else '⚠️  Not available'}")
     logger.info(f"   - Kafka Consumer: {'✅ Active' if app.state.kafka_consumer else '⚠️  Not available'}")
+    logger.info(f"   - Market Data Ingester: {'✅ Active' if app.state.market_data_ingester else '⚠️  Disabled'}")
     logger.info("=" * 70)
     
     # CRITICAL: Always yield to allow service to start, even if consumers failed
@@ -221,6 +264,20 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.warning(f"⚠️  Error during Kafka consumer shutdown: {e}")
     
+    if app.state.market_data_ingester is not None:
+        try:
+            from services.market_data_ingester import stop_market_data_ingester
+            await stop_market_data_ingester()
+            logger.info("✅ Market-data ingester stopped")
+        except Exception as e:
+            logger.warning(f"⚠️  Error stopping market-data ingester: {e}")
+    
+    try:
+        await app.state.container.close()
+        logger.info("✅ Service container closed")
+    except Exception as e:
+        logger.warning(f"⚠️  Error closing service container: {e}")
+    
     logger.info("✅ Kraken Service stopped")
 
 app = FastAPI(title="muckard - kraken service", lifespan=lifespan)
@@ -237,10 +294,19 @@ app.add_middleware(
 app.include_router(restapi_router, prefix="/kraken/api/v1/restapi", tags=["Kraken REST API"])
 app.include_router(kraken_router, prefix="/api/v1/kraken", tags=["Kraken Keys"])
 app.include_router(trading_router, prefix="/api/v1/trading", tags=["Trading Data"])
+app.include_router(market_data.router, prefix="/api/v1/trading", tags=["Market Data"])
+app.include_router(portfolio.router, prefix="/api/v1/trading", tags=["Portfolio"])
 app.include_router(bot_status_router, prefix="/api/v1/bot", tags=["Bot Status"])
 app.include_router(dashboard_router, prefix="/api/v1/dashboard", tags=["Dashboard"])
 app.include_router(admin_router, prefix="/api/v1/admin", tags=["Admin"])
+app.include_router(dead_letters.router, prefix="/api/v1/admin/dead-letters", tags=["Admin"])
 
 @app.get("/kraken", tags=["Health Check"])
 async def health_check():
     return {"status": "ok", "message": "Kraken service is running"}
+
+@app.get("/kraken/metrics", tags=["Admin"])
+async def service_metrics(current_user: UserResponse = Depends(require_admin)):
+    """In-process metrics (Kraken rate governor queue depth, wait times, ...); admin only"""
+    from app.utils.metrics import metrics
+    return metrics.snapshot()
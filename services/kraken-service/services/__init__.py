@@ -4,6 +4,11 @@
 __all__ = [
     'KrakenService',
     'TradingDataService',
+    'MarketDataService',
+    'MarketDataIngester',
+    'OHLCStore',
+    'OHLCColumns',
+    'IndicatorService',
     'BotStatusService',
     'RabbitMQConsumer',
     'get_consumer'
@@ -18,6 +23,21 @@ def __getattr__(name):
     elif name == 'TradingDataService':
         from .trading_data_service import TradingDataService
         return TradingDataService
+    elif name == 'MarketDataService':
+        from .market_data_service import MarketDataService
+        return MarketDataService
+    elif name == 'MarketDataIngester':
+        from .market_data_ingester import MarketDataIngester
+        return MarketDataIngester
+    elif name == 'OHLCStore':
+        from .ohlc_store import OHLCStore
+        return OHLCStore
+    elif name == 'OHLCColumns':
+        from .ohlc_columns import OHLCColumns
+        return OHLCColumns
+    elif name == 'IndicatorService':
+        from .indicator_service import IndicatorService
+        return IndicatorService
     elif name == 'BotStatusService':
         from .bot_status_service import BotStatusService
         return BotStatusService
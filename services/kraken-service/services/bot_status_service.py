@@ -4,7 +4,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../..'))
 from sqlalchemy.orm import Session
 from sqlalchemy import desc
 from fastapi import HTTPException, status
-from typing import List
+from typing import List, Optional
 import uuid
 import logging
 from datetime import datetime, timezone
@@ -93,11 +93,32 @@ class BotStatusService:
             event_type: Type of event (bot.started, bot.stopped, bot.trade.executed, bot.error)
             event_data: Event data dictionary
         """
+        trade_event = self.apply_event(event_type, event_data)
+        if trade_event is None:
+            return
+        
+        # Publish trade.executed event to Kafka
+        try:
+            event_publisher = await get_unified_event_publisher()
+            await event_publisher.publish("trade.executed", trade_event)
+            logger.info(f"Published trade.executed event for user {trade_event['user_id']}, trade {trade_event['trade_id']}")
+        except Exception as e:
+            logger.error(f"Failed to publish trade.executed event: {e}", exc_info=True)
+
+    def apply_event(self, event_type: str, event_data: dict) -> Optional[dict]:
+        """
+        Apply a bot event to the database
+        
+        Synchronous (database work only), so consumers can run it in a worker thread.
+        
+        Returns:
+            dict: trade.executed payload to publish, if the event created a trade
+        """
         try:
             user_id = uuid.UUID(event_data.get("user_id"))
         except (ValueError, TypeError):
             logger.error(f"Invalid user_id in event {event_type}: {event_data.get('user_id')}")
-            return
+            return None
 
         bot_status = self.db.query(BotStatus).filter(BotStatus.user_id == user_id).first()
         
@@ -105,6 +126,7 @@ class BotStatusService:
             bot_status = BotStatus(user_id=user_id, execution_status="idle")
             self.db.add(bot_status)
 
+        trade = None
         if event_type == "bot.started":
             bot_status.execution_status = "running"
             bot_status.last_execution_at = datetime.fromisoformat(event_data.get("started_at", datetime.now(timezone.utc).isoformat()).replace('Z', '+00:00'))
@@ -135,24 +157,6 @@ class BotStatusService:
             bot_status.last_execution_at = trade.executed_at
             bot_status.last_trade_count += 1
             
-            # Publish trade.executed event to Kafka
-            try:
-                event_publisher = await get_unified_event_publisher()
-                await event_publisher.publish("trade.executed", {
-                    "user_id": str(user_id),
-                    "trade_id": str(trade.id),
-                    "kraken_trade_id": event_data.get("trade_id", ""),
-                    "pair": event_data.get("pair", ""),
-                    "side": event_data.get("side", "buy"),
-                    "amount": float(event_data.get("amount", 0.0)),
-                    "price": float(event_data.get("price", 0.0)),
-                    "executed_at": trade.executed_at.isoformat(),
-                    "source": "bot"
-                })
-                logger.info(f"Published trade.executed event for user {user_id}, trade {trade.id}")
-            except Exception as e:
-                logger.error(f"Failed to publish trade.executed event: {e}", exc_info=True)
-            
             logger.info(f"Created trade record for user {user_id}, trade {trade.id}")
             
         elif event_type == "bot.trade.skipped":
@@ -167,6 +171,20 @@ class BotStatusService:
         bot_status.updated_at = datetime.now(timezone.utc)
         self.db.commit()
         self.db.refresh(bot_status)
+        
+        if trade is None:
+            return None
+        return {
+            "user_id": str(user_id),
+            "trade_id": str(trade.id),
+            "kraken_trade_id": event_data.get("trade_id", ""),
+            "pair": event_data.get("pair", ""),
+            "side": event_data.get("side", "buy"),
+            "amount": float(event_data.get("amount", 0.0)),
+            "price": float(event_data.get("price", 0.0)),
+            "executed_at": trade.executed_at.isoformat(),
+            "source": "bot"
+        }
 
     async def initialize_bot_status_for_user(self, user_id: uuid.UUID) -> None:
         """
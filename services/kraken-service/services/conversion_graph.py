@@ -0,0 +1,111 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../..'))
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from app.utils.kraken_client import normalize_asset
+
+# One conversion step: (canonical pair name, +1 to multiply by its price, -1 to divide)
+Step = Tuple[str, int]
+
+
+class ConversionRoutes:
+    """
+    Routes from every reachable asset to one quote currency, as index arrays
+
+    `indices[i, h]` is the position of step h's pair in `pairs` and
+    `exponents[i, h]` is +1/-1 (0 pads shorter routes), so the rate of every
+    asset is prod(prices[indices] ** exponents) along each row.
+    """
+
+    def __init__(self, quote: str, routes: Dict[str, List[Step]]):
+        self.quote = quote
+        self.assets = list(routes)
+        self.pairs = sorted({pair for route in routes.values() for pair, _ in route})
+        position = {pair: i for i, pair in enumerate(self.pairs)}
+        hops = max((len(route) for route in routes.values()), default=0)
+        self.indices = np.zeros((len(self.assets), hops), dtype=np.int64)
+        self.exponents = np.zeros((len(self.assets), hops), dtype=np.float64)
+        for i, asset in enumerate(self.assets):
+            for h, (pair, exponent) in enumerate(routes[asset]):
+                self.indices[i, h] = position[pair]
+                self.exponents[i, h] = exponent
+        self._row = {asset: i for i, asset in enumerate(self.assets)}
+
+    def pairs_for(self, assets: List[str]) -> List[str]:
+        """Pairs whose prices are needed to value `assets`"""
+        rows = [self._row[asset] for asset in assets if asset in self._row]
+        if not rows:
+            return []
+        used = np.unique(self.indices[rows][self.exponents[rows] != 0])
+        return [self.pairs[i] for i in used]
+
+    def rates(self, assets: List[str], prices: Dict[str, float]) -> np.ndarray:
+        """
+        Price of one unit of each asset in the quote currency (NaN if it cannot be valued)
+
+        Args:
+            assets: Asset codes (normalized, e.g. XBT)
+            prices: Last price per canonical pair name (missing pairs make routes through them NaN)
+        """
+        price_vector = np.array([prices.get(pair, np.nan) for pair in self.pairs], dtype=np.float64)
+        price_vector[price_vector <= 0] = np.nan
+        rows = np.array([self._row.get(asset, -1) for asset in assets], dtype=np.int64)
+        known = rows >= 0
+        rates = np.full(len(assets), np.nan)
+        if known.any():
+            # Padding steps have exponent 0 and contribute a factor of 1 (even NaN ** 0 == 1)
+            factors = price_vector[self.indices[rows[known]]] ** self.exponents[rows[known]]
+            rates[known] = factors.prod(axis=1)
+        return rates
+
+
+class ConversionGraph:
+    """
+    Asset conversion graph built from Kraken's AssetPairs metadata
+
+    Nodes are assets, every tradeable pair is an edge in both directions.
+    Routes to a quote currency are computed once (breadth-first, fewest hops)
+    and memoized, so valuing a portfolio only needs the prices of the pairs
+    on those routes.
+    """
+
+    def __init__(self, asset_pairs: Dict[str, dict]):
+        self.edges: Dict[str, List[Tuple[str, Step]]] = {}
+        for name, info in asset_pairs.items():
+            # Pairs without a wsname (e.g. dark pool ".d" pairs) are not priced by the ticker feed
+            if not info.get("wsname") or not info.get("base") or not info.get("quote"):
+                continue
+            base, quote = normalize_asset(info["base"]), normalize_asset(info["quote"])
+            self.edges.setdefault(base, []).append((quote, (name, 1)))
+            self.edges.setdefault(quote, []).append((base, (name, -1)))
+        self._routes: Dict[str, ConversionRoutes] = {}
+
+    def __contains__(self, asset: str) -> bool:
+        return asset in self.edges
+
+    def routes_to(self, quote: str) -> Optional[ConversionRoutes]:
+        """Routes from every connected asset to `quote` (None if `quote` is not traded)"""
+        quote = normalize_asset(quote)
+        if quote not in self.edges:
+            return None
+        routes = self._routes.get(quote)
+        if routes is None:
+            routes = ConversionRoutes(quote, self._search(quote))
+            self._routes[quote] = routes
+        return routes
+
+    def _search(self, quote: str) -> Dict[str, List[Step]]:
+        # Walk outwards from the quote; an asset's route is its step to the node it was reached from plus that node's route
+        paths: Dict[str, List[Step]] = {quote: []}
+        queue = deque([quote])
+        while queue:
+            node = queue.popleft()
+            for neighbour, (pair, exponent) in self.edges.get(node, ()):
+                if neighbour in paths:
+                    continue
+                # Converting neighbour -> node uses the same pair in the opposite direction
+                paths[neighbour] = [(pair, -exponent)] + paths[node]
+                queue.append(neighbour)
+        return paths
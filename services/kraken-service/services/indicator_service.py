@@ -0,0 +1,140 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../..'))
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import numpy as np
+from fastapi import HTTPException, status
+from app.schemas.trading_data import IndicatorResponse
+from services.indicators import INDICATORS, Indicator
+from services.ohlc_store import OHLCStore, get_ohlc_store
+
+logger = logging.getLogger(__name__)
+
+
+class _CachedIndicator:
+    """Indicator state and values for the closed candles of one series"""
+
+    __slots__ = ("indicator", "time", "values")
+
+    def __init__(self, indicator: Indicator):
+        self.indicator = indicator
+        self.time = np.empty(0, dtype=np.int64)
+        self.values: Dict[str, np.ndarray] = {output: np.empty(0) for output in indicator.outputs}
+
+    @property
+    def last_time(self) -> Optional[int]:
+        return int(self.time[-1]) if len(self.time) else None
+
+
+class IndicatorService:
+    """
+    Technical indicators computed server-side over the shared OHLC store
+
+    Results are cached per pair/interval/indicator/parameters. The cache holds the
+    indicator state after the last closed candle, so a refresh only feeds the
+    newly closed candles through `update` (O(1) each for EMA/RSI/MACD) and
+    evaluates the still-forming candle on a copy of that state.
+    """
+
+    MAX_CACHED = 512  # Indicator series kept in memory (least recently used evicted)
+
+    def __init__(self, ohlc_store: Optional[OHLCStore] = None):
+        self.ohlc_store = ohlc_store or get_ohlc_store()
+        self._cache: "OrderedDict[Tuple, _CachedIndicator]" = OrderedDict()
+
+    @staticmethod
+    def create(name: str, params: Dict[str, float]) -> Indicator:
+        """Instantiate an indicator, raising 400 for unknown names or bad parameters"""
+        cls = INDICATORS.get(name)
+        if cls is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown indicator '{name}'. Supported: {', '.join(sorted(INDICATORS))}"
+            )
+        try:
+            return cls(**{key: value for key, value in params.items() if key in cls.defaults and value is not None})
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    async def get_indicator(
+        self,
+        pair: str,
+        interval: int,
+        name: str,
+        params: Dict[str, float],
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> IndicatorResponse:
+        """Compute (or incrementally refresh) an indicator and return it for [start, end]"""
+        template = self.create(name, params)
+        key = (pair, interval, name, tuple(sorted(template.params.items())))
+        columns = (await self.ohlc_store.get_series(pair, interval)).columns
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+        closed = len(columns) - 1  # Kraken's last candle is still forming
+
+        # Reuse the cached state only if the series still contains its last closed candle
+        resume = 0
+        if cached is not None and cached.last_time is not None:
+            resume = int(np.searchsorted(columns.time, cached.last_time, side="left"))
+            if resume >= len(columns) or columns.time[resume] != cached.last_time:
+                cached = None
+            else:
+                resume += 1
+        if cached is None:
+            cached = _CachedIndicator(template)
+            self._cache[key] = cached
+            while len(self._cache) > self.MAX_CACHED:
+                self._cache.popitem(last=False)
+            resume = 0
+
+        if resume < closed:
+            new_time = columns.time[resume:closed]
+            if len(cached.time):
+                new_values = cached.indicator.extend(columns.close[resume:closed])
+            else:
+                new_values = cached.indicator.compute(columns.close[resume:closed])
+            # Drop values for candles that have left the series window
+            cut = int(np.searchsorted(cached.time, columns.time[0], side="left"))
+            cached.time = np.concatenate((cached.time[cut:], new_time))
+            for output in cached.indicator.outputs:
+                cached.values[output] = np.concatenate((cached.values[output][cut:], new_values[output]))
+
+        # Evaluate the forming candle without committing it to the cached state
+        times = cached.time
+        values = cached.values
+        if len(columns):
+            forming = cached.indicator.copy().update(float(columns.close[-1]))
+            times = np.append(times, columns.time[-1])
+            values = {o: np.append(values[o], forming[i]) for i, o in enumerate(cached.indicator.outputs)}
+
+        lo = int(np.searchsorted(times, start, side="left")) if start is not None else 0
+        hi = int(np.searchsorted(times, end, side="right")) if end is not None else len(times)
+        return IndicatorResponse(
+            pair=pair,
+            interval=interval,
+            indicator=name,
+            params=template.params,
+            time=times[lo:hi].tolist(),
+            values={
+                # NaN (not enough candles yet) is not valid JSON
+                output: [None if np.isnan(v) else v for v in values[output][lo:hi].tolist()]
+                for output in cached.indicator.outputs
+            },
+        )
+
+
+# Global service instance
+_indicator_service: Optional[IndicatorService] = None
+
+
+def get_indicator_service() -> IndicatorService:
+    """Get or create the process-wide indicator service (owns the indicator cache)"""
+    global _indicator_service
+    if _indicator_service is None:
+        _indicator_service = IndicatorService()
+    return _indicator_service
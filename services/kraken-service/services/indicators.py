@@ -0,0 +1,242 @@
+import copy
+import math
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Dict, Optional, Tuple, Type
+import numpy as np
+from scipy.signal import lfilter
+
+NAN = float("nan")
+
+
+class Indicator(ABC):
+    """
+    Streaming technical indicator over candle closes
+
+    `compute` processes a whole close array on a fresh indicator (vectorized where
+    the formula allows) and leaves it ready to continue; `update`/`extend` then
+    advance it candle by candle in O(1). Values are NaN until enough candles
+    have been seen.
+    """
+
+    name = ""
+    outputs: Tuple[str, ...] = ("value",)
+    defaults: Dict[str, float] = {}
+
+    def __init__(self, **params: float):
+        self.params = {key: params.get(key, default) for key, default in self.defaults.items()}
+        for key, value in self.params.items():
+            if value is None or value <= 0:
+                raise ValueError(f"{self.name}: {key} must be positive")
+
+    @abstractmethod
+    def update(self, close: float) -> Tuple[float, ...]:
+        """Advance by one closed candle; returns one value per output"""
+
+    def extend(self, close: np.ndarray) -> Dict[str, np.ndarray]:
+        """Feed closes through `update` in order; returns one array per output"""
+        values = np.array([self.update(x) for x in close.tolist()], dtype=np.float64).reshape(-1, len(self.outputs))
+        return {output: values[:, i] for i, output in enumerate(self.outputs)}
+
+    def compute(self, close: np.ndarray) -> Dict[str, np.ndarray]:
+        """Process a full close array on a fresh indicator"""
+        return self.extend(close)
+
+    def copy(self) -> "Indicator":
+        return copy.deepcopy(self)
+
+
+class _EMA:
+    """
+    Exponential moving average seeded with the SMA of the first `period` values
+
+    `alpha` defaults to 2 / (period + 1); Wilder smoothing uses 1 / period.
+    """
+
+    __slots__ = ("period", "alpha", "count", "total", "value")
+
+    def __init__(self, period: int, alpha: Optional[float] = None):
+        self.period = period
+        self.alpha = 2.0 / (period + 1) if alpha is None else alpha
+        self.count = 0
+        self.total = 0.0
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        self.count += 1
+        if self.count < self.period:
+            self.total += x
+        elif self.count == self.period:
+            self.value = (self.total + x) / self.period
+        else:
+            self.value += self.alpha * (x - self.value)
+        return self.value
+
+    def compute(self, x: np.ndarray) -> np.ndarray:
+        """`update` over a whole array on a fresh average, as one linear filter pass"""
+        values = np.full(len(x), NAN)
+        self.count = len(x)
+        if len(x) < self.period:
+            self.total = float(x.sum())
+            return values
+        seed = float(x[:self.period].mean())
+        values[self.period - 1] = seed
+        # y[t] = alpha * x[t] + (1 - alpha) * y[t-1], starting from the seed
+        decay = 1.0 - self.alpha
+        values[self.period:] = lfilter([self.alpha], [1.0, -decay], x[self.period:], zi=[decay * seed])[0]
+        self.value = float(values[-1])
+        return values
+
+
+class SMA(Indicator):
+    name = "sma"
+    defaults = {"period": 20}
+
+    def __init__(self, **params: float):
+        super().__init__(**params)
+        self.period = int(self.params["period"])
+        self.window: deque = deque(maxlen=self.period)
+        self.total = 0.0
+
+    def update(self, close: float) -> Tuple[float, ...]:
+        if len(self.window) == self.period:
+            self.total -= self.window[0]
+        self.window.append(close)
+        self.total += close
+        return (self.total / self.period if len(self.window) == self.period else NAN,)
+
+    def compute(self, close: np.ndarray) -> Dict[str, np.ndarray]:
+        value = np.full(len(close), NAN)
+        if len(close) >= self.period:
+            sums = np.cumsum(np.r_[0.0, close])
+            value[self.period - 1:] = (sums[self.period:] - sums[:-self.period]) / self.period
+        # Continue from the tail
+        for x in close[-self.period:].tolist():
+            self.update(x)
+        return {"value": value}
+
+
+class EMA(Indicator):
+    name = "ema"
+    defaults = {"period": 20}
+
+    def __init__(self, **params: float):
+        super().__init__(**params)
+        self.ema = _EMA(int(self.params["period"]))
+
+    def update(self, close: float) -> Tuple[float, ...]:
+        return (self.ema.update(close),)
+
+    def compute(self, close: np.ndarray) -> Dict[str, np.ndarray]:
+        return {"value": self.ema.compute(close)}
+
+
+def _rsi(avg_gain, avg_loss):
+    """RSI from the smoothed gains and losses (scalars or arrays)"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        value = 100.0 - 100.0 / (1.0 + np.divide(avg_gain, avg_loss))
+    flat = np.where(avg_gain > 0, 100.0, 50.0)
+    return np.where(avg_loss == 0, flat, value)
+
+
+class RSI(Indicator):
+    """Relative Strength Index with Wilder smoothing"""
+
+    name = "rsi"
+    defaults = {"period": 14}
+
+    def __init__(self, **params: float):
+        super().__init__(**params)
+        period = int(self.params["period"])
+        self.prev = None
+        self.gain = _EMA(period, alpha=1.0 / period)
+        self.loss = _EMA(period, alpha=1.0 / period)
+
+    def update(self, close: float) -> Tuple[float, ...]:
+        if self.prev is None:
+            self.prev = close
+            return (NAN,)
+        change = close - self.prev
+        self.prev = close
+        avg_gain = self.gain.update(max(change, 0.0))
+        avg_loss = self.loss.update(max(-change, 0.0))
+        if math.isnan(avg_gain):
+            return (NAN,)
+        return (float(_rsi(avg_gain, avg_loss)),)
+
+    def compute(self, close: np.ndarray) -> Dict[str, np.ndarray]:
+        value = np.full(len(close), NAN)
+        if len(close):
+            change = np.diff(close)
+            avg_gain = self.gain.compute(np.maximum(change, 0.0))
+            avg_loss = self.loss.compute(np.maximum(-change, 0.0))
+            value[1:] = np.where(np.isnan(avg_gain), NAN, _rsi(avg_gain, avg_loss))
+            self.prev = float(close[-1])
+        return {"value": value}
+
+
+class MACD(Indicator):
+    name = "macd"
+    outputs = ("macd", "signal", "histogram")
+    defaults = {"fast": 12, "slow": 26, "signal": 9}
+
+    def __init__(self, **params: float):
+        super().__init__(**params)
+        if self.params["fast"] >= self.params["slow"]:
+            raise ValueError("macd: fast must be shorter than slow")
+        self.fast = _EMA(int(self.params["fast"]))
+        self.slow = _EMA(int(self.params["slow"]))
+        self.signal = _EMA(int(self.params["signal"]))
+
+    def update(self, close: float) -> Tuple[float, ...]:
+        fast, slow = self.fast.update(close), self.slow.update(close)
+        if math.isnan(slow):
+            return (NAN, NAN, NAN)
+        line = fast - slow
+        signal = self.signal.update(line)
+        return (line, signal, line - signal)
+
+    def compute(self, close: np.ndarray) -> Dict[str, np.ndarray]:
+        line = self.fast.compute(close) - self.slow.compute(close)
+        signal = np.full(len(close), NAN)
+        # The signal average only sees the line once the slow average is seeded
+        start = self.slow.period - 1
+        if len(close) > start:
+            signal[start:] = self.signal.compute(line[start:])
+        return {"macd": line, "signal": signal, "histogram": line - signal}
+
+
+class Bollinger(Indicator):
+    name = "bollinger"
+    outputs = ("middle", "upper", "lower")
+    defaults = {"period": 20, "stddev": 2.0}
+
+    def __init__(self, **params: float):
+        super().__init__(**params)
+        self.period = int(self.params["period"])
+        self.k = float(self.params["stddev"])
+        self.window: deque = deque(maxlen=self.period)
+
+    def update(self, close: float) -> Tuple[float, ...]:
+        self.window.append(close)
+        if len(self.window) < self.period:
+            return (NAN, NAN, NAN)
+        # Population standard deviation, as charting platforms use
+        window = np.fromiter(self.window, dtype=np.float64, count=self.period)
+        middle, deviation = window.mean(), window.std()
+        return (middle, middle + self.k * deviation, middle - self.k * deviation)
+
+    def compute(self, close: np.ndarray) -> Dict[str, np.ndarray]:
+        middle = np.full(len(close), NAN)
+        deviation = np.full(len(close), NAN)
+        if len(close) >= self.period:
+            windows = np.lib.stride_tricks.sliding_window_view(close, self.period)
+            middle[self.period - 1:] = windows.mean(axis=1)
+            deviation[self.period - 1:] = windows.std(axis=1)
+        self.window.extend(close[-self.period:].tolist())
+        return {"middle": middle, "upper": middle + self.k * deviation, "lower": middle - self.k * deviation}
+
+
+INDICATORS: Dict[str, Type[Indicator]] = {
+    cls.name: cls for cls in (SMA, EMA, RSI, MACD, Bollinger)
+}
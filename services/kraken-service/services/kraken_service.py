@@ -9,11 +9,13 @@ import uuid
 import logging
 from app.models.kraken_key import KrakenKey
 from app.schemas.kraken import KrakenKeyCreate, KrakenKeyUpdate, KrakenKeyResponse, KrakenConnectionTest
-from app.utils.vault_service import VaultService
-from app.utils.kraken_client import KrakenClient
+from app.utils.vault_service import AsyncVaultService, get_async_vault
+from app.utils.async_redis_client import AsyncRedisClient, get_async_redis
+from app.utils.redis_client import user_tag
+from app.utils.kraken_client import KrakenClient, get_kraken_transport
 from app.utils.validators import validate_kraken_api_key, validate_kraken_api_secret
 from utils.rabbitmq_client import get_rabbitmq_client
-from app.utils.event_publisher import get_unified_event_publisher
+from app.utils.event_publisher import UnifiedEventPublisher, get_unified_event_publisher
 
 logger = logging.getLogger(__name__)
 
@@ -21,12 +23,17 @@ logger = logging.getLogger(__name__)
 class KrakenService:
     """Kraken Integration Agent - Service Layer"""
     
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        vault: Optional[AsyncVaultService] = None,
+        event_publisher: Optional[UnifiedEventPublisher] = None,
+        redis: Optional[AsyncRedisClient] = None
+    ):
         self.db = db
-        try:
-            self.vault = VaultService()
-        except ImportError:
-            self.vault = None  # Vault optional for development
+        self.redis = redis or get_async_redis()
+        self.vault = vault or get_async_vault()  # None when Vault is not configured (development)
+        self.event_publisher = event_publisher
 
     async def connect_key(self, user_id: uuid.UUID, key_data: KrakenKeyCreate) -> KrakenKeyResponse:
         """Store and validate Kraken API key"""
@@ -43,10 +50,12 @@ class KrakenService:
             )
 
         # Test connection
-        kraken_client = KrakenClient(key_data.api_key, key_data.api_secret)
+        kraken_client = KrakenClient(key_data.api_key, key_data.api_secret, transport=get_kraken_transport())
         permissions = None
         try:
             test_result = await kraken_client.test_connection()
+            if test_result.get("status") != "connected":
+                raise Exception(test_result.get("error", "Connection test failed"))
             permissions = await kraken_client.validate_permissions()
             
             # Ensure no withdrawal permissions
@@ -80,7 +89,7 @@ class KrakenService:
         vault_path = f"kraken/{user_id}/{key_data.key_name}"
         if self.vault:
             try:
-                self.vault.store_secret(vault_path, {
+                await self.vault.store_secret(vault_path, {
                     "api_key": key_data.api_key,
                     "api_secret": key_data.api_secret
                 })
@@ -107,7 +116,7 @@ class KrakenService:
         
         # Publish kraken.key.connected event to Kafka
         try:
-            event_publisher = await get_unified_event_publisher()
+            event_publisher = self.event_publisher or await get_unified_event_publisher()
             await event_publisher.publish("kraken.key.connected", {
                 "user_id": str(user_id),
                 "key_id": str(db_key.id),
@@ -159,7 +168,7 @@ class KrakenService:
         # Retrieve keys from Vault
         if self.vault:
             try:
-                secrets = self.vault.get_secret(key.key_name)
+                secrets = await self.vault.get_secret(key.key_name)
                 api_key = secrets["api_key"]
                 api_secret = secrets["api_secret"]
             except Exception as e:
@@ -174,7 +183,7 @@ class KrakenService:
             )
 
         # Test connection
-        kraken_client = KrakenClient(api_key, api_secret)
+        kraken_client = KrakenClient(api_key, api_secret, transport=get_kraken_transport())
         try:
             test_result = await kraken_client.test_connection()
             status_str = "connected" if test_result.get("status") == "connected" else "failed"
@@ -228,6 +237,8 @@ class KrakenService:
     async def update_key(self, key_id: str, user_id: uuid.UUID, key_data: KrakenKeyUpdate) -> KrakenKeyResponse:
         """Update key settings"""
         key = await self.get_key(key_id, user_id)
+        if self.vault:
+            self.vault.invalidate(key.key_name)
         
         updated_fields = []
         if key_data.key_name is not None:
@@ -241,10 +252,13 @@ class KrakenService:
         self.db.commit()
         self.db.refresh(key)
         
+        # Drop the user's cached balance etc. (tagged entries only, no keyspace scan)
+        await self.redis.invalidate_tag(user_tag(user_id))
+        
         # Publish kraken.key.updated event to Kafka
         if updated_fields:
             try:
-                event_publisher = await get_unified_event_publisher()
+                event_publisher = self.event_publisher or await get_unified_event_publisher()
                 await event_publisher.publish("kraken.key.updated", {
                     "user_id": str(user_id),
                     "key_id": str(key.id),
@@ -263,7 +277,7 @@ class KrakenService:
         
         # Publish kraken.key.disconnected event to Kafka before deletion
         try:
-            event_publisher = await get_unified_event_publisher()
+            event_publisher = self.event_publisher or await get_unified_event_publisher()
             await event_publisher.publish("kraken.key.disconnected", {
                 "user_id": str(user_id),
                 "key_id": str(key.id),
@@ -277,7 +291,7 @@ class KrakenService:
         # Delete from Vault
         if self.vault:
             try:
-                self.vault.delete_secret(key.key_name)
+                await self.vault.delete_secret(key.key_name)
             except Exception as e:
                 # Log error but continue with database deletion
                 logger.warning(f"Failed to delete key from Vault: {e}")
@@ -285,4 +299,6 @@ class KrakenService:
         # Delete from database
         self.db.delete(key)
         self.db.commit()
+        
+        await self.redis.invalidate_tag(user_tag(user_id))
 
@@ -0,0 +1,274 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../..'))
+import asyncio
+import json
+import logging
+import random
+import time
+from typing import Dict, Any, List, Optional
+import websockets
+from app.config import settings
+from app.utils.kraken_client import parse_ticker
+from app.utils.async_redis_client import AsyncRedisClient, get_async_redis
+from app.utils.stale_cache import wrap
+from services.market_data_service import MarketDataService
+
+logger = logging.getLogger(__name__)
+
+
+class MarketDataIngester:
+    """
+    Background subscriber to Kraken's public WebSocket (v1) market data
+
+    Subscribes to the ticker, ohlc and book channels for a configured pair set,
+    keeps the latest state in memory and periodically writes it to Redis under
+    the same keys MarketDataService reads, so every worker sees fresh data.
+    """
+
+    BOOK_KEY = "market:book:{pair}"
+    CANDLE_KEY = "market:candle:{pair}:{interval}"
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        pairs: Optional[List[str]] = None,
+        ohlc_interval: Optional[int] = None,
+        book_depth: Optional[int] = None,
+        redis: Optional[AsyncRedisClient] = None,
+        flush_interval: Optional[float] = None,
+    ):
+        self.url = url or settings.KRAKEN_WS_URL
+        self.pairs = pairs or settings.kraken_ws_pairs_list
+        self.ohlc_interval = ohlc_interval or settings.KRAKEN_WS_OHLC_INTERVAL
+        self.book_depth = book_depth or settings.KRAKEN_WS_BOOK_DEPTH
+        self.flush_interval = flush_interval or settings.KRAKEN_WS_FLUSH_INTERVAL
+        self._redis = redis
+
+        self.tickers: Dict[str, Dict[str, Any]] = {}
+        self.candles: Dict[str, Dict[str, Any]] = {}
+        self.books: Dict[str, Dict[str, Dict[float, float]]] = {}
+        self.updated_at: Dict[str, float] = {}
+        self._dirty: set = set()
+        self._market_data: Optional[MarketDataService] = None  # For the pair aliases
+
+        self.running = False
+        self.connected = False
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def redis(self) -> AsyncRedisClient:
+        if self._redis is None:
+            self._redis = get_async_redis()
+        return self._redis
+
+    async def start(self):
+        """Start the WebSocket and Redis flush loops in the background"""
+        if self.running:
+            logger.warning("Market data ingester is already running")
+            return
+        self.running = True
+        self._tasks = [
+            asyncio.create_task(self._run()),
+            asyncio.create_task(self._flush_loop()),
+        ]
+        logger.info(f"Market data ingester started for pairs {self.pairs}")
+
+    async def stop(self):
+        """Stop the ingester"""
+        self.running = False
+        for task in self._tasks:
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.connected = False
+        logger.info("Market data ingester stopped")
+
+    def get_ticker(self, pair: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Latest ticker for a pair, or None if not subscribed or older than max_age seconds"""
+        ticker = self.tickers.get(pair)
+        if ticker is None:
+            return None
+        max_age = max_age if max_age is not None else settings.KRAKEN_WS_MAX_STALENESS
+        if time.time() - self.updated_at.get(pair, 0) > max_age:
+            return None
+        return ticker
+
+    def get_book(self, pair: str) -> Optional[Dict[str, List[List[float]]]]:
+        """Top of the order book for a pair (asks ascending, bids descending)"""
+        book = self.books.get(pair)
+        if book is None:
+            return None
+        return {
+            "asks": [[price, volume] for price, volume in sorted(book["asks"].items())[:self.book_depth]],
+            "bids": [[price, volume] for price, volume in sorted(book["bids"].items(), reverse=True)[:self.book_depth]],
+        }
+
+    async def _run(self):
+        """Connect and consume with exponential backoff between reconnects"""
+        retry_delay = 1.0  # Start with 1 second delay
+        max_retry_delay = 60.0  # Max 60 seconds between retries
+
+        while self.running:
+            try:
+                async with websockets.connect(self.url, ping_interval=20, ping_timeout=20) as ws:
+                    await self._subscribe(ws)
+                    self.connected = True
+                    logger.info(f"Connected to Kraken WebSocket at {self.url}")
+                    async for raw in ws:
+                        retry_delay = 1.0  # Reset retry delay once data flows
+                        self.handle_message(json.loads(raw))
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.warning(f"Kraken WebSocket error: {e}. Reconnecting in {retry_delay:.1f}s...")
+            finally:
+                self.connected = False
+
+            if not self.running:
+                break
+            # Jitter avoids every worker reconnecting at the same instant
+            await asyncio.sleep(retry_delay * random.uniform(0.5, 1.0))
+            retry_delay = min(retry_delay * 2, max_retry_delay)  # Exponential backoff
+
+    async def _subscribe(self, ws):
+        """Subscribe to ticker, ohlc and book channels for all configured pairs"""
+        subscriptions = [
+            {"name": "ticker"},
+            {"name": "ohlc", "interval": self.ohlc_interval},
+            {"name": "book", "depth": self.book_depth},
+        ]
+        for subscription in subscriptions:
+            await ws.send(json.dumps({
+                "event": "subscribe",
+                "pair": self.pairs,
+                "subscription": subscription,
+            }))
+
+    def handle_message(self, message: Any):
+        """Apply one decoded WebSocket message to the in-memory state"""
+        if isinstance(message, dict):
+            event = message.get("event")
+            if event == "subscriptionStatus" and message.get("status") == "error":
+                logger.error(f"Kraken WebSocket subscription error: {message.get('errorMessage')}")
+            return
+
+        if not isinstance(message, list) or len(message) < 4:
+            return
+
+        channel_name, pair = message[-2], message[-1]
+        if channel_name == "ticker":
+            self._on_ticker(pair, message[1])
+        elif channel_name.startswith("ohlc"):
+            self._on_candle(pair, message[1])
+        elif channel_name.startswith("book"):
+            # Book updates may carry separate ask and bid dicts
+            for part in message[1:-2]:
+                self._on_book(pair, part)
+
+    def _touch(self, pair: str):
+        self.updated_at[pair] = time.time()
+        self._dirty.add(pair)
+
+    def _on_ticker(self, pair: str, raw: Dict[str, Any]):
+        self.tickers[pair] = parse_ticker(pair, raw)
+        self._touch(pair)
+
+    def _on_candle(self, pair: str, raw: List[Any]):
+        # [time, etime, open, high, low, close, vwap, volume, count]
+        self.candles[pair] = {
+            "time": int(float(raw[1])) - self.ohlc_interval * 60,
+            "open": float(raw[2]),
+            "high": float(raw[3]),
+            "low": float(raw[4]),
+            "close": float(raw[5]),
+            "volume": float(raw[7]),
+        }
+        self._touch(pair)
+
+    def _on_book(self, pair: str, raw: Dict[str, Any]):
+        book = self.books.setdefault(pair, {"asks": {}, "bids": {}})
+        if "as" in raw or "bs" in raw:
+            # Snapshot replaces the whole book
+            book["asks"] = {float(level[0]): float(level[1]) for level in raw.get("as", [])}
+            book["bids"] = {float(level[0]): float(level[1]) for level in raw.get("bs", [])}
+        for side_key, side in (("a", "asks"), ("b", "bids")):
+            for level in raw.get(side_key, []):
+                price, volume = float(level[0]), float(level[1])
+                if volume == 0:
+                    book[side].pop(price, None)
+                else:
+                    book[side][price] = volume
+        # Keep only the subscribed depth on each side
+        if len(book["asks"]) > self.book_depth:
+            book["asks"] = dict(sorted(book["asks"].items())[:self.book_depth])
+        if len(book["bids"]) > self.book_depth:
+            book["bids"] = dict(sorted(book["bids"].items(), reverse=True)[:self.book_depth])
+        self._touch(pair)
+
+    async def _flush_loop(self):
+        """Write changed pairs to Redis at most once per flush interval"""
+        while self.running:
+            try:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.warning(f"Failed to flush market data to Redis: {e}")
+
+    async def _pair_aliases(self) -> Dict[str, str]:
+        """Pair aliases, so tickers are stored under the canonical key MarketDataService reads"""
+        if self._market_data is None:
+            self._market_data = MarketDataService(ingester=self)
+        try:
+            return await self._market_data.get_pair_aliases()
+        except Exception as e:
+            logger.warning(f"Failed to load pair aliases, skipping ticker flush: {e}")
+            return {}
+
+    async def flush(self):
+        """Write the latest state of every changed pair to Redis (one pipelined round trip)"""
+        dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return
+        aliases = await self._pair_aliases() if dirty & self.tickers.keys() else {}
+        async with self.redis.pipeline() as batch:
+            for pair in dirty:
+                if pair in self.tickers and pair in aliases:
+                    batch.set(
+                        MarketDataService.TICKER_KEY.format(pair=aliases[pair]),
+                        wrap(self.tickers[pair], MarketDataService.TICKER_TTL),
+                        ttl=MarketDataService.TICKER_HARD_TTL,
+                    )
+                if pair in self.candles:
+                    batch.set(self.CANDLE_KEY.format(pair=pair, interval=self.ohlc_interval), self.candles[pair], ttl=MarketDataService.TICKER_TTL)
+                if pair in self.books:
+                    batch.set(self.BOOK_KEY.format(pair=pair), self.get_book(pair), ttl=MarketDataService.TICKER_TTL)
+
+
+# Global ingester instance
+_ingester: Optional[MarketDataIngester] = None
+
+
+def get_market_data_ingester() -> Optional[MarketDataIngester]:
+    """Get the running ingester (None unless started by the service lifespan)"""
+    return _ingester
+
+
+async def start_market_data_ingester() -> MarketDataIngester:
+    """Create and start the global ingester"""
+    global _ingester
+    if _ingester is None:
+        _ingester = MarketDataIngester()
+    await _ingester.start()
+    return _ingester
+
+
+async def stop_market_data_ingester():
+    """Stop the global ingester"""
+    global _ingester
+    if _ingester is not None:
+        await _ingester.stop()
+        _ingester = None
@@ -0,0 +1,275 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../..'))
+import logging
+import time
+from typing import Dict, List, Optional
+from fastapi import HTTPException, status
+from app.schemas.trading_data import TradingDataResponse, OHLCResponse, TradingPairsResponse, TickerData
+from app.utils.kraken_client import KrakenClient, get_kraken_transport
+from app.utils.tiered_cache import TieredCache, get_tiered_cache
+from app.utils.redis_client import pair_tag
+from app.utils.metrics import metrics
+from app.utils.single_flight import get_single_flight
+from app.utils.stale_cache import get_stale_cache, unwrap, wrap
+from services.conversion_graph import ConversionGraph
+from services.ohlc_columns import OHLCColumns
+from services.ohlc_store import get_ohlc_store
+
+logger = logging.getLogger(__name__)
+
+
+class MarketDataService:
+    """
+    Public market data (ticker, OHLC, asset pairs) shared by all users
+
+    These are public Kraken endpoints, so data is fetched once per pair for the
+    whole deployment and cached under global keys - no Vault or DB lookup needed.
+    """
+
+    TICKER_KEY = "market:ticker:{pair}"  # Canonical pair name (e.g. XXBTZUSD)
+    PAIRS_KEY = "trading_pairs:all"
+    ASSET_PAIRS_KEY = "market:asset_pairs"
+
+    # Soft TTL: served without a refresh. Hard TTL: served stale while refreshing in the background
+    TICKER_TTL = 30  # 30 seconds
+    TICKER_HARD_TTL = 120  # 2 minutes
+    PAIRS_TTL = 3600  # 1 hour
+    PAIRS_HARD_TTL = 86400  # 1 day
+
+    # Pair name aliases (wsname/altname/canonical -> canonical), shared by all instances
+    _aliases: Dict[str, str] = {}
+    _ws_names: Dict[str, str] = {}  # Canonical -> wsname, the ingester's spelling
+    _aliases_loaded_at: float = 0.0
+    # Asset conversion graph (routes memoized per quote currency), shared by all instances
+    _graph: Optional[ConversionGraph] = None
+    _graph_loaded_at: float = 0.0
+
+    def __init__(self, cache: Optional[TieredCache] = None, ingester=None):
+        self.cache = cache or get_tiered_cache()  # In-process LRU in front of Redis
+        self.single_flight = get_single_flight()
+        self.stale_cache = get_stale_cache()
+        self.kraken = KrakenClient(transport=get_kraken_transport())
+        self.ohlc_store = get_ohlc_store()
+        if ingester is None:
+            # Imported here: the ingester module imports this one for its cache keys
+            try:
+                from services.market_data_ingester import get_market_data_ingester
+                ingester = get_market_data_ingester()
+            except ImportError:
+                ingester = None  # websockets not installed
+        self.ingester = ingester
+
+    async def _cached_fetch(
+        self,
+        cache_key: str,
+        fetch,
+        soft_ttl: int,
+        hard_ttl: int,
+        name: str,
+        tags: Optional[List[str]] = None,
+        l1_ttl: Optional[float] = None,
+    ):
+        """Return the cached value, refreshing it in the background once stale (single-flight)"""
+        return await self.stale_cache.get(
+            self.cache, cache_key, fetch, soft_ttl, hard_ttl, tags=tags, name=name, l1_ttl=l1_ttl
+        )
+
+    def _ingester_ticker(self, canonical: str) -> Optional[dict]:
+        """Fresh ticker from the WebSocket ingester, which keys pairs by wsname"""
+        if self.ingester is None:
+            return None
+        return self.ingester.get_ticker(self._ws_names.get(canonical, canonical))
+
+    async def get_ticker_raw(self, pair: str) -> dict:
+        """Get the flat ticker dict for a pair (see kraken_client.parse_ticker)"""
+        canonical = await self.resolve_pair(pair)
+        # Prefer the WebSocket ingester's in-memory state (sub-second freshness)
+        ticker = self._ingester_ticker(canonical)
+        if ticker is not None:
+            return ticker
+
+        cache_key = self.TICKER_KEY.format(pair=canonical)
+        return await self._cached_fetch(
+            cache_key,
+            lambda: self.kraken.get_ticker(canonical),
+            self.TICKER_TTL,
+            self.TICKER_HARD_TTL,
+            "ticker",
+            tags=[pair_tag(canonical)],
+        )
+
+    @staticmethod
+    def _to_ticker_data(pair: str, ticker: dict) -> TickerData:
+        return TickerData(
+            pair=pair,
+            ask=ticker.get("ask", 0.0),
+            bid=ticker.get("bid", 0.0),
+            last=ticker.get("last", 0.0),
+            volume=ticker.get("volume", 0.0),
+            high=ticker.get("high", 0.0),
+            low=ticker.get("low", 0.0)
+        )
+
+    async def get_ticker(self, pair: str) -> TickerData:
+        """Get ticker data"""
+        ticker = await self.get_ticker_raw(pair)
+        return self._to_ticker_data(pair, ticker)
+
+    async def get_asset_pairs(self) -> Dict[str, dict]:
+        """Get Kraken asset pair metadata keyed by canonical pair name"""
+        return await self._cached_fetch(
+            self.ASSET_PAIRS_KEY, self.kraken.get_asset_pairs, self.PAIRS_TTL, self.PAIRS_HARD_TTL, "asset_pairs", l1_ttl=self.PAIRS_TTL
+        )
+
+    async def get_pair_aliases(self) -> Dict[str, str]:
+        """Map every accepted pair spelling (wsname, altname, canonical) to the canonical name"""
+        cls = type(self)
+        if cls._aliases and time.monotonic() - cls._aliases_loaded_at < self.PAIRS_TTL:
+            return cls._aliases
+
+        aliases = {}
+        ws_names = {}
+        for canonical, info in (await self.get_asset_pairs()).items():
+            aliases[canonical] = canonical
+            for name in (info.get("altname"), info.get("wsname")):
+                if name:
+                    aliases[name] = canonical
+            if info.get("wsname"):
+                ws_names[canonical] = info["wsname"]
+        cls._aliases = aliases
+        cls._ws_names = ws_names
+        cls._aliases_loaded_at = time.monotonic()
+        return aliases
+
+    async def resolve_pair(self, pair: str) -> str:
+        """Canonical name for any accepted spelling of a pair; 400 for unknown pairs"""
+        canonical = (await self.get_pair_aliases()).get(pair)
+        if canonical is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown trading pair: {pair}"
+            )
+        return canonical
+
+    async def get_conversion_graph(self) -> ConversionGraph:
+        """Asset conversion graph over all tradeable pairs, rebuilt when the pair metadata is refreshed"""
+        cls = type(self)
+        if cls._graph is None or time.monotonic() - cls._graph_loaded_at >= self.PAIRS_TTL:
+            cls._graph = ConversionGraph(await self.get_asset_pairs())
+            cls._graph_loaded_at = time.monotonic()
+        return cls._graph
+
+    async def get_prices(self, pairs: List[str]) -> Dict[str, float]:
+        """Last price per pair, from the same cached tickers as get_tickers"""
+        if not pairs:
+            return {}
+        return {ticker.pair: ticker.last for ticker in await self.get_tickers(pairs)}
+
+    async def get_tickers(self, pairs: List[str]) -> List[TickerData]:
+        """
+        Get tickers for several pairs with at most one Redis and one Kraken round trip
+
+        Pairs are resolved to their canonical names first (400 for unknown pairs).
+        Fresh ingester state is used first, then a single MGET for the rest,
+        and the remaining misses are fetched with one comma-separated Ticker call.
+        """
+        pairs = list(dict.fromkeys(pairs))  # De-duplicate, keep order
+        aliases = await self.get_pair_aliases()
+        unknown = [pair for pair in pairs if pair not in aliases]
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown trading pair(s): {', '.join(unknown)}"
+            )
+        names = list(dict.fromkeys(aliases[pair] for pair in pairs))
+        tickers: Dict[str, dict] = {}  # By canonical name
+
+        for name in names:
+            ticker = self._ingester_ticker(name)
+            if ticker is not None:
+                tickers[name] = ticker
+
+        pending = [name for name in names if name not in tickers]
+        cached = await self.cache.mget([self.TICKER_KEY.format(pair=name) for name in pending])
+        stale = []
+        for name, entry in zip(pending, cached):
+            ticker, is_stale = unwrap(entry)
+            if ticker:
+                tickers[name] = ticker
+                if is_stale:
+                    stale.append(name)
+
+        if stale:
+            # Serve the stale tickers now and refresh them with one background Ticker call
+            metrics.incr("cache_stale_served_total", len(stale), cache="ticker")
+            stale_key = "market:tickers:" + ",".join(sorted(stale))
+            self.stale_cache.refresh_in_background(
+                stale_key,
+                lambda: self.single_flight.do(stale_key, lambda: self._fetch_tickers(stale), distributed=False),
+            )
+
+        misses = [name for name in names if name not in tickers]
+        if misses:
+            metrics.incr("cache_blocking_refresh_total", len(misses), cache="ticker")
+            batch_key = "market:tickers:" + ",".join(sorted(misses))
+            tickers.update(
+                await self.single_flight.do(batch_key, lambda: self._fetch_tickers(misses), distributed=False)
+            )
+
+        return [self._to_ticker_data(pair, tickers[aliases[pair]]) for pair in pairs if aliases[pair] in tickers]
+
+    async def _fetch_tickers(self, names: List[str]) -> Dict[str, dict]:
+        """Fetch tickers for canonical `names` with one Kraken call and cache them with one Redis round trip"""
+        by_canonical = await self.kraken.get_tickers(names)
+        fetched = {name: by_canonical[name] for name in names if name in by_canonical}
+        keys = {name: self.TICKER_KEY.format(pair=name) for name in fetched}
+        await self.cache.mset_with_ttl(
+            {keys[name]: wrap(ticker, self.TICKER_TTL) for name, ticker in fetched.items()},
+            ttl=self.TICKER_HARD_TTL,
+            tags={keys[name]: [pair_tag(name)] for name in fetched},
+        )
+        return fetched
+
+    async def get_live_data(self, pair: str) -> TradingDataResponse:
+        """Get live trading data (derived from the shared ticker)"""
+        ticker = await self.get_ticker_raw(pair)
+        return TradingDataResponse(
+            pair=pair,
+            price=ticker.get("price", 0.0),
+            volume=ticker.get("volume", 0.0),
+            timestamp=int(ticker.get("timestamp", 0)),
+            data=ticker
+        )
+
+    async def get_ohlc_columns(
+        self,
+        pair: str,
+        interval: int,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> OHLCColumns:
+        """Get OHLC data as columnar arrays, optionally limited to [start, end]"""
+        return await self.ohlc_store.get_range(pair, interval, start=start, end=end)
+
+    async def get_ohlc(
+        self,
+        pair: str,
+        interval: int,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> OHLCResponse:
+        """Get OHLC data from the incremental store, optionally limited to [start, end]"""
+        columns = await self.get_ohlc_columns(pair, interval, start=start, end=end)
+        return OHLCResponse(pair=pair, interval=interval, data=columns.to_records())
+
+    async def get_available_pairs(self) -> TradingPairsResponse:
+        """Get available trading pairs"""
+
+        async def fetch() -> dict:
+            pairs = await self.kraken.get_trading_pairs()
+            return TradingPairsResponse(pairs=pairs).model_dump()
+
+        # Read on every page load and rarely changes: keep it in-process for as long as Redis does
+        data = await self._cached_fetch(self.PAIRS_KEY, fetch, self.PAIRS_TTL, self.PAIRS_HARD_TTL, "trading_pairs", l1_ttl=self.PAIRS_TTL)
+        return TradingPairsResponse(**data)
@@ -0,0 +1,137 @@
+import struct
+from typing import Any, Dict, List, Optional
+import numpy as np
+
+# Column order matches Kraken's OHLC rows: [time, open, high, low, close, vwap, volume, count]
+FIELDS = ("time", "open", "high", "low", "close", "vwap", "volume", "count")
+INT_FIELDS = ("time", "count")
+
+# Binary encoding: header followed by one little-endian 8-byte column per field
+BINARY_MAGIC = b"OHLC"
+BINARY_VERSION = 1
+_BINARY_HEADER = struct.Struct("<4sHHI")  # magic, version, field count, row count
+
+
+class OHLCColumns:
+    """
+    Columnar candle storage: one contiguous array per field
+
+    time and count are int64, prices and volumes float64. Slicing returns views,
+    so range queries do not copy the underlying data.
+    """
+
+    __slots__ = FIELDS
+
+    def __init__(self, **columns: np.ndarray):
+        for field in FIELDS:
+            dtype = np.int64 if field in INT_FIELDS else np.float64
+            setattr(self, field, np.asarray(columns.get(field, ()), dtype=dtype))
+
+    @classmethod
+    def empty(cls) -> "OHLCColumns":
+        return cls()
+
+    @classmethod
+    def from_rows(cls, rows: List[List[Any]]) -> "OHLCColumns":
+        """Build from Kraken-style rows"""
+        if not rows:
+            return cls.empty()
+        matrix = np.asarray(rows, dtype=np.float64)
+        return cls(**{field: matrix[:, i] for i, field in enumerate(FIELDS)})
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def __getitem__(self, index: slice) -> "OHLCColumns":
+        return OHLCColumns(**{field: getattr(self, field)[index] for field in FIELDS})
+
+    @staticmethod
+    def concat(first: "OHLCColumns", second: "OHLCColumns") -> "OHLCColumns":
+        return OHLCColumns(**{
+            field: np.concatenate((getattr(first, field), getattr(second, field)))
+            for field in FIELDS
+        })
+
+    def range(self, start: Optional[int] = None, end: Optional[int] = None, limit: Optional[int] = None) -> "OHLCColumns":
+        """Candles with start <= time <= end (most recent `limit` if given)"""
+        lo = int(np.searchsorted(self.time, start, side="left")) if start is not None else 0
+        hi = int(np.searchsorted(self.time, end, side="right")) if end is not None else len(self)
+        if limit is not None:
+            lo = max(lo, hi - limit)
+        return self[lo:hi]
+
+    def resample(self, interval: int) -> "OHLCColumns":
+        """
+        Aggregate into `interval`-minute candles aligned to the epoch (as Kraken does)
+
+        Rows must be sorted by time. A bucket that is only partly covered yields a
+        partial candle, so callers should start the input on a bucket boundary.
+        """
+        if not len(self):
+            return OHLCColumns.empty()
+        seconds = interval * 60
+        buckets = self.time - self.time % seconds
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(self)] - 1
+
+        volume = np.add.reduceat(self.volume, starts)
+        turnover = np.add.reduceat(self.vwap * self.volume, starts)
+        close = self.close[ends]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vwap = np.where(volume > 0, turnover / volume, close)
+
+        return OHLCColumns(
+            time=buckets[starts],
+            open=self.open[starts],
+            high=np.maximum.reduceat(self.high, starts),
+            low=np.minimum.reduceat(self.low, starts),
+            close=close,
+            vwap=vwap,
+            volume=volume,
+            count=np.add.reduceat(self.count, starts),
+        )
+
+    def to_rows(self) -> List[List[Any]]:
+        """Kraken-style rows (inverse of from_rows)"""
+        return [list(row) for row in zip(*(getattr(self, field).tolist() for field in FIELDS))]
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Row-oriented dicts in the OHLCData shape"""
+        columns = [self.time.tolist(), self.open.tolist(), self.high.tolist(),
+                   self.low.tolist(), self.close.tolist(), self.volume.tolist()]
+        return [
+            {"time": t, "open": o, "high": h, "low": l, "close": c, "volume": v}
+            for t, o, h, l, c, v in zip(*columns)
+        ]
+
+    def to_column_dict(self) -> Dict[str, List[Any]]:
+        """Column-oriented lists (one JSON array per field)"""
+        return {field: getattr(self, field).tolist() for field in FIELDS}
+
+    def to_bytes(self) -> bytes:
+        """
+        Compact binary encoding
+
+        Layout: 12-byte header (b"OHLC", uint16 version, uint16 field count,
+        uint32 row count), then each field in FIELDS order as a little-endian
+        int64/float64 array of row-count elements.
+        """
+        parts = [_BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, len(FIELDS), len(self))]
+        for field in FIELDS:
+            dtype = "<i8" if field in INT_FIELDS else "<f8"
+            parts.append(getattr(self, field).astype(dtype, copy=False).tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "OHLCColumns":
+        """Decode the binary encoding produced by to_bytes"""
+        magic, version, field_count, rows = _BINARY_HEADER.unpack_from(payload)
+        if magic != BINARY_MAGIC or version != BINARY_VERSION or field_count != len(FIELDS):
+            raise ValueError("Unsupported OHLC binary payload")
+        offset = _BINARY_HEADER.size
+        columns = {}
+        for field in FIELDS:
+            dtype = "<i8" if field in INT_FIELDS else "<f8"
+            columns[field] = np.frombuffer(payload, dtype=dtype, count=rows, offset=offset)
+            offset += rows * 8
+        return cls(**columns)
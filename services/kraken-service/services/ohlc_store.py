@@ -0,0 +1,324 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../..'))
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+import numpy as np
+from fastapi import HTTPException, status
+from app.config import settings
+from app.utils.kraken_client import OHLC_INTERVALS, KrakenClient, get_kraken_transport
+from app.utils.async_redis_client import AsyncRedisClient, get_async_redis
+from app.utils.single_flight import get_single_flight
+from services.ohlc_columns import OHLCColumns
+
+logger = logging.getLogger(__name__)
+
+# Row layout: [time, open, high, low, close, vwap, volume, count]
+Row = List[float]
+
+
+class OHLCSeries:
+    """Rolling window of candles for one pair/interval, stored column-wise and sorted by time"""
+
+    def __init__(self, pair: str, interval: int, window: int):
+        self.pair = pair
+        self.interval = interval
+        self.window = window
+        self.columns = OHLCColumns.empty()
+        self.last: Optional[int] = None  # Kraken `since` cursor
+        self.synced_at: float = 0.0
+        # Resampled series only: the closed base candles already folded into the newest
+        # candle, aggregated into one row, and the time of the last of them
+        self.carry = OHLCColumns.empty()
+        self.carry_through: Optional[int] = None
+
+    def __len__(self) -> int:
+        return len(self.columns)
+
+    @property
+    def last_time(self) -> Optional[int]:
+        return int(self.columns.time[-1]) if len(self.columns) else None
+
+    def merge(self, rows: List[Row]) -> None:
+        """
+        Merge newer candles into the series
+
+        Kraken always returns the still-forming candle last, so existing rows from the
+        first new timestamp onwards are replaced rather than duplicated.
+        """
+        self.merge_columns(OHLCColumns.from_rows(rows))
+
+    def merge_columns(self, new: OHLCColumns) -> None:
+        """Merge newer candles that are already in columnar form"""
+        if not len(new):
+            return
+        cut = int(np.searchsorted(self.columns.time, new.time[0], side="left"))
+        merged = OHLCColumns.concat(self.columns[:cut], new)
+        self.columns = merged[-self.window:] if len(merged) > self.window else merged
+
+    def slice(self, start: Optional[int] = None, end: Optional[int] = None, limit: Optional[int] = None) -> OHLCColumns:
+        """Candles with start <= time <= end (most recent `limit` if given)"""
+        return self.columns.range(start, end, limit)
+
+
+class OHLCStore:
+    """
+    Incremental OHLC store shared by all users
+
+    One series per pair/interval. Upstream refreshes only fetch candles after the
+    stored `since` cursor; the series is persisted in a Redis sorted set (score =
+    candle time) so other workers and restarts pick up where the last sync left off.
+
+    Only the base interval (1 minute by default) is refreshed from Kraken. The
+    resampled intervals are seeded with native history once, then extended by
+    aggregating base candles, so every timeframe agrees with the base series.
+    Buckets longer than the base window (e.g. daily candles over a 12 hour
+    window) are continued from the carried aggregate of the base candles they
+    already contain.
+
+    Pairs are resolved to their canonical names and intervals validated before
+    anything is fetched, and a series is only kept once its first sync succeeded; at most MAX_SERIES series are held
+    in memory (least recently used evicted).
+    """
+
+    MAX_SERIES = 1024
+
+    SERIES_KEY = "ohlc:series:{pair}:{interval}"
+    CURSOR_KEY = "ohlc:cursor:{pair}:{interval}"  # Hash: last, synced_at
+
+    def __init__(
+        self,
+        redis: Optional[AsyncRedisClient] = None,
+        window: Optional[int] = None,
+        refresh_interval: Optional[float] = None,
+        base_interval: Optional[int] = None,
+        resampled_intervals: Optional[List[int]] = None,
+    ):
+        self._redis = redis
+        self.window = window or settings.KRAKEN_OHLC_WINDOW
+        self.refresh_interval = refresh_interval or settings.KRAKEN_OHLC_REFRESH_INTERVAL
+        self.base_interval = base_interval or settings.KRAKEN_OHLC_BASE_INTERVAL
+        self.resampled_intervals = set(resampled_intervals or settings.kraken_ohlc_resampled_intervals_list)
+        self.resampled_intervals.discard(self.base_interval)
+        self.single_flight = get_single_flight()
+        self.kraken = KrakenClient(transport=get_kraken_transport())
+        self._series: "OrderedDict[Tuple[str, int], OHLCSeries]" = OrderedDict()
+        self._market_data = None  # MarketDataService, for the pair aliases
+
+    @property
+    def redis(self) -> AsyncRedisClient:
+        if self._redis is None:
+            self._redis = get_async_redis()
+        return self._redis
+
+    def is_resampled(self, interval: int) -> bool:
+        return interval in self.resampled_intervals and interval % self.base_interval == 0
+
+    async def get_series(self, pair: str, interval: int) -> OHLCSeries:
+        """Return the series, syncing it first if it is older than the refresh interval"""
+        series = self._series.get((pair, interval))
+        if series is None:
+            pair = await self._resolve(pair, interval)
+            series = self._series.get((pair, interval))
+            if series is None:
+                key = self.SERIES_KEY.format(pair=pair, interval=interval)
+                return await self.single_flight.do(key + ":seed", lambda: self._seed(pair, interval), distributed=False)
+
+        self._series.move_to_end((series.pair, interval))
+        if time.time() - series.synced_at >= self.refresh_interval:
+            key = self.SERIES_KEY.format(pair=series.pair, interval=interval)
+            await self.single_flight.do(key, lambda: self._sync_series(series), distributed=False)
+        return series
+
+    async def _resolve(self, pair: str, interval: int) -> str:
+        """Canonical pair name; raises 400 for intervals or pairs Kraken does not serve"""
+        if interval not in OHLC_INTERVALS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unsupported interval {interval}. Supported: {', '.join(map(str, OHLC_INTERVALS))}"
+            )
+        if self._market_data is None:
+            # Imported here: market_data_service imports this module
+            from services.market_data_service import MarketDataService
+            self._market_data = MarketDataService()
+        return await self._market_data.resolve_pair(pair)
+
+    async def _seed(self, pair: str, interval: int) -> OHLCSeries:
+        """Build and sync a new series; it is registered only if the sync succeeds"""
+        series = OHLCSeries(pair, interval, self.window)
+        await self._sync_series(series)
+        self._series[(pair, interval)] = series
+        while len(self._series) > self.MAX_SERIES:
+            self._series.popitem(last=False)
+        return series
+
+    async def _sync_series(self, series: OHLCSeries) -> None:
+        sync = self._sync_resampled if self.is_resampled(series.interval) else self._sync
+        await sync(series)
+
+    async def get_range(
+        self,
+        pair: str,
+        interval: int,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> OHLCColumns:
+        """Candles for a time range, served by slicing the stored series"""
+        series = await self.get_series(pair, interval)
+        return series.slice(start, end, limit)
+
+    async def _sync(self, series: OHLCSeries) -> None:
+        """Bring the series up to date from Redis and, if needed, from Kraken"""
+        if await self._load(series):
+            return
+
+        # Fetch only candles after the cursor
+        try:
+            ohlc = await self.kraken.get_ohlc(series.pair, series.interval, since=series.last)
+        except Exception as e:
+            if not len(series):
+                raise
+            # Serve the candles we already have rather than failing the request
+            logger.warning(f"OHLC refresh for {series.pair}/{series.interval} failed, serving stored series: {e}")
+            series.synced_at = time.time()  # Back off until the next refresh interval
+            return
+        rows = ohlc.get("rows", [])
+        series.merge(rows)
+        series.last = ohlc.get("last") or series.last
+        series.synced_at = time.time()
+        await self._persist(series, rows)
+
+    async def _sync_resampled(self, series: OHLCSeries) -> None:
+        """Extend a derived series by resampling base candles, without an upstream call"""
+        if await self._load(series):
+            return
+
+        base = await self.get_series(series.pair, self.base_interval)
+        if len(series) and len(base) and base.columns.time[0] <= series.last_time:
+            # The base window reaches the start of the newest candle: rebuild it from there
+            source = base.columns.range(start=series.last_time)
+        elif len(base) and series.carry_through is not None and base.columns.time[0] <= series.carry_through:
+            # Continue the newest candle from the base candles it already contains
+            source = OHLCColumns.concat(series.carry, base.columns.range(start=series.carry_through + 1))
+        else:
+            # Seed (or re-seed after a gap) with native history
+            await self._sync(series)
+            self._carry_native(series, base)
+            await self._persist_carry(series)
+            return
+
+        derived = source.resample(series.interval)
+        series.merge_columns(derived)
+        self._carry_base(series, base)
+        series.synced_at = time.time()
+        await self._persist(series, derived.to_rows())
+
+    def _carry_base(self, series: OHLCSeries, base: OHLCSeries) -> None:
+        """Aggregate the closed base candles of the newest candle (the forming one is left out)"""
+        newest = series.last_time
+        closed = base.columns[:-1]
+        if len(closed) and closed.time[0] <= newest:
+            carried = closed.range(start=newest)
+        elif series.carry_through is not None and series.carry_through >= newest:
+            carried = OHLCColumns.concat(series.carry, closed.range(start=series.carry_through + 1))
+        else:
+            carried = OHLCColumns.empty()
+        if not len(carried):
+            series.carry, series.carry_through = OHLCColumns.empty(), None
+            return
+        series.carry = carried.resample(series.interval)
+        series.carry_through = max(int(closed.time[-1]) if len(closed) else 0, series.carry_through or 0)
+
+    def _carry_native(self, series: OHLCSeries, base: OHLCSeries) -> None:
+        """
+        Carry a natively fetched newest candle
+
+        It already holds the trades up to the base candle forming at fetch time, so that
+        candle counts as carried; its remaining trades are missed (at most one base interval).
+        """
+        if not len(series) or not len(base) or base.last_time < series.last_time:
+            series.carry, series.carry_through = OHLCColumns.empty(), None
+        elif base.columns.time[0] <= series.last_time:
+            self._carry_base(series, base)
+        else:
+            series.carry, series.carry_through = series.columns[-1:], base.last_time
+
+    @staticmethod
+    def _carry_fields(series: OHLCSeries) -> dict:
+        """Cursor hash fields holding the carried aggregate (empty when there is none)"""
+        if series.carry_through is None:
+            return {"carry": "", "carry_through": 0}
+        carry = json.dumps(series.carry.to_rows()[0], separators=(",", ":"))
+        return {"carry": carry, "carry_through": series.carry_through}
+
+    async def _load(self, series: OHLCSeries) -> bool:
+        """Merge rows another worker stored in Redis; True if that sync is still fresh"""
+        if not self.redis.connected:
+            return False
+        series_key = self.SERIES_KEY.format(pair=series.pair, interval=series.interval)
+        cursor_key = self.CURSOR_KEY.format(pair=series.pair, interval=series.interval)
+        try:
+            cursor = await self.redis.client.hgetall(cursor_key)
+            if not cursor:
+                return False
+            start = series.last_time if series.last_time is not None else "-inf"
+            stored = await self.redis.client.zrangebyscore(series_key, start, "+inf")
+            series.merge([json.loads(member) for member in stored])
+            series.last = int(cursor.get("last", 0)) or series.last
+            carry_through = int(cursor.get("carry_through", 0))
+            if carry_through > (series.carry_through or 0):
+                series.carry = OHLCColumns.from_rows([json.loads(cursor["carry"])])
+                series.carry_through = carry_through
+            synced_at = float(cursor.get("synced_at", 0))
+            if time.time() - synced_at < self.refresh_interval:
+                series.synced_at = synced_at
+                return True
+        except Exception as e:
+            logger.warning(f"Failed to load OHLC series {series_key} from Redis: {e}")
+        return False
+
+    async def _persist(self, series: OHLCSeries, rows: List[Row]) -> None:
+        """Replace stored rows from the first new timestamp onwards and update the cursor"""
+        if not rows or not self.redis.connected:
+            return
+        series_key = self.SERIES_KEY.format(pair=series.pair, interval=series.interval)
+        cursor_key = self.CURSOR_KEY.format(pair=series.pair, interval=series.interval)
+        try:
+            async with self.redis.client.pipeline(transaction=True) as pipe:
+                pipe.zremrangebyscore(series_key, rows[0][0], "+inf")
+                pipe.zadd(series_key, {json.dumps(row, separators=(",", ":")): row[0] for row in rows})
+                pipe.zremrangebyrank(series_key, 0, -(self.window + 1))
+                pipe.hset(cursor_key, mapping={
+                    "last": series.last or 0,
+                    "synced_at": series.synced_at,
+                    **self._carry_fields(series),
+                })
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Failed to persist OHLC series {series_key} to Redis: {e}")
+
+    async def _persist_carry(self, series: OHLCSeries) -> None:
+        """Store the carried aggregate after a native sync of a resampled series"""
+        if not self.redis.connected:
+            return
+        cursor_key = self.CURSOR_KEY.format(pair=series.pair, interval=series.interval)
+        try:
+            await self.redis.client.hset(cursor_key, mapping=self._carry_fields(series))
+        except Exception as e:
+            logger.warning(f"Failed to persist OHLC carry {cursor_key} to Redis: {e}")
+
+
+# Global store instance
+_ohlc_store: Optional[OHLCStore] = None
+
+
+def get_ohlc_store() -> OHLCStore:
+    """Get or create the process-wide OHLC store"""
+    global _ohlc_store
+    if _ohlc_store is None:
+        _ohlc_store = OHLCStore()
+    return _ohlc_store
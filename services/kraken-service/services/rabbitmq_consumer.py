@@ -4,8 +4,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../..'))
 import asyncio
 import logging
 from typing import Optional
-from sqlalchemy.orm import Session
-from database import get_db
+from database import SessionLocal
 from services.bot_status_service import BotStatusService
 from utils.rabbitmq_client import RabbitMQClient, get_rabbitmq_client
 
@@ -13,7 +12,17 @@ logger = logging.getLogger(__name__)
 
 
 class RabbitMQConsumer:
-    """RabbitMQ consumer for bot result events"""
+    """
+    RabbitMQ consumer for bot result events
+
+    Each queue is handled by bounded lanes (RABBITMQ_CONSUMER_LANES) keyed by
+    user_id, so events of different users are applied concurrently while one
+    user's events stay in order. The database work runs in worker threads.
+    """
+    
+    # Bot result queues (only RabbitMQ events)
+    # Note: bot.trade.executed and bot.trade.skipped are now in Kafka
+    QUEUES = ("bot.started", "bot.stopped", "bot.error")
     
     def __init__(self):
         self.rabbitmq: Optional[RabbitMQClient] = None
@@ -37,52 +46,18 @@ class RabbitMQConsumer:
                 get_rabbitmq_client(timeout=timeout),
                 timeout=timeout
             )
-            self.running = True
-            
-            # Start consuming from bot result queues (only RabbitMQ events)
-            # Note: bot.trade.executed and bot.trade.skipped are now in Kafka
-            queues = [
-                ("bot.started", self._handle_bot_started),
-                ("bot.stopped", self._handle_bot_stopped),
-                ("bot.error", self._handle_bot_error),
-            ]
-            
-            for queue_name, handler in queues:
-                task = asyncio.create_task(
-                    self._consume_queue(queue_name, handler)
-                )
-                self.consume_tasks.append(task)
-                logger.info(f"Started consumer task for queue '{queue_name}'")
-            
             logger.info("RabbitMQ consumer started successfully")
         except asyncio.TimeoutError:
             logger.warning(f"RabbitMQ connection timed out after {timeout} seconds. Consumer will retry in background.")
-            self.running = True
-            # Start consumers in background with retry logic
-            queues = [
-                ("bot.started", self._handle_bot_started),
-                ("bot.stopped", self._handle_bot_stopped),
-                ("bot.error", self._handle_bot_error),
-            ]
-            for queue_name, handler in queues:
-                task = asyncio.create_task(
-                    self._consume_queue(queue_name, handler)
-                )
-                self.consume_tasks.append(task)
         except Exception as e:
             logger.warning(f"Failed to start RabbitMQ consumer: {e}. Consumer will retry in background.")
-            self.running = True
-            # Start consumers in background with retry logic
-            queues = [
-                ("bot.started", self._handle_bot_started),
-                ("bot.stopped", self._handle_bot_stopped),
-                ("bot.error", self._handle_bot_error),
-            ]
-            for queue_name, handler in queues:
-                task = asyncio.create_task(
-                    self._consume_queue(queue_name, handler)
-                )
-                self.consume_tasks.append(task)
+        
+        # Consume tasks connect with retry logic if the connection above failed
+        self.running = True
+        for queue_name in self.QUEUES:
+            task = asyncio.create_task(self._consume_queue(queue_name))
+            self.consume_tasks.append(task)
+            logger.info(f"Started consumer task for queue '{queue_name}'")
 
     async def stop(self):
         """Stop consuming messages"""
@@ -99,11 +74,14 @@ class RabbitMQConsumer:
         self.consume_tasks = []
         logger.info("RabbitMQ consumer stopped")
 
-    async def _consume_queue(self, queue_name: str, handler):
+    async def _consume_queue(self, queue_name: str):
         """Consume messages from a queue with retry logic"""
         retry_delay = 1.0  # Start with 1 second delay
         max_retry_delay = 60.0  # Max 60 seconds between retries
         
+        async def handler(message: dict):
+            await self._handle_event(queue_name, message)
+        
         while self.running:
             try:
                 # Ensure RabbitMQ client is connected
@@ -121,12 +99,17 @@ class RabbitMQConsumer:
                         retry_delay = min(retry_delay * 2, max_retry_delay)  # Exponential backoff
                         continue
                 
-                # consume() registers the consumer and runs indefinitely
-                # The handler will be called for each message
-                await self.rabbitmq.consume(queue_name, handler, durable=True, auto_ack=False)
-                # If consume returns (shouldn't happen normally), wait a bit and retry
-                await asyncio.sleep(1)
-                retry_delay = 1.0  # Reset retry delay on successful consume
+                # consume() registers the consumer and returns; messages are then
+                # dispatched to per-user lanes in the background
+                await self.rabbitmq.consume(
+                    queue_name,
+                    handler,
+                    durable=True,
+                    auto_ack=False,
+                    ordering_key=lambda message: message.get("user_id")
+                )
+                # The robust connection restores the consumer after reconnects; wait here until stop() cancels us
+                await asyncio.Event().wait()
             except asyncio.CancelledError:
                 logger.info(f"Consume task for queue '{queue_name}' cancelled")
                 break
@@ -137,41 +120,23 @@ class RabbitMQConsumer:
                 await asyncio.sleep(retry_delay)
                 retry_delay = min(retry_delay * 2, max_retry_delay)  # Exponential backoff
 
-    async def _handle_bot_started(self, message: dict):
-        """Handle bot.started event"""
-        try:
-            db = next(get_db())
-            bot_status_service = BotStatusService(db)
-            await bot_status_service.update_status_from_event("bot.started", message)
-        except Exception as e:
-            logger.error(f"Error handling bot.started event: {e}", exc_info=True)
-        finally:
-            if 'db' in locals():
-                db.close()
-
-    async def _handle_bot_stopped(self, message: dict):
-        """Handle bot.stopped event"""
-        try:
-            db = next(get_db())
-            bot_status_service = BotStatusService(db)
-            await bot_status_service.update_status_from_event("bot.stopped", message)
-        except Exception as e:
-            logger.error(f"Error handling bot.stopped event: {e}", exc_info=True)
-        finally:
-            if 'db' in locals():
-                db.close()
+    async def _handle_event(self, event_type: str, message: dict):
+        """
+        Handle bot.started / bot.stopped / bot.error events
+        
+        Errors propagate so the client retries the message with backoff and
+        dead-letters it after RABBITMQ_MAX_DELIVERY_ATTEMPTS.
+        """
+        # The status update is blocking database work; a thread keeps the other lanes running
+        await asyncio.to_thread(self._apply_event, event_type, message)
 
-    async def _handle_bot_error(self, message: dict):
-        """Handle bot.error event"""
+    @staticmethod
+    def _apply_event(event_type: str, message: dict):
+        db = SessionLocal()
         try:
-            db = next(get_db())
-            bot_status_service = BotStatusService(db)
-            await bot_status_service.update_status_from_event("bot.error", message)
-        except Exception as e:
-            logger.error(f"Error handling bot.error event: {e}", exc_info=True)
+            BotStatusService(db).apply_event(event_type, message)
         finally:
-            if 'db' in locals():
-                db.close()
+            db.close()
 
 
 # Global consumer instance
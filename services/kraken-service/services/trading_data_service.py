@@ -5,31 +5,41 @@ from sqlalchemy.orm import Session
 from fastapi import HTTPException, status
 import uuid
 import logging
+from typing import Dict, Optional
+import numpy as np
 from datetime import datetime, timezone
 from app.models.kraken_key import KrakenKey
-from app.schemas.trading_data import TradingDataResponse, BalanceResponse, OHLCResponse, TradingPairsResponse, TickerData
-from app.utils.kraken_client import KrakenClient
-from app.utils.redis_client import RedisClient
-from app.utils.vault_service import VaultService
+from app.schemas.trading_data import (
+    AssetBalance, TradingDataResponse, BalanceResponse, OHLCResponse, PortfolioResponse, TradingPairsResponse, TickerData
+)
+from app.utils.kraken_client import KrakenClient, get_kraken_transport
+from app.utils.async_redis_client import AsyncRedisClient, get_async_redis
+from app.utils.redis_client import user_tag
+from app.utils.stale_cache import get_stale_cache
+from app.utils.vault_service import AsyncVaultService, get_async_vault
 from utils.rabbitmq_client import get_rabbitmq_client
+from database import SessionLocal
+from services.market_data_service import MarketDataService
 
 logger = logging.getLogger(__name__)
 
 
 class TradingDataService:
     """Trading Data Agent - Service Layer"""
+
+    BALANCE_TTL = 60  # Served without a refresh for 1 minute
+    BALANCE_HARD_TTL = 300  # Then served stale (refreshing in the background) for up to 5 minutes
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, redis: Optional[AsyncRedisClient] = None, vault: Optional[AsyncVaultService] = None):
         self.db = db
-        self.redis = RedisClient()
-        try:
-            self.vault = VaultService()
-        except ImportError:
-            self.vault = None
+        self.redis = redis or get_async_redis()
+        self.stale_cache = get_stale_cache()
+        self.market_data = MarketDataService()
+        self.vault = vault or get_async_vault()
 
-    async def _get_active_key(self, user_id: uuid.UUID) -> tuple[KrakenKey, dict]:
+    async def _get_active_key(self, user_id: uuid.UUID, db: Optional[Session] = None) -> tuple[KrakenKey, dict]:
         """Get active Kraken key for user"""
-        key = self.db.query(KrakenKey).filter(
+        key = (db or self.db).query(KrakenKey).filter(
             KrakenKey.user_id == user_id,
             KrakenKey.is_active == True,
             KrakenKey.connection_status == "connected"
@@ -41,10 +51,10 @@ class TradingDataService:
                 detail="No active Kraken API key found. Please connect a key first."
             )
 
-        # Retrieve from Vault
+        # Retrieve from Vault (served from the in-process secret cache after the first call)
         if self.vault:
             try:
-                secrets = self.vault.get_secret(key.key_name)
+                secrets = await self.vault.get_secret(key.key_name)
                 return key, secrets
             except Exception as e:
                 raise HTTPException(
@@ -158,140 +168,101 @@ class TradingDataService:
             )
 
     async def get_live_data(self, user_id: uuid.UUID, pair: str) -> TradingDataResponse:
-        """Get live trading data (cached)"""
-        cache_key = f"trading_data:{user_id}:{pair}"
-        
-        # Check cache
-        cached = self.redis.get(cache_key)
-        if cached:
-            return TradingDataResponse(**cached)
-
-        # Fetch from Kraken
-        key, secrets = await self._get_active_key(user_id)
-        kraken_client = KrakenClient(secrets["api_key"], secrets["api_secret"])
-        
-        try:
-            ticker = await kraken_client.get_ticker(pair)
-            data = TradingDataResponse(
-                pair=pair,
-                price=ticker.get("price", 0.0),
-                volume=ticker.get("volume", 0.0),
-                timestamp=int(ticker.get("timestamp", 0)),
-                data=ticker
-            )
-            
-            # Cache for 30 seconds
-            self.redis.set(cache_key, data.model_dump(), ttl=30)
-            return data
-        finally:
-            await kraken_client.close()
+        """Get live trading data (public market data, shared by all users)"""
+        return await self.market_data.get_live_data(pair)
 
     async def get_available_pairs(self, user_id: uuid.UUID) -> TradingPairsResponse:
-        """Get available trading pairs"""
-        cache_key = "trading_pairs:all"
-        
-        # Check cache
-        cached = self.redis.get(cache_key)
-        if cached:
-            return TradingPairsResponse(**cached)
+        """Get available trading pairs (public market data, shared by all users)"""
+        return await self.market_data.get_available_pairs()
 
-        # Fetch from Kraken
-        key, secrets = await self._get_active_key(user_id)
-        kraken_client = KrakenClient(secrets["api_key"], secrets["api_secret"])
-        
-        try:
-            pairs = await kraken_client.get_trading_pairs()
-            data = TradingPairsResponse(pairs=pairs)
+    async def get_balances(self, user_id: uuid.UUID) -> Dict[str, dict]:
+        """
+        Get every asset balance of the user's account (one private Kraken call per refresh)
+
+        Returns:
+            dict: {"balance", "available"} per normalized asset code (e.g. XBT, USD)
+        """
+        cache_key = f"balances:{user_id}"
+
+        async def fetch() -> Dict[str, dict]:
+            # Own session: a background refresh outlives the request's session
+            db = SessionLocal()
+            try:
+                key, secrets = await self._get_active_key(user_id, db=db)
+            finally:
+                db.close()
+            kraken_client = KrakenClient(secrets["api_key"], secrets["api_secret"], transport=get_kraken_transport())
             
-            # Cache for 1 hour
-            self.redis.set(cache_key, data.model_dump(), ttl=3600)
-            return data
-        finally:
-            await kraken_client.close()
+            try:
+                return await kraken_client.get_balance()
+            finally:
+                await kraken_client.close()
+
+        return await self.stale_cache.get(
+            self.redis, cache_key, fetch, self.BALANCE_TTL, self.BALANCE_HARD_TTL, tags=[user_tag(user_id)], name="balance"
+        )
 
     async def get_balance(self, user_id: uuid.UUID) -> BalanceResponse:
         """Get account balance"""
-        cache_key = f"balance:{user_id}"
-        
-        # Check cache
-        cached = self.redis.get(cache_key)
-        if cached:
-            return BalanceResponse(**cached)
-
-        # Fetch from Kraken
-        key, secrets = await self._get_active_key(user_id)
-        kraken_client = KrakenClient(secrets["api_key"], secrets["api_secret"])
-        
-        try:
-            balance_data = await kraken_client.get_balance()
-            # Assuming USD balance for now
-            data = BalanceResponse(
-                currency="USD",
-                balance=balance_data.get("USD", {}).get("balance", 0.0),
-                available=balance_data.get("USD", {}).get("available", 0.0)
-            )
-            
-            # Cache for 1 minute
-            self.redis.set(cache_key, data.model_dump(), ttl=60)
-            return data
-        finally:
-            await kraken_client.close()
+        balances = await self.get_balances(user_id)
+        # Assuming USD balance for now
+        return BalanceResponse(
+            currency="USD",
+            balance=balances.get("USD", {}).get("balance", 0.0),
+            available=balances.get("USD", {}).get("available", 0.0)
+        )
 
-    async def get_ohlc(self, user_id: uuid.UUID, pair: str, interval: int) -> OHLCResponse:
-        """Get OHLC data"""
-        cache_key = f"ohlc:{user_id}:{pair}:{interval}"
-        
-        # Check cache
-        cached = self.redis.get(cache_key)
-        if cached:
-            return OHLCResponse(**cached)
+    async def get_portfolio(self, user_id: uuid.UUID, quote: str = "USD") -> PortfolioResponse:
+        """
+        Get all asset balances valued in a quote currency
 
-        # Fetch from Kraken
-        key, secrets = await self._get_active_key(user_id)
-        kraken_client = KrakenClient(secrets["api_key"], secrets["api_secret"])
-        
-        try:
-            ohlc_data = await kraken_client.get_ohlc(pair, interval)
-            data = OHLCResponse(
-                pair=pair,
-                interval=interval,
-                data=ohlc_data.get("data", [])
+        Rates come from the cached public tickers along precomputed conversion
+        routes (e.g. DOT -> XBT -> EUR when there is no DOT/EUR pair), so a
+        refresh costs one private call plus cached public data.
+        """
+        balances = await self.get_balances(user_id)
+        graph = await self.market_data.get_conversion_graph()
+        routes = graph.routes_to(quote)
+        if routes is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown quote currency '{quote}'"
             )
-            
-            # Cache for 5 minutes
-            self.redis.set(cache_key, data.model_dump(), ttl=300)
-            return data
-        finally:
-            await kraken_client.close()
 
-    async def get_ticker(self, user_id: uuid.UUID, pair: str) -> TickerData:
-        """Get ticker data"""
-        cache_key = f"ticker:{user_id}:{pair}"
-        
-        # Check cache
-        cached = self.redis.get(cache_key)
-        if cached:
-            return TickerData(**cached)
+        assets = sorted(balances)
+        amounts = np.array([balances[asset]["balance"] for asset in assets], dtype=np.float64)
+        prices = await self.market_data.get_prices(routes.pairs_for(assets))
+        rates = routes.rates(assets, prices)
+        values = amounts * rates
+        priced = ~np.isnan(values)
 
-        # Fetch from Kraken
-        key, secrets = await self._get_active_key(user_id)
-        kraken_client = KrakenClient(secrets["api_key"], secrets["api_secret"])
-        
-        try:
-            ticker = await kraken_client.get_ticker(pair)
-            data = TickerData(
-                pair=pair,
-                ask=ticker.get("ask", 0.0),
-                bid=ticker.get("bid", 0.0),
-                last=ticker.get("last", 0.0),
-                volume=ticker.get("volume", 0.0),
-                high=ticker.get("high", 0.0),
-                low=ticker.get("low", 0.0)
-            )
-            
-            # Cache for 30 seconds
-            self.redis.set(cache_key, data.model_dump(), ttl=30)
-            return data
-        finally:
-            await kraken_client.close()
+        return PortfolioResponse(
+            quote=routes.quote,
+            total_value=float(values[priced].sum()),
+            balances=[
+                AssetBalance(
+                    asset=asset,
+                    balance=balances[asset]["balance"],
+                    available=balances[asset]["available"],
+                    price=float(rates[i]) if priced[i] else None,
+                    value=float(values[i]) if priced[i] else None,
+                )
+                for i, asset in enumerate(assets)
+            ],
+            unpriced=[asset for i, asset in enumerate(assets) if not priced[i]],
+        )
 
+    async def get_ohlc(
+        self,
+        user_id: uuid.UUID,
+        pair: str,
+        interval: int,
+        start: Optional[int] = None,
+        end: Optional[int] = None,
+    ) -> OHLCResponse:
+        """Get OHLC data (public market data, shared by all users)"""
+        return await self.market_data.get_ohlc(pair, interval, start=start, end=end)
+
+    async def get_ticker(self, user_id: uuid.UUID, pair: str) -> TickerData:
+        """Get ticker data (public market data, shared by all users)"""
+        return await self.market_data.get_ticker(pair)
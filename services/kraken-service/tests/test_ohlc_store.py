@@ -0,0 +1,109 @@
+"""Daily candles are derived from the 1-minute series without calling Kraken once seeded"""
+import asyncio
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from services import ohlc_store as ohlc_store_module  # noqa: E402
+from services.ohlc_store import OHLCStore  # noqa: E402
+
+PAIR = "XXBTZUSD"
+DAY = 86400
+# 18:00 UTC: the newest daily candle started long before the 12 hour base window
+START = 1_700_006_400 + 18 * 3600
+
+
+class Clock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def time(self) -> float:
+        return self.now
+
+
+class FakeKraken:
+    """Kraken OHLC endpoint: one trade of volume 1 at price 100 per minute"""
+
+    def __init__(self, clock: Clock):
+        self.clock = clock
+        self.calls = []
+
+    async def get_ohlc(self, pair, interval, since=None):
+        self.calls.append((interval, since))
+        now = int(self.clock.now)
+        seconds = interval * 60
+        current = now - now % seconds
+        if interval == 1:
+            times = range(max(current - 719 * 60, since or 0), current + 1, 60)
+            rows = [[t, 100.0, 100.0, 100.0, 100.0, 100.0, 1.0, 1] for t in times]
+        else:
+            # Each native candle holds one trade per elapsed minute, including the forming one
+            rows = [[current - seconds, 100.0, 100.0, 100.0, 100.0, 100.0, float(interval), interval]]
+            minutes = (now - current) // 60 + 1
+            rows.append([current, 100.0, 100.0, 100.0, 100.0, 100.0, float(minutes), minutes])
+        return {"rows": rows, "last": current}
+
+
+class OfflineRedis:
+    connected = False
+
+
+class FakeMarketData:
+    async def resolve_pair(self, pair):
+        return PAIR
+
+
+class LocalSingleFlight:
+    async def do(self, key, fetch, cache_lookup=None, distributed=None):
+        return await fetch()
+
+
+def make_store(monkeypatch, clock: Clock) -> OHLCStore:
+    monkeypatch.setattr(ohlc_store_module.time, "time", clock.time)
+    monkeypatch.setattr(ohlc_store_module, "get_single_flight", LocalSingleFlight)
+    store = OHLCStore(
+        redis=OfflineRedis(), window=720, refresh_interval=60, base_interval=1, resampled_intervals=[1440]
+    )
+    store.kraken = FakeKraken(clock)
+    store._market_data = FakeMarketData()
+    return store
+
+
+def test_daily_series_makes_no_upstream_call_once_seeded(monkeypatch):
+    async def scenario():
+        clock = Clock(START)
+        store = make_store(monkeypatch, clock)
+        await store.get_series(PAIR, 1440)
+        assert {interval for interval, _ in store.kraken.calls} == {1, 1440}
+
+        store.kraken.calls.clear()
+        for _ in range(30):
+            clock.now += 60
+            series = await store.get_series(PAIR, 1440)
+        assert store.kraken.calls and all(interval == 1 for interval, _ in store.kraken.calls)
+
+        # The forming daily candle keeps counting one trade per minute since midnight
+        minutes = (int(clock.now) % DAY) // 60 + 1
+        assert series.columns.time[-1] == int(clock.now) - int(clock.now) % DAY
+        assert series.columns.count[-1] == minutes
+
+    asyncio.run(scenario())
+
+
+def test_daily_series_rolls_over_to_the_next_day(monkeypatch):
+    async def scenario():
+        clock = Clock(START + 5 * 3600 + 55 * 60)  # 23:55 UTC
+        store = make_store(monkeypatch, clock)
+        await store.get_series(PAIR, 1440)
+
+        store.kraken.calls.clear()
+        for _ in range(10):
+            clock.now += 60
+            series = await store.get_series(PAIR, 1440)
+        assert all(interval == 1 for interval, _ in store.kraken.calls)
+        assert series.columns.time[-1] == int(clock.now) - int(clock.now) % DAY
+        assert series.columns.count[-2] == 1440
+        assert series.columns.count[-1] == (int(clock.now) % DAY) // 60 + 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,11 @@
+from jose import JWTError, jwt
+from config import settings
+
+
+def decode_token(token: str) -> dict:
+    """Decode and verify a JWT token issued by the user service (same SECRET_KEY/ALGORITHM from the root .env)"""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        return payload
+    except JWTError:
+        raise ValueError("Invalid token")
@@ -1,19 +1,41 @@
+import sys
+import os
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../../..'))
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from database import get_db
 from services.auth_service import AuthService
+from services.user_service import UserService
+from app.utils.service_container import ServiceContainer, get_container
 from schemas.user import UserResponse
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/user/api/v1/auth/login")
 
 
+def get_auth_service(
+    db: Session = Depends(get_db),
+    container: ServiceContainer = Depends(get_container)
+) -> AuthService:
+    """AuthService wired to the application-scoped clients"""
+    return AuthService(
+        db, redis_client=container.redis, event_publisher=container.event_publisher, cache=container.cache
+    )
+
+
+def get_user_service(
+    db: Session = Depends(get_db),
+    container: ServiceContainer = Depends(get_container)
+) -> UserService:
+    """UserService wired to the application-scoped clients"""
+    return UserService(db, event_publisher=container.event_publisher, cache=container.cache)
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    auth_service: AuthService = Depends(get_auth_service)
 ) -> UserResponse:
     """Get current authenticated user"""
-    auth_service = AuthService(db)
     try:
         user = await auth_service.get_current_user(token)
         return user
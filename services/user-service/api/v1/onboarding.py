@@ -1,12 +1,10 @@
 """Onboarding API endpoints"""
 
 from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
 import logging
-from database import get_db
 from schemas.user import OnboardingData, OnboardingResponse
 from services.user_service import UserService
-from api.deps import get_current_user
+from api.deps import get_current_user, get_user_service
 from schemas.user import UserResponse
 
 logger = logging.getLogger(__name__)
@@ -17,7 +15,7 @@ router = APIRouter()
 async def complete_onboarding(
     onboarding_data: OnboardingData,
     current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user_service: UserService = Depends(get_user_service)
 ):
     """
     Complete user onboarding
@@ -26,7 +24,6 @@ async def complete_onboarding(
     """
     logger.info(f"Onboarding completion request for user: {current_user.id}")
     
-    user_service = UserService(db)
     result = await user_service.complete_onboarding(current_user.id, onboarding_data)
     
     logger.info(f"Onboarding completed successfully for user: {current_user.id}")
@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from database import get_db
 from schemas.user import UserResponse, UserUpdate
 from services.user_service import UserService
-from api.deps import get_current_user
+from api.deps import get_current_user, get_user_service
 
 router = APIRouter()
 
@@ -11,10 +11,9 @@ router = APIRouter()
 @router.get("", response_model=UserResponse)
 async def get_profile(
     current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user_service: UserService = Depends(get_user_service)
 ):
     """Get user profile"""
-    user_service = UserService(db)
     return await user_service.get_user_profile(current_user.id)
 
 
@@ -22,10 +21,9 @@ async def get_profile(
 async def update_profile(
     user_data: UserUpdate,
     current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user_service: UserService = Depends(get_user_service)
 ):
     """Update user profile"""
-    user_service = UserService(db)
     return await user_service.update_user_profile(current_user.id, user_data)
 
 
@@ -34,10 +32,9 @@ async def change_password(
     old_password: str,
     new_password: str,
     current_user: UserResponse = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    user_service: UserService = Depends(get_user_service)
 ):
     """Change user password"""
-    user_service = UserService(db)
     return await user_service.change_password(current_user.id, old_password, new_password)
 
 
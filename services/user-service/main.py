@@ -1,6 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
 from api.v1 import auth, profile, onboarding
 from config import settings
 import logging
@@ -8,7 +9,24 @@ import traceback
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="muckard - user service")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Manage service lifecycle"""
+    from app.utils.service_container import create_service_container
+    app.state.container = await create_service_container(vault=False)
+    logger.info("✅ Service container initialized (Redis, event publisher)")
+    
+    yield
+    
+    try:
+        await app.state.container.close()
+        logger.info("✅ Service container closed")
+    except Exception as e:
+        logger.warning(f"⚠️  Error closing service container: {e}")
+
+
+app = FastAPI(title="muckard - user service", lifespan=lifespan)
 
 # Add global exception handler to see actual errors
 @app.exception_handler(Exception)
@@ -5,12 +5,16 @@ from sqlalchemy.orm import Session
 from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException, status
 import logging
+from typing import Optional
 from models.user import User
 from schemas.user import UserCreate, UserResponse, Token
 from utils.security import verify_password, get_password_hash, create_access_token, create_refresh_token, decode_token
 from config import settings
 from services.otp_service import OTPService
-from app.utils.event_publisher import get_unified_event_publisher
+from services.user_service import profile_key
+from app.utils.event_publisher import UnifiedEventPublisher, get_unified_event_publisher
+from app.utils.async_redis_client import AsyncRedisClient
+from app.utils.tiered_cache import TieredCache, get_tiered_cache
 import uuid
 
 logger = logging.getLogger(__name__)
@@ -19,9 +23,18 @@ logger = logging.getLogger(__name__)
 class AuthService:
     """Authentication Agent - Service Layer"""
     
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        redis_client: Optional[AsyncRedisClient] = None,
+        event_publisher: Optional[UnifiedEventPublisher] = None,
+        cache: Optional[TieredCache] = None
+    ):
         self.db = db
-        self.otp_service = OTPService(db)
+        self.otp_service = OTPService(db, redis_client=redis_client)
+        self.redis_client = self.otp_service.redis_client
+        self.event_publisher = event_publisher
+        self.cache = cache or get_tiered_cache()
 
     async def register_user(self, user_data: UserCreate) -> UserResponse:
         """Register a new user"""
@@ -46,7 +59,7 @@ class AuthService:
         
         # Publish user.created event to Kafka (non-blocking - don't fail registration if Kafka is down)
         try:
-            event_publisher = await get_unified_event_publisher()
+            event_publisher = self.event_publisher or await get_unified_event_publisher()
             await event_publisher.publish("user.created", {
                 "user_id": str(db_user.id),
                 "email": db_user.email,
@@ -80,6 +93,7 @@ class AuthService:
         # Update last login
         user.last_login_at = datetime.now(timezone.utc)
         self.db.commit()
+        await self.cache.delete(profile_key(user.id))  # Publishes the invalidation to every worker
 
         # Create tokens
         access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -95,7 +109,7 @@ class AuthService:
         
         # Publish user.logged_in event to Kafka
         try:
-            event_publisher = await get_unified_event_publisher()
+            event_publisher = self.event_publisher or await get_unified_event_publisher()
             await event_publisher.publish("user.logged_in", {
                 "user_id": str(user.id),
                 "email": user.email,
@@ -279,7 +293,7 @@ class AuthService:
         
         # Publish user.created event to Kafka
         try:
-            event_publisher = await get_unified_event_publisher()
+            event_publisher = self.event_publisher or await get_unified_event_publisher()
             await event_publisher.publish("user.created", {
                 "user_id": str(db_user.id),
                 "email": db_user.email,
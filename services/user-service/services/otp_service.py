@@ -5,9 +5,10 @@ from sqlalchemy.orm import Session
 from datetime import datetime, timedelta, timezone
 from fastapi import HTTPException, status
 import random
+from typing import Optional
 import logging
 from models.otp import OTPVerification
-from utils.redis_client import RedisClient
+from app.utils.async_redis_client import AsyncRedisClient, get_async_redis
 from services.email_service import EmailService
 
 logger = logging.getLogger(__name__)
@@ -19,9 +20,9 @@ class OTPService:
     OTP_EXPIRY_MINUTES = 10
     REDIS_KEY_PREFIX = "otp:"
     
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, redis_client: Optional[AsyncRedisClient] = None):
         self.db = db
-        self.redis_client = RedisClient()
+        self.redis_client = redis_client or get_async_redis()
         self.email_service = EmailService()
     
     def generate_otp(self) -> str:
@@ -45,9 +46,9 @@ class OTPService:
         """
         logger.info(f"[OTP_SERVICE] create_otp called for email: {email}, name: {name}")
         
-        # Invalidate any existing OTP for this email
+        # Invalidate any existing OTP for this email (the Redis entry is overwritten below)
         logger.debug(f"[OTP_SERVICE] Invalidating existing OTPs for: {email}")
-        await self._invalidate_existing_otp(email)
+        self._invalidate_existing_otp(email)
         
         # Generate new OTP
         logger.debug(f"[OTP_SERVICE] Generating new OTP code")
@@ -76,7 +77,7 @@ class OTPService:
                 "otp_id": str(otp_record.id),
                 "expires_at": expires_at.isoformat()
             }
-            self.redis_client.set(redis_key, otp_data, ttl=600)
+            await self.redis_client.set(redis_key, otp_data, ttl=600)
             logger.info(f"[OTP_SERVICE] OTP stored in Redis with key: {redis_key}")
         except Exception as e:
             logger.warning(f"[OTP_SERVICE] Failed to store OTP in Redis: {str(e)}. Continuing with database-only storage.")
@@ -91,8 +92,8 @@ class OTPService:
         
         return otp_record
     
-    async def _invalidate_existing_otp(self, email: str):
-        """Invalidate any existing unverified OTP for this email"""
+    def _invalidate_existing_otp(self, email: str):
+        """Invalidate any existing unverified OTP for this email in the database"""
         # Mark existing OTPs as expired in database
         existing_otps = self.db.query(OTPVerification).filter(
             OTPVerification.email == email,
@@ -106,10 +107,6 @@ class OTPService:
         
         if existing_otps:
             self.db.commit()
-        
-        # Delete from Redis
-        redis_key = self._get_redis_key(email)
-        self.redis_client.delete(redis_key)
     
     async def verify_otp(self, email: str, otp_code: str) -> bool:
         """
@@ -124,7 +121,7 @@ class OTPService:
         """
         # First check Redis for fast lookup
         redis_key = self._get_redis_key(email)
-        cached_otp = self.redis_client.get(redis_key)
+        cached_otp = await self.redis_client.get(redis_key)
         
         if cached_otp:
             if cached_otp.get("otp_code") == otp_code:
@@ -145,7 +142,7 @@ class OTPService:
                     self.db.commit()
                     
                     # Delete from Redis
-                    self.redis_client.delete(redis_key)
+                    await self.redis_client.delete(redis_key)
                     
                     return True
         
@@ -164,7 +161,7 @@ class OTPService:
             self.db.commit()
             
             # Delete from Redis if exists
-            self.redis_client.delete(redis_key)
+            await self.redis_client.delete(redis_key)
             
             return True
         
@@ -6,29 +6,51 @@ from datetime import datetime, timezone
 from fastapi import HTTPException, status
 import uuid
 import logging
+from typing import Optional
 from models.user import User
 from schemas.user import UserResponse, UserUpdate, OnboardingData
 from utils.security import verify_password, get_password_hash
-from app.utils.event_publisher import get_unified_event_publisher
+from app.utils.event_publisher import UnifiedEventPublisher, get_unified_event_publisher
+from app.utils.tiered_cache import TieredCache, get_tiered_cache
 
 logger = logging.getLogger(__name__)
 
+PROFILE_TTL = 300  # 5 minutes
+
+
+def profile_key(user_id) -> str:
+    """Cache key of a user's profile (a CACHE_TRACKING_PREFIXES key: invalidated by Redis on write)"""
+    return f"profile:{user_id}"
+
 
 class UserService:
     """User Management Service"""
     
-    def __init__(self, db: Session):
+    def __init__(
+        self,
+        db: Session,
+        event_publisher: Optional[UnifiedEventPublisher] = None,
+        cache: Optional[TieredCache] = None
+    ):
         self.db = db
+        self.event_publisher = event_publisher
+        self.cache = cache or get_tiered_cache()
 
     async def get_user_profile(self, user_id: uuid.UUID) -> UserResponse:
         """Get user profile"""
+        cached = await self.cache.get(profile_key(user_id))
+        if cached:
+            return UserResponse(**cached)
+
         user = self.db.query(User).filter(User.id == user_id).first()
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
-        return UserResponse.model_validate(user)
+        profile = UserResponse.model_validate(user)
+        await self.cache.set(profile_key(user_id), profile.model_dump(mode="json"), ttl=PROFILE_TTL)
+        return profile
 
     async def update_user_profile(self, user_id: uuid.UUID, user_data: UserUpdate) -> UserResponse:
         """Update user profile"""
@@ -56,6 +78,7 @@ class UserService:
 
         self.db.commit()
         self.db.refresh(user)
+        await self.cache.delete(profile_key(user_id))
         
         # Publish user.updated event to Kafka
         updated_fields = []
@@ -66,7 +89,7 @@ class UserService:
         
         if updated_fields:
             try:
-                event_publisher = await get_unified_event_publisher()
+                event_publisher = self.event_publisher or await get_unified_event_publisher()
                 await event_publisher.publish("user.updated", {
                     "user_id": str(user_id),
                     "updated_fields": updated_fields,
@@ -131,7 +154,7 @@ class UserService:
         
         # Publish event to Kafka (onboarding.completed already handled by main app, but keep for consistency)
         try:
-            event_publisher = await get_unified_event_publisher()
+            event_publisher = self.event_publisher or await get_unified_event_publisher()
             await event_publisher.publish("onboarding.completed", {
                 "user_id": str(user_id),
                 "timestamp": datetime.now(timezone.utc).isoformat(),
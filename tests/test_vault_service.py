@@ -0,0 +1,71 @@
+"""AsyncVaultService must not cache a secret read that raced with an invalidation"""
+import asyncio
+import httpx
+from app.config import settings
+from app.utils.vault_service import AsyncVaultService
+
+PATH = "kraken/user-1/api_key"
+
+
+def make_vault(monkeypatch, handler) -> AsyncVaultService:
+    monkeypatch.setattr(settings, "VAULT_URL", "http://vault.test")
+    vault = AsyncVaultService()
+    vault.client = httpx.AsyncClient(base_url="http://vault.test", transport=httpx.MockTransport(handler))
+    return vault
+
+
+def test_read_racing_invalidation_is_not_cached(monkeypatch):
+    async def scenario():
+        versions = iter(["old", "new"])
+        first_read_started = asyncio.Event()
+        release_first_read = asyncio.Event()
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            version = next(versions)
+            if version == "old":
+                first_read_started.set()
+                await release_first_read.wait()
+            return httpx.Response(200, json={"data": {"data": {"api_key": version}}})
+
+        vault = make_vault(monkeypatch, handler)
+        stale_read = asyncio.create_task(vault.get_secret(PATH))
+        await first_read_started.wait()
+
+        # The key is rotated while the first read is still waiting on Vault
+        vault.invalidate(PATH)
+        release_first_read.set()
+        assert (await stale_read)["api_key"] == "old"
+
+        assert vault.cache.get(PATH) is None
+        assert (await vault.get_secret(PATH))["api_key"] == "new"
+        assert vault.cache.get(PATH)["api_key"] == "new"
+        await vault.close()
+
+    asyncio.run(scenario())
+
+
+def test_invalidate_detaches_in_flight_read(monkeypatch):
+    async def scenario():
+        versions = iter(["old", "new"])
+        release_first_read = asyncio.Event()
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            version = next(versions)
+            if version == "old":
+                await release_first_read.wait()
+            return httpx.Response(200, json={"data": {"data": {"api_key": version}}})
+
+        vault = make_vault(monkeypatch, handler)
+        stale_read = asyncio.create_task(vault.get_secret(PATH))
+        await asyncio.sleep(0)
+        vault.invalidate_user("user-1")
+
+        # A read after the invalidation does not join the stale one
+        fresh_read = asyncio.create_task(vault.get_secret(PATH))
+        assert (await fresh_read)["api_key"] == "new"
+        release_first_read.set()
+        await stale_read
+        assert vault.cache.get(PATH)["api_key"] == "new"
+        await vault.close()
+
+    asyncio.run(scenario())